@@ -0,0 +1,169 @@
+"""
+Cross-session inference scheduler benchmark
+
+Simulates N trainees (50 by default) that each send a frame every
+--interval-ms into their own latest-frame slot, exactly like /ws/pose,
+and serves them two ways:
+
+  per-connection  every session runs inference on its own thread, so N
+                  detectors compete for the cores at once
+  scheduler       all sessions share a PoseScheduler with one worker per
+                  core, served round-robin, dropping frames that would
+                  miss the latency SLO
+
+Every session first checks its detector out of a DetectorPool with the
+server's defaults (POSE_DETECTOR_POOL_SIZE warm, growing up to
+POSE_DETECTOR_POOL_MAX), so a pool too small for N sessions fails here
+the way /ws/pose would refuse them.
+
+Latency is measured from the frame's arrival to its result. Reported are
+the aggregate completed fps, the fps answered within the SLO (goodput),
+latency percentiles and the slowest/fastest session's fps.
+
+Usage (from backend/):
+    python benchmarks/pose_scheduler.py
+    python benchmarks/pose_scheduler.py --image person.jpg --sessions 50 --slo-ms 500
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, '..', 'ml_models', 'pose_detection'))
+
+from pose_detector import PoseDetector  # noqa: E402
+from exercise_analyzer import ExerciseAnalyzer  # noqa: E402
+from services.pose_inference import process_frame  # noqa: E402
+from services.pose_scheduler import DeadlineExceeded, PoseScheduler  # noqa: E402
+from services.detector_pool import DetectorPool  # noqa: E402
+from services.pose_session import LatestFrameSlot  # noqa: E402
+from pose_sessions import PoseInferenceExecutor, load_frame  # noqa: E402
+
+
+async def produce(slot, interval, duration):
+    """Offer a frame every `interval` seconds, like the browser does"""
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        slot.put(time.perf_counter_ns())
+        await asyncio.sleep(interval)
+    slot.close()
+
+
+async def consume(slot, run, detector, image, slo_ns, stats):
+    """Process the newest frame until the slot closes"""
+    while True:
+        received_ns = await slot.get()
+        if received_ns is None:
+            return
+        try:
+            await run(received_ns + slo_ns, process_frame, detector, ExerciseAnalyzer(), "squat", image)
+        except DeadlineExceeded:
+            stats['late'] += 1
+            continue
+        stats['latencies'].append(time.perf_counter_ns() - received_ns)
+
+
+async def measure(mode, detectors, scheduler, image, interval, duration, slo_ms):
+    """Serve one simulated session per detector in the given mode"""
+    slo_ns = int(slo_ms * 1e6)
+    sessions = [{'latencies': [], 'late': 0} for _ in detectors]
+    slots = [LatestFrameSlot() for _ in detectors]
+
+    if mode == "scheduler":
+        runners = [
+            (lambda lane: lambda deadline_ns, func, *args: scheduler.run_frame(lane, deadline_ns, func, *args))(i)
+            for i in range(len(detectors))
+        ]
+        shutdown = []
+    else:
+        executors = [PoseInferenceExecutor(max_workers=1) for _ in detectors]
+        runners = [
+            (lambda executor: lambda deadline_ns, func, *args: executor.run(func, *args))(executor)
+            for executor in executors
+        ]
+        shutdown = [executor.shutdown for executor in executors]
+
+    try:
+        await asyncio.gather(
+            *[produce(slot, interval, duration) for slot in slots],
+            *[
+                consume(slot, run, detector, image, slo_ns, stats)
+                for slot, run, detector, stats in zip(slots, runners, detectors, sessions)
+            ]
+        )
+    finally:
+        for stop in shutdown:
+            stop()
+
+    latencies = np.array([ns for stats in sessions for ns in stats['latencies']]) / 1e6
+    per_session_fps = [len(stats['latencies']) / duration for stats in sessions]
+    return {
+        'fps': len(latencies) / duration,
+        'in_slo_fps': int(np.sum(latencies <= slo_ms)) / duration,
+        'p50_ms': float(np.percentile(latencies, 50)) if len(latencies) else 0.0,
+        'p95_ms': float(np.percentile(latencies, 95)) if len(latencies) else 0.0,
+        'late': sum(stats['late'] for stats in sessions),
+        'min_session_fps': min(per_session_fps),
+        'max_session_fps': max(per_session_fps),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='Frame to send (defaults to synthetic noise)')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--sessions', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help='Scheduler worker threads')
+    parser.add_argument('--interval-ms', type=float, default=300, help='Client send interval')
+    parser.add_argument('--slo-ms', type=float, default=500, help='Latency SLO')
+    parser.add_argument('--duration', type=float, default=10, help='Seconds per measurement')
+    args = parser.parse_args()
+
+    image = load_frame(args.image, args.width, args.height)
+    asyncio.run(run_all(args, image))
+
+
+async def run_all(args, image):
+    """Check out one detector per session from the pool, then measure both modes"""
+    scheduler = PoseScheduler(workers=args.workers)
+    pool = DetectorPool(PoseDetector)
+    await pool.start(scheduler)
+    detectors = []
+    try:
+        print(f"Connecting {args.sessions} sessions...")
+        detectors = await asyncio.gather(*[pool.acquire() for _ in range(args.sessions)])
+        pool_stats = pool.metrics()
+        print(f"Detector pool: {pool_stats['size']} detectors ({pool_stats['warm_size']} warm, "
+              f"{pool_stats['created'] - pool_stats['warm_size']} built on demand, max {pool_stats['max_size']}), "
+              f"max wait {pool_stats['max_wait_ms']:.0f} ms")
+        for detector in detectors:
+            # The first frame initializes the graph, keep it out of the numbers
+            process_frame(detector, ExerciseAnalyzer(), "squat", image)
+
+        print(f"CPU cores: {os.cpu_count()}  sessions: {args.sessions}  send interval: {args.interval_ms:.0f} ms  "
+              f"SLO: {args.slo_ms:.0f} ms")
+        print(f"{'mode':<15} {'fps':>7} {'in SLO':>7} {'p50 ms':>8} {'p95 ms':>8} {'late':>6} "
+              f"{'min/max session fps':>20}")
+        for mode in ("per-connection", "scheduler"):
+            stats = await measure(
+                mode, detectors, scheduler, image, args.interval_ms / 1000, args.duration, args.slo_ms
+            )
+            print(f"{mode:<15} {stats['fps']:>7.1f} {stats['in_slo_fps']:>7.1f} {stats['p50_ms']:>8.1f} "
+                  f"{stats['p95_ms']:>8.1f} {stats['late']:>6} "
+                  f"{stats['min_session_fps']:>9.2f}/{stats['max_session_fps']:<.2f}")
+    finally:
+        for detector in detectors:
+            await pool.release(detector)
+        print(f"After release: {pool.metrics()['size']} detectors kept")
+        scheduler.shutdown()
+        pool.close()
+
+if __name__ == "__main__":
+    main()
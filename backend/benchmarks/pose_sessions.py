@@ -0,0 +1,175 @@
+"""
+Concurrent /ws/pose session ceiling benchmark
+
+Simulates N trainees that each send a frame every --interval-ms (the
+frontend sends one every 300 ms) through one plain shared thread pool,
+the baseline before /ws/pose moved to the PoseScheduler (compare the two
+with pose_scheduler.py). A configuration keeps up
+when the p95 frame latency stays below the send interval. The benchmark
+doubles the session count until that stops being true and reports the
+ceiling for each worker count up to the number of CPU cores.
+
+Usage (from backend/):
+    python benchmarks/pose_sessions.py
+    python benchmarks/pose_sessions.py --image person.jpg --duration 10
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, '..', 'ml_models', 'pose_detection'))
+
+from pose_detector import PoseDetector  # noqa: E402
+from exercise_analyzer import ExerciseAnalyzer  # noqa: E402
+from services.pose_inference import process_frame  # noqa: E402
+from services.pose_scheduler import configured_workers  # noqa: E402
+
+
+class PoseInferenceExecutor:
+    """
+    Plain shared thread pool, the baseline the PoseScheduler replaced
+    """
+
+    def __init__(self, max_workers=None):
+        """
+        Args:
+            max_workers: Number of inference threads (defaults to configured_workers())
+        """
+        self.max_workers = max_workers or configured_workers()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers,
+            thread_name_prefix="pose-inference"
+        )
+
+    async def run(self, func, *args):
+        """
+        Run a blocking function on the pool and await its result
+
+        Args:
+            func: Callable doing CPU-bound work
+            *args: Positional arguments for func
+
+        Returns:
+            Whatever func returns
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def shutdown(self, wait=True):
+        """Stop accepting work and release the worker threads"""
+        self._executor.shutdown(wait=wait)
+
+
+def load_frame(image_path, width, height):
+    """Return a JPEG data URL like the one the browser sends"""
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise SystemExit(f"Could not read image: {image_path}")
+    else:
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    _, buffer = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, 50])
+    return "data:image/jpeg;base64," + base64.b64encode(buffer).decode('utf-8')
+
+
+async def run_session(executor, image, interval, duration, latencies):
+    """One simulated trainee: send a frame, wait for the answer, keep the pace"""
+    pose_detector, exercise_analyzer = await executor.run(
+        lambda: (PoseDetector(), ExerciseAnalyzer())
+    )
+    try:
+        # The first frame initializes the graph, keep it out of the numbers
+        await executor.run(process_frame, pose_detector, exercise_analyzer, "squat", image)
+        deadline = time.perf_counter() + duration
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            await executor.run(process_frame, pose_detector, exercise_analyzer, "squat", image)
+            elapsed = time.perf_counter() - start
+            latencies.append(elapsed)
+            await asyncio.sleep(max(0.0, interval - elapsed))
+    finally:
+        pose_detector.close()
+
+
+async def measure(workers, sessions, image, interval, duration):
+    """Run `sessions` simulated trainees on a pool of `workers` threads"""
+    executor = PoseInferenceExecutor(max_workers=workers)
+    latencies = []
+    try:
+        await asyncio.gather(*[
+            run_session(executor, image, interval, duration, latencies)
+            for _ in range(sessions)
+        ])
+    finally:
+        executor.shutdown()
+
+    latencies = np.array(latencies)
+    return {
+        'frames': len(latencies),
+        'fps': len(latencies) / duration,
+        'p50_ms': float(np.percentile(latencies, 50) * 1000) if len(latencies) else 0.0,
+        'p95_ms': float(np.percentile(latencies, 95) * 1000) if len(latencies) else 0.0,
+    }
+
+
+def worker_counts(max_workers):
+    """1, 2, 4, ... up to and including max_workers"""
+    counts = []
+    n = 1
+    while n < max_workers:
+        counts.append(n)
+        n *= 2
+    counts.append(max_workers)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--image', help='Frame to send (defaults to synthetic noise)')
+    parser.add_argument('--width', type=int, default=640)
+    parser.add_argument('--height', type=int, default=480)
+    parser.add_argument('--interval-ms', type=float, default=300, help='Client send interval')
+    parser.add_argument('--duration', type=float, default=5, help='Seconds per measurement')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--max-sessions', type=int, default=256)
+    args = parser.parse_args()
+
+    image = load_frame(args.image, args.width, args.height)
+    interval = args.interval_ms / 1000
+
+    print(f"CPU cores: {os.cpu_count()}  send interval: {args.interval_ms:.0f} ms")
+    print(f"{'workers':>8} {'sessions':>9} {'fps':>8} {'p50 ms':>8} {'p95 ms':>8}  keeps up")
+
+    ceilings = {}
+    for workers in worker_counts(args.max_workers):
+        ceiling = 0
+        sessions = 1
+        while sessions <= args.max_sessions:
+            stats = asyncio.run(measure(workers, sessions, image, interval, args.duration))
+            keeps_up = stats['p95_ms'] <= args.interval_ms
+            print(f"{workers:>8} {sessions:>9} {stats['fps']:>8.1f} {stats['p50_ms']:>8.1f} "
+                  f"{stats['p95_ms']:>8.1f}  {'yes' if keeps_up else 'no'}")
+            if not keeps_up:
+                break
+            ceiling = sessions
+            sessions *= 2
+        ceilings[workers] = ceiling
+
+    print("\nConcurrent session ceiling (p95 latency <= send interval):")
+    for workers, ceiling in ceilings.items():
+        print(f"  {workers:>3} workers: {ceiling} sessions")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Backend worker start-up benchmark
+
+Starts fresh interpreters and reports, per configuration, how long
+`import app` and the startup events take and the worker's peak RSS:
+
+  api only         POSE_PRELOAD=false: what a worker serving /api/diet,
+                   /api/workout or /api/analytics pays
+  + analytics      api only, then the first analytics request's imports
+  + first pose     api only, then the first /ws/pose session's imports
+                   and detector pool warm-up
+  pose preloaded   POSE_PRELOAD=true: MediaPipe and the pool at startup
+
+Usage (from backend/):
+    python benchmarks/startup.py
+    python benchmarks/startup.py --repeat 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+
+# Runs in the child interpreter; prints one JSON line of measurements
+CHILD = r'''
+import asyncio, json, resource, sys, time
+
+def peak_rss_mb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+result = {}
+started = time.perf_counter()
+import app
+result["import_s"] = time.perf_counter() - started
+
+started = time.perf_counter()
+asyncio.run(app.app.router.startup())
+result["startup_s"] = time.perf_counter() - started
+
+started = time.perf_counter()
+if MODE == "analytics":
+    import pandas
+    from routes.analytics import get_analytics_engine
+    get_analytics_engine()
+elif MODE == "pose":
+    from routes import pose_websocket
+    from services.detector_pool import start_detector_pool
+    from services.pose_scheduler import get_pose_scheduler
+    pose_websocket._load_pose_modules()
+    asyncio.run(start_detector_pool(pose_websocket._create_detector, get_pose_scheduler()))
+result["first_request_s"] = time.perf_counter() - started
+
+result["rss_mb"] = peak_rss_mb()
+result["modules"] = [name for name in ("numpy", "pandas", "cv2", "mediapipe") if name in sys.modules]
+print(json.dumps(result))
+'''
+
+CONFIGURATIONS = (
+    ("api only", {"POSE_PRELOAD": "false"}, None),
+    ("+ analytics", {"POSE_PRELOAD": "false"}, "analytics"),
+    ("+ first pose", {"POSE_PRELOAD": "false"}, "pose"),
+    ("pose preloaded", {"POSE_PRELOAD": "true"}, None),
+)
+
+
+def run_child(env_overrides, mode):
+    """Measure one fresh interpreter"""
+    env = {**os.environ, **env_overrides, "PYTHONPATH": backend_dir}
+    completed = subprocess.run(
+        [sys.executable, "-c", f"MODE = {mode!r}\n" + CHILD],
+        cwd=backend_dir, env=env, capture_output=True, text=True
+    )
+    for line in reversed(completed.stdout.splitlines()):
+        if line.startswith("{"):
+            return json.loads(line)
+    raise SystemExit(f"Child failed:\n{completed.stdout}\n{completed.stderr}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=3, help='Fresh interpreters per configuration (median)')
+    args = parser.parse_args()
+
+    print(f"{'configuration':<16} {'import s':>9} {'startup s':>10} {'first req s':>12} {'peak RSS MB':>12}  heavy modules")
+    for name, env_overrides, mode in CONFIGURATIONS:
+        runs = [run_child(env_overrides, mode) for _ in range(args.repeat)]
+        median = {key: statistics.median(run[key] for run in runs)
+                  for key in ("import_s", "startup_s", "first_request_s", "rss_mb")}
+        first_request = f"{median['first_request_s']:.3f}" if mode else "-"
+        print(f"{name:<16} {median['import_s']:>9.3f} {median['startup_s']:>10.3f} {first_request:>12} "
+              f"{median['rss_mb']:>12.1f}  {', '.join(runs[-1]['modules']) or '-'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""
+Workout streak benchmark
+
+Generates active workout days for many users and times the nightly
+computation of every user's current and longest streak:
+
+  per-user loop    the old _calculate_streak: DataFrame per user, sort,
+                   walk the unique dates (timed on a sample, extrapolated)
+  vectorized       streaks_by_user(): one sort and run-length pass for all
+
+Results of the vectorized pass are checked against streak_runs() on the
+sampled users.
+
+Usage (from backend/):
+    python benchmarks/streaks.py
+    python benchmarks/streaks.py --users 100000 --days 60
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(backend_dir, '..', 'ml_models'))
+
+from analytics.analytics_engine import epoch_days, streak_runs, streaks_by_user
+
+
+def loop_streak(df, today):
+    """The per-user loop _calculate_streak used to run"""
+    df = df.sort_values('date', ascending=False)
+    df['date_only'] = df['date'].dt.date
+    streak = 0
+    for day in df['date_only'].unique():
+        if day == today or day == today - timedelta(days=streak):
+            streak += 1
+        else:
+            break
+    return streak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--users', type=int, default=100000)
+    parser.add_argument('--days', type=int, default=60, help='Average active days per user (within a year)')
+    parser.add_argument('--sample', type=int, default=500, help='Users timed with the per-user loop')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    today = date.today()
+    today_day = int(epoch_days(today))
+    per_user = rng.poisson(args.days, args.users)
+    user_ids = np.repeat(np.arange(args.users), per_user)
+    # Recent days are likelier, so that current streaks are not all zero
+    days = today_day - np.minimum(rng.exponential(args.days, user_ids.size).astype(np.int64), 364)
+    print(f"{args.users} users, {user_ids.size} workout days")
+
+    started = time.perf_counter()
+    streaks = streaks_by_user(user_ids, days, today_day)
+    vectorized = time.perf_counter() - started
+
+    sample = rng.choice(args.users, size=min(args.sample, args.users), replace=False)
+    frames = {
+        user: pd.DataFrame({'date': pd.to_datetime(days[user_ids == user], unit='D')})
+        for user in sample
+    }
+    started = time.perf_counter()
+    old = {user: loop_streak(frame, today) for user, frame in frames.items()}
+    loop = (time.perf_counter() - started) / len(sample) * args.users
+
+    mismatches = 0
+    for user in sample:
+        current, longest = streak_runs(days[user_ids == user], today_day)
+        row = streaks.loc[user] if user in streaks.index else None
+        expected = (current, longest)
+        actual = (int(row['current_streak']), int(row['longest_streak'])) if row is not None else (0, 0)
+        mismatches += expected != actual or old[user] != current
+
+    print(f"per-user loop    {loop:8.2f} s (extrapolated from {len(sample)} users)")
+    print(f"vectorized       {vectorized:8.2f} s")
+    print(f"current streak > 0 for {int((streaks['current_streak'] > 0).sum())} users, "
+          f"longest streak max {int(streaks['longest_streak'].max())}; {mismatches} mismatches in sample")
+
+
+if __name__ == "__main__":
+    main()
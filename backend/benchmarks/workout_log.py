@@ -0,0 +1,100 @@
+"""
+Workout log ingest benchmark
+
+For each history size, compares the time to log one workout with the
+old read-concat-rewrite path against WorkoutHistoryStore.append(), then
+fires concurrent appends at the store and checks that none were lost.
+
+Usage (from backend/):
+    python benchmarks/workout_log.py
+    python benchmarks/workout_log.py --sizes 1000 100000 1000000 --concurrent 500
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import wait
+
+import numpy as np
+import pandas as pd
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.join(backend_dir, '..', 'ml_models'))
+
+from analytics.history_store import COLUMNS, WorkoutHistoryStore
+
+
+def workout(i):
+    return {
+        'date': '2026-01-01', 'exercise_type': 'squat', 'duration_minutes': 30,
+        'calories_burned': 300 + i % 100, 'intensity': 7, 'reps': 10, 'sets': 3
+    }
+
+
+def write_history(path, rows):
+    """Write a synthetic history with `rows` workouts"""
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        'date': (pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 2000, rows), unit='D')).strftime('%Y-%m-%d'),
+        'exercise_type': rng.choice(['squat', 'pushup', 'plank'], rows),
+        'duration_minutes': rng.integers(10, 60, rows),
+        'calories_burned': rng.integers(100, 600, rows),
+        'intensity': rng.integers(1, 11, rows),
+        'reps': rng.integers(0, 30, rows),
+        'sets': rng.integers(1, 5, rows),
+    }, columns=COLUMNS).to_csv(path, index=False)
+
+
+def rewrite_insert(path, row):
+    """What /log-workout used to do"""
+    df = pd.read_csv(path)
+    df = pd.concat([df, pd.DataFrame([row])], ignore_index=True)
+    df.to_csv(path, index=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 100000, 1000000])
+    parser.add_argument('--inserts', type=int, default=20, help='Sequential inserts timed per size')
+    parser.add_argument('--concurrent', type=int, default=200, help='Appends submitted at once')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'history rows':>12} {'rewrite ms':>11} {'append ms':>10}")
+        for size in args.sizes:
+            path = os.path.join(tmp, f'history_{size}.csv')
+            write_history(path, size)
+            rewrite = []
+            for i in range(min(args.inserts, 3)):
+                started = time.perf_counter()
+                rewrite_insert(path, workout(i))
+                rewrite.append(time.perf_counter() - started)
+
+            write_history(path, size)
+            store = WorkoutHistoryStore(path)
+            store.frame()
+            append = []
+            for i in range(args.inserts):
+                started = time.perf_counter()
+                store.append(workout(i)).result()
+                append.append(time.perf_counter() - started)
+            store.close()
+            print(f"{size:>12} {statistics.median(rewrite) * 1e3:>11.2f} {statistics.median(append) * 1e3:>10.2f}")
+
+        path = os.path.join(tmp, 'concurrent.csv')
+        store = WorkoutHistoryStore(path)
+        started = time.perf_counter()
+        futures = [store.append(workout(i)) for i in range(args.concurrent)]
+        wait(futures)
+        elapsed = time.perf_counter() - started
+        store.close()
+        on_disk = len(pd.read_csv(path))
+        print(f"\n{args.concurrent} concurrent appends: {elapsed * 1e3:.1f} ms, {store.fsyncs} fsyncs, "
+              f"{on_disk} rows on disk, {len(store.frame())} in memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,7 +2,7 @@
 Database models using SQLAlchemy
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, Float, Date, DateTime, ForeignKey, JSON, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -45,9 +45,51 @@ class Workout(Base):
     duration_minutes = Column(Integer)
     calories_burned = Column(Float)
     form_score = Column(Float)  # 0-100
+    intensity = Column(Integer)  # 1-10 scale
+    reps = Column(Integer, default=0)
+    sets = Column(Integer, default=0)
     completed_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="workouts")
+    
+    # History and analytics read one user's workouts in a time range
+    __table_args__ = (
+        Index("ix_workouts_user_completed", "user_id", "completed_at"),
+    )
+
+
+class WorkoutDailyRollup(Base):
+    """
+    One user's workouts per day and exercise, summed as they are tracked
+    
+    Weekly and 30-day analytics read at most that many days of these.
+    """
+    __tablename__ = "workout_daily_rollups"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    exercise_type = Column(String, primary_key=True)
+    workouts = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Float, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+    intensity_sum = Column(Integer, nullable=False, default=0)
+    intensity_count = Column(Integer, nullable=False, default=0)  # workouts with an intensity
+
+
+class WorkoutTotal(Base):
+    """
+    One user's lifetime workouts per exercise and weekday (0 = Monday)
+    
+    All-time analytics read at most one row per exercise and weekday.
+    """
+    __tablename__ = "workout_totals"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    exercise_type = Column(String, primary_key=True)
+    weekday = Column(Integer, primary_key=True)
+    workouts = Column(Integer, nullable=False, default=0)
+    calories_burned = Column(Float, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
 
 
 class Meal(Base):
@@ -67,3 +109,7 @@ class Meal(Base):
     consumed_at = Column(DateTime, default=datetime.utcnow)
     
     user = relationship("User", back_populates="meals")
+    
+    __table_args__ = (
+        Index("ix_meals_user_consumed", "user_id", "consumed_at"),
+    )
@@ -7,27 +7,76 @@ from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from typing import List, Dict, Optional
 from datetime import datetime
-import pandas as pd
+import asyncio
 import sys
 import os
 
+from services.database import run_in_session
+
 # Add ml_models to path
 backend_dir = os.path.dirname(os.path.dirname(__file__))
 ml_models_path = os.path.abspath(os.path.join(backend_dir, '..', 'ml_models'))
 sys.path.insert(0, ml_models_path)
 
-try:
-    from analytics.analytics_engine import AnalyticsEngine
-    analytics_engine = AnalyticsEngine()
-    print(f"Analytics Engine loaded from: {ml_models_path}")
-except Exception as e:
-    print(f"WARNING: Analytics Engine not available: {e}")
-    print(f"   Searched in: {ml_models_path}")
-    analytics_engine = None
+# pandas and the Analytics Engine are imported on the first analytics
+# request, so workers that never serve one do not pay for them
+_analytics_engine = None
+_analytics_engine_loaded = False
+_history_store = None
+
+HISTORY_CSV = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
+
+
+def get_analytics_engine():
+    """Return the Analytics Engine, loading it on first use (None if unavailable)"""
+    global _analytics_engine, _analytics_engine_loaded
+    if not _analytics_engine_loaded:
+        _analytics_engine_loaded = True
+        try:
+            from analytics.analytics_engine import AnalyticsEngine
+            _analytics_engine = AnalyticsEngine()
+            print(f"Analytics Engine loaded from: {ml_models_path}")
+        except Exception as e:
+            print(f"WARNING: Analytics Engine not available: {e}")
+            print(f"   Searched in: {ml_models_path}")
+    return _analytics_engine
+
+
+def get_history_store():
+    """
+    Return the process-wide workout history store, loading it on first use
+
+    The CSV is parsed once; later requests only stat the file and reuse
+    the typed DataFrame and the results computed from it.
+    """
+    global _history_store
+    if _history_store is None:
+        from analytics.history_store import WorkoutHistoryStore
+        _history_store = WorkoutHistoryStore(HISTORY_CSV)
+    return _history_store
+
+
+async def _user_workouts(user_id: int):
+    """
+    One user's workouts from the database, in the Analytics Engine's layout
+
+    Reads only that user's rows through the (user_id, completed_at) index;
+    without a user_id the endpoints use the shared workout history CSV.
+    """
+    from services.workout_records import analytics_rows
+    return await run_in_session(analytics_rows, user_id)
+
 
 router = APIRouter(prefix="/api/analytics", tags=["analytics"])
 
 
+@router.on_event("shutdown")
+async def close_history_store():
+    """Write queued workouts and stop the history writer"""
+    if _history_store is not None:
+        await asyncio.to_thread(_history_store.close)
+
+
 @router.get("/test")
 async def test_route():
     """Simple test route"""
@@ -51,6 +100,7 @@ class WorkoutSession(BaseModel):
     intensity: int  # 1-10 scale
     reps: Optional[int] = 0
     sets: Optional[int] = 0
+    user_id: Optional[int] = None  # stored in the database instead of the shared CSV
 
 
 class ProgressDataPoint(BaseModel):
@@ -65,18 +115,25 @@ class GoalPredictionRequest(BaseModel):
 
 
 @router.get("/weekly-stats")
-async def get_weekly_stats():
+async def get_weekly_stats(user_id: Optional[int] = None):
     """Get statistics for the last 7 days"""
+    analytics_engine = get_analytics_engine()
     if not analytics_engine:
         raise HTTPException(status_code=503, detail="Analytics engine not available")
     
-    csv_path = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
-    
     try:
-        df = pd.read_csv(csv_path)
-        workouts = df.to_dict('records')
-        
-        stats = analytics_engine.calculate_weekly_stats(workouts)
+        # Sums at most 7 daily rollup buckets, whatever the history length
+        if user_id is not None:
+            from services.workout_records import weekly_rollups
+            day_buckets, streak = await run_in_session(weekly_rollups, user_id)
+            stats = analytics_engine.weekly_stats_from_rollups(day_buckets, streak)
+        else:
+            from analytics.rollups import utc_today
+            stats = get_history_store().cached_rollup('weekly_stats', lambda rollup: (
+                analytics_engine.weekly_stats_from_rollups(
+                    rollup.day_buckets(utc_today(), 7), rollup.current_streak(utc_today())
+                )
+            ))
         return {
             "status": "success",
             "stats": stats,
@@ -101,18 +158,26 @@ async def get_weekly_stats():
 
 
 @router.get("/performance-metrics")
-async def get_performance_metrics():
+async def get_performance_metrics(user_id: Optional[int] = None):
     """Get comprehensive performance metrics"""
+    analytics_engine = get_analytics_engine()
     if not analytics_engine:
         raise HTTPException(status_code=503, detail="Analytics engine not available")
     
-    csv_path = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
-    
     try:
-        df = pd.read_csv(csv_path)
-        workouts = df.to_dict('records')
-        
-        metrics = analytics_engine.calculate_performance_metrics(workouts)
+        # Lifetime buckets per exercise and weekday, plus 30 daily buckets
+        if user_id is not None:
+            from services.workout_records import performance_rollups
+            total_buckets, recent_workouts = await run_in_session(performance_rollups, user_id)
+            metrics = analytics_engine.performance_metrics_from_rollups(total_buckets, recent_workouts)
+        else:
+            from analytics.rollups import utc_today
+            metrics = get_history_store().cached_rollup('performance_metrics', lambda rollup: (
+                analytics_engine.performance_metrics_from_rollups(
+                    rollup.total_buckets(),
+                    sum(bucket['workouts'] for bucket in rollup.day_buckets(utc_today(), 30))
+                )
+            ))
         return {
             "status": "success",
             "metrics": metrics,
@@ -138,23 +203,23 @@ async def get_performance_metrics():
 
 
 @router.get("/insights")
-async def get_insights():
+async def get_insights(user_id: Optional[int] = None):
     """Get personalized workout insights"""
+    analytics_engine = get_analytics_engine()
     if not analytics_engine:
         raise HTTPException(status_code=503, detail="Analytics engine not available")
     
-    csv_path = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
-    
     try:
-        df = pd.read_csv(csv_path)
-        workouts = df.to_dict('records')
-        
-        user_data = {
-            'workouts': workouts,
-            'consistency_score': 85
-        }
-        
-        insights = analytics_engine.generate_insights(user_data)
+        def insights_for(workouts):
+            return analytics_engine.generate_insights({
+                'workouts': workouts,
+                'consistency_score': 85
+            })
+
+        if user_id is not None:
+            insights = insights_for(await _user_workouts(user_id))
+        else:
+            insights = get_history_store().cached('insights', insights_for)
         return {
             "status": "success",
             "insights": insights,
@@ -174,6 +239,7 @@ async def get_insights():
 @router.post("/predict-goal")
 async def predict_goal(request: GoalPredictionRequest):
     """Predict when user will achieve their goal"""
+    analytics_engine = get_analytics_engine()
     if not analytics_engine:
         raise HTTPException(status_code=503, detail="Analytics engine not available")
     
@@ -196,31 +262,47 @@ async def predict_goal(request: GoalPredictionRequest):
         raise HTTPException(status_code=500, detail=f"Error predicting goal: {str(e)}")
 
 
+def _track_workout(session, workout: WorkoutSession, completed_at: datetime):
+    """Insert a logged workout for its user"""
+    from services.workout_records import add_workout
+    return add_workout(
+        session,
+        workout.user_id,
+        exercise_type=workout.exercise_type,
+        duration_minutes=workout.duration_minutes,
+        calories_burned=workout.calories_burned,
+        intensity=workout.intensity,
+        reps=workout.reps,
+        sets=workout.sets,
+        completed_at=completed_at
+    )
+
+
 @router.post("/log-workout")
 async def log_workout(workout: WorkoutSession):
     """Log a new workout session"""
-    csv_path = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
-    
+    from services.workout_records import parse_completed_at
+
+    # Checked once, so neither storage path can accept a date it cannot read back
     try:
-        # Read existing data
-        try:
-            df = pd.read_csv(csv_path)
-        except FileNotFoundError:
-            # Create new dataframe if file doesn't exist
-            df = pd.DataFrame(columns=['date', 'exercise_type', 'duration_minutes', 'calories_burned', 'intensity', 'reps', 'sets'])
-        
-        # Add new workout
-        new_workout = pd.DataFrame([workout.dict()])
-        df = pd.concat([df, new_workout], ignore_index=True)
-        
-        # Save back to CSV
-        df.to_csv(csv_path, index=False)
+        completed_at = parse_completed_at(workout.date)
+    except ValueError:
+        raise HTTPException(status_code=422, detail="date must be an ISO date or datetime")
+
+    try:
+        if workout.user_id is not None:
+            await run_in_session(_track_workout, workout, completed_at)
+        else:
+            # Queued to the single log writer; resolves once the row is fsynced
+            await asyncio.wrap_future(get_history_store().append(workout.dict(exclude={'user_id'})))
         
         return {
             "status": "success",
             "message": "Workout logged successfully",
             "workout": workout.dict()
         }
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
     except Exception as e:
         print(f"Error logging workout: {e}")
         import traceback
@@ -229,14 +311,16 @@ async def log_workout(workout: WorkoutSession):
 
 
 @router.get("/workout-history")
-async def get_workout_history(limit: int = 30):
+async def get_workout_history(limit: int = 30, user_id: Optional[int] = None):
     """Get workout history"""
-    csv_path = os.path.join(ml_models_path, 'analytics', 'sample_workout_history.csv')
-    
     try:
-        df = pd.read_csv(csv_path)
-        df = df.sort_values('date', ascending=False).head(limit)
-        workouts = df.to_dict('records')
+        if user_id is not None:
+            from services.workout_records import list_workouts
+            workouts = await run_in_session(list_workouts, user_id, None, None, limit)
+            for workout in workouts:
+                workout['date'] = workout['completed_at']
+        else:
+            workouts = get_history_store().records(limit)
         
         return {
             "status": "success",
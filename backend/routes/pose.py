@@ -3,9 +3,11 @@ Pose Detection API Routes
 Handle pose detection and exercise analysis requests
 """
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, BackgroundTasks, File, Form, HTTPException, UploadFile
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
 from typing import List, Optional
+import os
 
 router = APIRouter(prefix="/api/pose", tags=["Pose Detection"])
 
@@ -171,6 +173,76 @@ async def get_pose_detection_stats():
     }
 
 
+@router.get("/metrics")
+async def get_pose_metrics():
+    """
+    Get live pose serving metrics: detector pool utilization and wait
+    times, inference scheduler queue depth and late drops, plus per-stage
+    frame latency (p50/p95/p99) globally and for each connected session
+    """
+    from services.detector_pool import get_detector_pool
+    from services.pose_metrics import latency_metrics
+    from services.pose_scheduler import current_pose_scheduler
+
+    # Report, never start: the scheduler and pool exist once a pose
+    # session (or POSE_PRELOAD) has loaded the pose pipeline
+    detector_pool = get_detector_pool()
+    scheduler = current_pose_scheduler()
+    return {
+        "detector_pool": detector_pool.metrics() if detector_pool else None,
+        "scheduler": scheduler.metrics() if scheduler else None,
+        "latency": latency_metrics()
+    }
+
+
+@router.post("/analyze-video", status_code=202)
+async def analyze_video(
+    background_tasks: BackgroundTasks,
+    file: UploadFile = File(...),
+    exercise_type: str = Form("squat")
+):
+    """
+    Upload a recorded set for offline analysis
+
+    The video is decoded frame by frame in the background, split into
+    chunks across worker processes. Poll the returned status_url for
+    progress and the rep timeline.
+    """
+    from services.video_jobs import get_video_jobs, save_upload, run_video_job
+
+    if exercise_type not in ["squat", "pushup", "plank"]:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Exercise '{exercise_type}' not supported. Use: squat, pushup, or plank"
+        )
+
+    suffix = os.path.splitext(file.filename or "")[1] or ".mp4"
+    path = await run_in_threadpool(save_upload, file.file, suffix)
+
+    jobs = get_video_jobs()
+    job_id = jobs.create(exercise_type, file.filename)
+    background_tasks.add_task(run_video_job, job_id, path, exercise_type)
+
+    return {
+        "job_id": job_id,
+        "status": "queued",
+        "status_url": f"/api/pose/analyze-video/{job_id}"
+    }
+
+
+@router.get("/analyze-video/{job_id}")
+async def get_video_analysis(job_id: str):
+    """
+    Get progress (and, once completed, the rep timeline) of a video analysis job
+    """
+    from services.video_jobs import get_video_jobs
+
+    job = get_video_jobs().get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Video analysis job not found")
+    return job
+
+
 @router.get("/demo-info")
 async def get_demo_info():
     """
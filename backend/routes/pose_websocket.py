@@ -3,111 +3,368 @@ WebSocket endpoint for real-time pose detection
 """
 
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-import cv2
-import numpy as np
+import asyncio
 import json
-import base64
+import time
 import sys
 import os
 
-# Add ml_models to path
-sys.path.append(os.path.join(os.path.dirname(__file__), '..', '..', 'ml_models', 'pose_detection'))
+# Add ml_models to path for pose detection
+ml_models_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'ml_models', 'pose_detection'))
+sys.path.insert(0, ml_models_path)
+
+from services.pose_scheduler import (
+    DeadlineExceeded, configured_latency_slo_ms, get_pose_scheduler, shutdown_pose_scheduler
+)
+from services.pose_protocol import (
+    PROTOCOL_VERSION, SUPPORTED_VERSIONS, ProtocolError, unpack_frame
+)
+from services.pose_session import PoseSession
+from services.session_store import get_checkpointer, close_checkpointer
+from services.pose_recording import configured_recording_mode, create_session_recorder
+from services.pose_keyframes import configured_keyframe_mode, create_keyframe_detector
+from services.pose_metrics import StageTimer, record_frame, register_session, unregister_session
+from services.detector_pool import (
+    DetectorPoolExhausted, configured_preload, start_detector_pool, close_detector_pool
+)
+
+# OpenCV and MediaPipe are imported by _load_pose_modules() on the first
+# pose session (or at startup with POSE_PRELOAD), so workers that never
+# serve /ws/pose start without them. None until the first attempt.
+MEDIAPIPE_AVAILABLE = None
+
+# Endpoint tasks of the sessions this worker is serving, so shutdown can
+# end them before closing the services their cleanup still uses
+_live_sessions = set()
+
+
+def _load_pose_modules():
+    """
+    Import the pose pipeline once
+
+    Blocking (about a second on first call); run it off the event loop.
+
+    Returns:
+        bool: True if MediaPipe and OpenCV are available
+    """
+    global MEDIAPIPE_AVAILABLE, PoseDetector, ExerciseAnalyzer
+    global RESPONSE_MODES, process_frame, process_binary_frame
+    if MEDIAPIPE_AVAILABLE is None:
+        try:
+            from pose_detector import PoseDetector
+            from exercise_analyzer import ExerciseAnalyzer
+            from services.pose_inference import (
+                RESPONSE_MODES, process_frame, process_binary_frame
+            )
+            MEDIAPIPE_AVAILABLE = True
+            print(f"MediaPipe modules loaded from: {ml_models_path}")
+        except ImportError as e:
+            MEDIAPIPE_AVAILABLE = False
+            print(f"WARNING: MediaPipe not available: {e}")
+    return MEDIAPIPE_AVAILABLE
 
-try:
-    from pose_detector import PoseDetector
-    from exercise_analyzer import ExerciseAnalyzer
-    MEDIAPIPE_AVAILABLE = True
-except ImportError:
-    MEDIAPIPE_AVAILABLE = False
 
 router = APIRouter()
 
 
+def _create_detector():
+    """Build one pooled pose detector (loads a MediaPipe graph)"""
+    return PoseDetector(
+        min_detection_confidence=0.5,
+        min_tracking_confidence=0.5,
+        roi_tracking=os.getenv("POSE_ROI_TRACKING", "false").lower() == "true"
+    )
+
+
+@router.on_event("startup")
+async def start_pose_inference():
+    """Warm the shared detector pool before the first session connects (POSE_PRELOAD)"""
+    if configured_preload() and await asyncio.to_thread(_load_pose_modules):
+        await start_detector_pool(_create_detector, get_pose_scheduler())
+        get_checkpointer().start()
+
+
+@router.on_event("shutdown")
+async def shutdown_pose_inference():
+    """End live sessions, then release pooled detectors and the shared pose inference threads"""
+    if _live_sessions:
+        # Each session's cleanup checkpoints its state and returns its detector
+        sessions = list(_live_sessions)
+        print(f"Closing {len(sessions)} live pose session(s)")
+        for task in sessions:
+            task.cancel()
+        await asyncio.gather(*sessions, return_exceptions=True)
+    if MEDIAPIPE_AVAILABLE:
+        await close_checkpointer()
+        # Let in-flight work (e.g. a released detector's reset) finish before closing detectors
+        shutdown_pose_scheduler()
+        close_detector_pool()
+
+
+async def _process_frames(websocket, session, scheduler):
+    """
+    Consume the newest pending frame until the session's slot is closed
+
+    Only this task runs inference, so frames are handled one at a time per
+    session while stale frames are dropped by the slot. Frames that the
+    scheduler cannot finish within the latency SLO are dropped unanswered.
+    """
+    slo_ns = int(configured_latency_slo_ms() * 1e6)
+    checkpointer = get_checkpointer()
+    while True:
+        frame = await session.frames.get()
+        if frame is None:
+            return
+
+        started = time.perf_counter()
+        timer = StageTimer(started=frame[-1])
+        deadline_ns = frame[-1] + slo_ns
+        response = None
+        async with session.lock:
+            try:
+                response = await _run_frame(scheduler, session, frame, deadline_ns, timer)
+            except DeadlineExceeded:
+                session.late += 1
+            else:
+                session.processed += 1
+                session.checkpoint(checkpointer)
+        session.rate.record_processing(time.perf_counter() - started)
+
+        if response is not None:
+            if isinstance(response, bytes):
+                await websocket.send_bytes(response)
+            else:
+                await websocket.send_json(response)
+            timer.lap("send")
+            record_frame(session.latency, timer.finish())
+
+        hint = session.rate.hint()
+        if hint is not None:
+            await websocket.send_json({"type": "rate_hint", **hint, **session.stats()})
+
+
+async def _run_frame(scheduler, session, frame, deadline_ns, timer):
+    """Submit one frame to the scheduler in the session's lane"""
+    if frame[0] == "binary":
+        _, frame_id, jpeg, _ = frame
+        return await scheduler.run_frame(
+            session.session_id,
+            deadline_ns,
+            process_binary_frame,
+            session.pose_detector,
+            session.exercise_analyzer,
+            session.current_exercise,
+            frame_id,
+            jpeg,
+            session.response_mode,
+            session.recorder,
+            timer,
+            session.echo_timings
+        )
+    _, image, _ = frame
+    return await scheduler.run_frame(
+        session.session_id,
+        deadline_ns,
+        process_frame,
+        session.pose_detector,
+        session.exercise_analyzer,
+        session.current_exercise,
+        image,
+        session.response_mode,
+        session.recorder,
+        timer,
+        session.echo_timings
+    )
+
+
+async def _change_exercise(websocket, session, exercise):
+    """Switch exercise and reset the rep counter"""
+    async with session.lock:
+        session.current_exercise = exercise
+        session.resyncing_exercise = False
+        if session.keyframes is not None:
+            session.keyframes.set_exercise(exercise)
+        session.exercise_analyzer.reset_reps()
+        session.checkpoint(get_checkpointer())
+    await websocket.send_json({
+        "type": "exercise_changed",
+        "exercise": exercise
+    })
+
+
+async def _receive_messages(websocket, session):
+    """
+    Read client messages until disconnect
+
+    Frames go into the session's latest-frame slot; control messages are
+    answered right away.
+    """
+    while True:
+        # Receive data from client (binary frames or JSON text)
+        data = await websocket.receive()
+        if data["type"] == "websocket.disconnect":
+            raise WebSocketDisconnect(data.get("code", 1000))
+
+        if data.get("bytes") is not None:
+            try:
+                frame_id, frame_exercise, jpeg = unpack_frame(data["bytes"])
+            except ProtocolError as e:
+                await websocket.send_json({"type": "error", "error": str(e)})
+                continue
+
+            if session.frame_exercise_changed(frame_exercise):
+                await _change_exercise(websocket, session, frame_exercise)
+
+            session.rate.record_arrival()
+            session.frames.put(("binary", frame_id, jpeg, time.perf_counter_ns()))
+            continue
+
+        message = json.loads(data.get("text") or "{}")
+
+        # Handle different message types
+        if message.get("type") == "hello":
+            # "landmarks" mode returns coordinates only, the client draws the overlay
+            requested_mode = message.get("response_mode", session.response_mode)
+            if requested_mode in RESPONSE_MODES:
+                session.response_mode = requested_mode
+            session.echo_timings = bool(message.get("timings", session.echo_timings))
+            if message.get("record") and session.recorder is None and configured_recording_mode() == "opt-in":
+                session.recorder = create_session_recorder()
+            if message.get("keyframes") and session.keyframes is None and configured_keyframe_mode() == "opt-in":
+                async with session.lock:
+                    session.use_keyframes(create_keyframe_detector(session.pose_detector, session.current_exercise))
+            # Resume a session checkpointed by this or any other worker
+            resumed = False
+            token = message.get("session_token")
+            if isinstance(token, str) and token and token != session.token:
+                state = await get_checkpointer().load(token)
+                if state is not None:
+                    async with session.lock:
+                        session.restore(token, state)
+                    resumed = True
+            await websocket.send_json({
+                "type": "hello",
+                "protocols": ["binary", "text"],
+                "version": PROTOCOL_VERSION,
+                "supported_versions": list(SUPPORTED_VERSIONS),
+                "response_mode": session.response_mode,
+                "response_modes": list(RESPONSE_MODES),
+                "recording": session.recorder is not None,
+                "keyframes": session.keyframes is not None,
+                "timings": session.echo_timings,
+                "session_token": session.token,
+                "resumed": resumed,
+                "exercise": session.current_exercise,
+                "rep_count": session.exercise_analyzer.rep_count
+            })
+
+        elif message.get("type") == "frame":
+            session.rate.record_arrival()
+            session.frames.put(("text", message.get("image", ""), time.perf_counter_ns()))
+
+        elif message.get("type") == "change_exercise":
+            await _change_exercise(websocket, session, message.get("exercise", "squat"))
+
+        elif message.get("type") == "reset":
+            async with session.lock:
+                session.exercise_analyzer.reset_reps()
+                session.checkpoint(get_checkpointer())
+            await websocket.send_json({
+                "type": "reset_complete"
+            })
+
+        elif message.get("type") == "stats":
+            await websocket.send_json({"type": "stats", **session.stats(), "latency": session.latency.summary()})
+
+
 @router.websocket("/ws/pose")
 async def websocket_pose_detection(websocket: WebSocket):
     """
     WebSocket endpoint for real-time pose detection
     Receives video frames, processes with MediaPipe, returns analysis
+
+    Frames arrive either as binary messages (see services/pose_protocol.py)
+    or, as a fallback, as JSON text with a base64 data URL. All CPU work
+    (decode, inference, encode) runs on the shared pose scheduler, which
+    serves sessions round-robin, so the event loop only does I/O for every
+    session. Receiving and processing
+    run as separate tasks joined by a latest-frame-wins slot, so a client
+    sending faster than the server can process gets fresh frames instead
+    of a growing queue, plus "rate_hint" messages telling it to adjust.
     """
+    task = asyncio.current_task()
+    _live_sessions.add(task)
+    try:
+        await _serve_session(websocket)
+    finally:
+        _live_sessions.discard(task)
+
+
+async def _serve_session(websocket):
+    """Run one /ws/pose session from accept to cleanup"""
+    print("WebSocket connection attempt...")
     await websocket.accept()
-    
-    if not MEDIAPIPE_AVAILABLE:
+    print("WebSocket connected!")
+
+    if not await asyncio.to_thread(_load_pose_modules):
         await websocket.send_json({
             "error": "MediaPipe not available. Please install: pip install mediapipe opencv-python numpy"
         })
         await websocket.close()
         return
-    
-    # Initialize pose detector and analyzer
-    pose_detector = PoseDetector(min_detection_confidence=0.5, min_tracking_confidence=0.5)
+
+    # Check out a warm pose detector for this session
+    scheduler = get_pose_scheduler()
+    detector_pool = await start_detector_pool(_create_detector, scheduler)
+    get_checkpointer().start()
+    try:
+        pose_detector = await detector_pool.acquire()
+    except DetectorPoolExhausted as e:
+        await websocket.send_json({"type": "error", "error": str(e)})
+        await websocket.close(code=1013)
+        return
+
     exercise_analyzer = ExerciseAnalyzer()
-    current_exercise = "squat"
-    
+    session = PoseSession(pose_detector, exercise_analyzer)
+    if configured_recording_mode() == "all":
+        session.recorder = create_session_recorder()
+    if configured_keyframe_mode() == "all":
+        session.use_keyframes(create_keyframe_detector(pose_detector, session.current_exercise))
+    register_session(session.session_id, session.latency)
+
+    receiver = asyncio.create_task(_receive_messages(websocket, session))
+    processor = asyncio.create_task(_process_frames(websocket, session, scheduler))
+
     try:
-        while True:
-            # Receive data from client
-            data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            # Handle different message types
-            if message.get("type") == "frame":
-                # Decode base64 image
-                image_data = message.get("image", "").split(",")[1]
-                image_bytes = base64.b64decode(image_data)
-                nparr = np.frombuffer(image_bytes, np.uint8)
-                frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-                
-                if frame is not None:
-                    # Detect pose
-                    frame_with_pose, landmarks = pose_detector.detect_pose(frame, draw=False)
-                    
-                    # Analyze exercise
-                    result = {"exercise": current_exercise, "rep_count": 0, "form_score": 0, "feedback": []}
-                    
-                    if landmarks:
-                        if current_exercise == "squat":
-                            result = exercise_analyzer.analyze_squat(landmarks)
-                        elif current_exercise == "pushup":
-                            result = exercise_analyzer.analyze_pushup(landmarks)
-                        elif current_exercise == "plank":
-                            result = exercise_analyzer.analyze_plank(landmarks)
-                        
-                        # Draw skeleton on frame
-                        frame_with_pose, _ = pose_detector.detect_pose(frame, draw=True)
-                    
-                    # Encode processed frame
-                    _, buffer = cv2.imencode('.jpg', frame_with_pose)
-                    processed_image = base64.b64encode(buffer).decode('utf-8')
-                    
-                    # Send response
-                    await websocket.send_json({
-                        "type": "analysis",
-                        "image": f"data:image/jpeg;base64,{processed_image}",
-                        "rep_count": result.get("reps", 0),
-                        "form_score": result.get("form_score", 0),
-                        "feedback": result.get("feedback", []),
-                        "exercise": current_exercise,
-                        "stage": result.get("stage", "")
-                    })
-            
-            elif message.get("type") == "change_exercise":
-                current_exercise = message.get("exercise", "squat")
-                exercise_analyzer.reset_reps()
-                await websocket.send_json({
-                    "type": "exercise_changed",
-                    "exercise": current_exercise
-                })
-            
-            elif message.get("type") == "reset":
-                exercise_analyzer.reset_reps()
-                await websocket.send_json({
-                    "type": "reset_complete"
-                })
-    
+        done, _ = await asyncio.wait({receiver, processor}, return_when=asyncio.FIRST_COMPLETED)
+        # Surface the exception that ended the session
+        for task in done:
+            task.result()
+
     except WebSocketDisconnect:
-        print("WebSocket disconnected")
+        print(f"WebSocket disconnected {session.stats()}")
     except Exception as e:
         print(f"Error in websocket: {str(e)}")
-        await websocket.send_json({
-            "error": str(e)
-        })
+        try:
+            await websocket.send_json({
+                "error": str(e)
+            })
+        except Exception:
+            pass
+    finally:
+        # Let the in-flight frame finish before releasing the detector
+        receiver.cancel()
+        session.frames.close()
+        if not processor.done():
+            await asyncio.gather(processor, return_exceptions=True)
+        unregister_session(session.session_id)
+        scheduler.forget(session.session_id)
+        # Make the final state resumable right away rather than at the next flush
+        session.checkpoint(get_checkpointer())
+        await get_checkpointer().flush()
+        if session.recorder is not None:
+            # Writes the last partial batch; keep the join off the event loop
+            await asyncio.to_thread(session.recorder.close)
+            print(f"Session recorded to {session.recorder.path} "
+                  f"({session.recorder.records} frames, {session.recorder.dropped} dropped)")
+        await detector_pool.release(pose_detector)
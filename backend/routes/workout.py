@@ -6,10 +6,13 @@ Exercise database from ExerciseDB API + Workout plan generation
 from fastapi import APIRouter, HTTPException, Query
 from pydantic import BaseModel
 from typing import List, Optional
+from datetime import datetime, timedelta
 import httpx
 import os
 from dotenv import load_dotenv
 
+from services.database import run_in_session, close_database
+
 load_dotenv()
 
 router = APIRouter(prefix="/api/workout", tags=["Workout"])
@@ -372,22 +375,68 @@ async def generate_workout_plan(request: WorkoutRequest):
     }
 
 
+class TrackWorkoutRequest(BaseModel):
+    user_id: int
+    exercise_type: str
+    duration_minutes: int
+    calories_burned: float
+    form_score: Optional[float] = None  # 0-100
+    intensity: Optional[int] = None  # 1-10 scale
+    reps: Optional[int] = 0
+    sets: Optional[int] = 0
+    completed_at: Optional[str] = None  # ISO date or datetime, defaults to now
+
+
+@router.on_event("shutdown")
+async def close_workout_database():
+    """Close pooled database connections"""
+    close_database()
+
+
 @router.get("/history/{user_id}")
-async def get_workout_history(user_id: str):
+async def get_workout_history(
+    user_id: int,
+    days: Optional[int] = Query(None, ge=1, description="Only the last N days"),
+    limit: int = Query(30, ge=1, le=500)
+):
     """
-    Get user's workout history (Database integration pending)
+    Get user's workout history, newest first
     """
+    from services.workout_records import list_workouts
+
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    try:
+        workouts = await run_in_session(list_workouts, user_id, since, None, limit)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error retrieving history: {str(e)}")
     return {
-        "message": "Workout history endpoint - Database integration pending",
-        "user_id": user_id
+        "status": "success",
+        "user_id": user_id,
+        "workouts": workouts,
+        "count": len(workouts)
     }
 
 
 @router.post("/track")
-async def track_workout_session():
+async def track_workout_session(request: TrackWorkoutRequest):
     """
-    Track completed workout session (Database integration pending)
+    Track completed workout session
     """
+    from services.workout_records import add_workout, parse_completed_at
+
+    fields = request.dict(exclude={"user_id"})
+    try:
+        fields["completed_at"] = parse_completed_at(fields["completed_at"])
+    except ValueError:
+        raise HTTPException(status_code=422, detail="completed_at must be an ISO date or datetime")
+    try:
+        workout = await run_in_session(lambda session: add_workout(session, request.user_id, **fields))
+    except LookupError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Error tracking workout: {str(e)}")
     return {
-        "message": "Workout tracking endpoint - Database integration pending"
+        "status": "success",
+        "message": "Workout tracked successfully",
+        "workout": workout
     }
@@ -0,0 +1,98 @@
+"""
+Import the workout history CSV into the database
+
+The CSV (ml_models/analytics/sample_workout_history.csv) has no user
+column, so every row is imported for one user, created if missing.
+Rows already imported for that user are skipped, so the script can be
+re-run after more workouts were logged to the CSV. Rows are compared
+whole and counted: the CSV often only has a date, so two identical
+same-day workouts are two rows, and a re-run imports only the copies
+the database does not have yet. Rows are inserted in batches, each in one transaction,
+then the user's analytics rollups are rebuilt from all their workouts
+(re-running with nothing new to import just rebuilds them).
+
+Usage (from backend/):
+    python scripts/import_workout_csv.py --user-id 1
+    python scripts/import_workout_csv.py --user-id 1 --csv path/to/history.csv
+    DATABASE_URL=postgresql://... python scripts/import_workout_csv.py --user-id 1
+"""
+
+import argparse
+import os
+import sys
+from collections import Counter
+
+backend_dir = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, backend_dir)
+sys.path.insert(0, os.path.join(backend_dir, '..', 'ml_models'))
+
+DEFAULT_CSV = os.path.join(backend_dir, '..', 'ml_models', 'analytics', 'sample_workout_history.csv')
+
+# Columns a CSV row and an imported workout are compared on
+ROW_KEY = ('completed_at', 'exercise_type', 'duration_minutes', 'calories_burned', 'intensity', 'reps', 'sets')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--user-id', type=int, required=True, help='Owner of the imported workouts')
+    parser.add_argument('--csv', default=DEFAULT_CSV, help='Workout history CSV')
+    parser.add_argument('--database-url', help='Defaults to DATABASE_URL, then ./fitness.db')
+    parser.add_argument('--batch', type=int, default=5000, help='Rows per transaction')
+    args = parser.parse_args()
+
+    from sqlalchemy import insert, select
+    from sqlalchemy.orm import Session
+
+    from analytics.history_store import WorkoutHistoryStore
+    from models.database import User, Workout
+    from services.database import create_database_engine
+    from services.workout_records import rebuild_rollups
+
+    history = WorkoutHistoryStore(args.csv).frame()
+    history = history[history['date'].notna()]
+    print(f"Read {len(history)} workouts from {args.csv}")
+
+    engine = create_database_engine(args.database_url)
+    with Session(engine) as session, session.begin():
+        if session.get(User, args.user_id) is None:
+            session.add(User(id=args.user_id, name=f"Imported user {args.user_id}"))
+            print(f"Created user {args.user_id}")
+        existing = Counter(tuple(row) for row in session.execute(
+            select(Workout.completed_at, Workout.exercise_type, Workout.duration_minutes,
+                   Workout.calories_burned, Workout.intensity, Workout.reps, Workout.sets)
+            .where(Workout.user_id == args.user_id)
+        ))
+
+    rows = []
+    for row in history.itertuples(index=False):
+        workout = {
+            'user_id': args.user_id,
+            'exercise_type': row.exercise_type,
+            'duration_minutes': int(row.duration_minutes),
+            'calories_burned': float(row.calories_burned),
+            'intensity': int(row.intensity),
+            'reps': int(row.reps),
+            'sets': int(row.sets),
+            'completed_at': row.date.to_pydatetime()
+        }
+        key = tuple(workout[column] for column in ROW_KEY)
+        if existing[key] > 0:
+            # One database copy accounts for one CSV copy
+            existing[key] -= 1
+        else:
+            rows.append(workout)
+
+    for start in range(0, len(rows), args.batch):
+        with Session(engine) as session, session.begin():
+            session.execute(insert(Workout), rows[start:start + args.batch])
+    print(f"Imported {len(rows)} workouts ({len(history) - len(rows)} already present) "
+          f"into {engine.url.render_as_string(hide_password=True)}")
+
+    with Session(engine) as session, session.begin():
+        days, totals = rebuild_rollups(session, args.user_id)
+    print(f"Rebuilt rollups: {days} daily buckets, {totals} lifetime buckets")
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
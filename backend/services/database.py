@@ -0,0 +1,114 @@
+"""
+Database Engine
+Pooled SQLAlchemy engine and sessions for the models in models/database.py
+"""
+
+import asyncio
+import os
+import threading
+
+# SQLAlchemy is imported when the first query connects, so workers that
+# never touch the database start without it
+
+DEFAULT_DATABASE_URL = "sqlite:///./fitness.db"
+
+
+def configured_database_url():
+    """Database URL from DATABASE_URL (default a SQLite file, ./fitness.db)"""
+    return os.getenv("DATABASE_URL") or DEFAULT_DATABASE_URL
+
+
+def configured_pool_size():
+    """Pooled connections per worker (DATABASE_POOL_SIZE, default 5)"""
+    value = os.getenv("DATABASE_POOL_SIZE")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid DATABASE_POOL_SIZE={value!r}, using 5")
+    return 5
+
+
+def _configure_sqlite(dbapi_connection, connection_record):
+    """
+    Per-connection SQLite settings
+
+    WAL lets history reads run while a workout is being written, and
+    foreign keys are off in SQLite unless asked for.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.execute("PRAGMA foreign_keys=ON")
+    cursor.close()
+
+
+def create_database_engine(url=None):
+    """
+    Build a pooled engine and create missing tables and indexes
+
+    Args:
+        url: SQLAlchemy URL (defaults to configured_database_url())
+
+    Returns:
+        Engine
+    """
+    from sqlalchemy import create_engine, event
+    from models.database import Base
+
+    url = url or configured_database_url()
+    options = {"pool_size": configured_pool_size(), "pool_pre_ping": True}
+    if url.startswith("sqlite"):
+        # Connections are handed between the event loop's worker threads
+        options["connect_args"] = {"check_same_thread": False, "timeout": 5}
+    engine = create_engine(url, **options)
+    if url.startswith("sqlite"):
+        event.listen(engine, "connect", _configure_sqlite)
+    Base.metadata.create_all(engine)
+    return engine
+
+
+_engine = None
+_session_factory = None
+_engine_lock = threading.Lock()
+
+
+def get_session_factory():
+    """Return the process-wide session factory, connecting on first use"""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _session_factory is None:
+            from sqlalchemy.orm import sessionmaker
+            _engine = create_database_engine()
+            _session_factory = sessionmaker(bind=_engine, expire_on_commit=False)
+            print(f"Database: {_engine.url.render_as_string(hide_password=True)}")
+        return _session_factory
+
+
+async def run_in_session(func, *args):
+    """
+    Run func(session, *args) in a transaction off the event loop
+
+    The session commits if func returns and rolls back if it raises.
+    Queries block, so they run on the default thread pool while the
+    event loop keeps serving other requests.
+
+    Returns:
+        Whatever func returns
+    """
+    def run():
+        # First call connects and creates tables, also off the event loop
+        with get_session_factory().begin() as session:
+            return func(session, *args)
+
+    return await asyncio.to_thread(run)
+
+
+def close_database():
+    """Close pooled connections"""
+    global _engine, _session_factory
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+            _session_factory = None
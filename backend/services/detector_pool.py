@@ -0,0 +1,251 @@
+"""
+Pose Detector Pool
+Pre-warmed PoseDetector instances, grown on demand, shared across /ws/pose sessions
+"""
+
+import asyncio
+import os
+import time
+
+
+def configured_pool_size():
+    """Detectors kept warm between sessions, from POSE_DETECTOR_POOL_SIZE (default 4)"""
+    value = os.getenv("POSE_DETECTOR_POOL_SIZE")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_DETECTOR_POOL_SIZE={value!r}, using 4")
+    return 4
+
+
+def configured_pool_max():
+    """Most detectors, i.e. concurrent sessions, per worker, from POSE_DETECTOR_POOL_MAX (default 64)"""
+    value = os.getenv("POSE_DETECTOR_POOL_MAX")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_DETECTOR_POOL_MAX={value!r}, using 64")
+    return 64
+
+
+def configured_wait_timeout():
+    """Seconds a new session may wait for a free detector (POSE_DETECTOR_WAIT_TIMEOUT, default 10)"""
+    value = os.getenv("POSE_DETECTOR_WAIT_TIMEOUT")
+    if value:
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_DETECTOR_WAIT_TIMEOUT={value!r}, using 10")
+    return 10.0
+
+
+def configured_preload():
+    """
+    Whether to load MediaPipe and warm the pool at startup (POSE_PRELOAD, default true)
+
+    Set it to false on workers that do not serve /ws/pose: the pose
+    modules and detectors are then only loaded by the first pose session.
+    """
+    value = os.getenv("POSE_PRELOAD", "true").strip().lower()
+    if value not in ("true", "false"):
+        print(f"WARNING: Invalid POSE_PRELOAD={value!r}, using true")
+        return True
+    return value == "true"
+
+
+class DetectorPoolExhausted(Exception):
+    """Raised when no detector became free within the wait timeout"""
+
+
+class DetectorPool:
+    """
+    Pool of pose detectors: a warm set, grown on demand up to a cap
+
+    `size` detectors are created and warmed up at startup. A session
+    checks one out for its lifetime; when none is idle, a new one is
+    built (about as long as one warm-up) as long as fewer than `max_size`
+    exist, and only beyond that does the session wait. On return the
+    detector's tracking state is reset and the graph is warmed again, so
+    the next session starts clean; detectors beyond the warm set are
+    closed instead, so memory follows the number of live sessions.
+    """
+
+    def __init__(self, factory, size=None, max_size=None, wait_timeout=None):
+        """
+        Args:
+            factory: Zero-argument callable building a PoseDetector
+            size: Detectors kept warm (defaults to configured_pool_size())
+            max_size: Most detectors at once (defaults to configured_pool_max())
+            wait_timeout: Seconds acquire() waits at max_size before giving up
+        """
+        self.factory = factory
+        self.size = size or configured_pool_size()
+        self.max_size = max(self.size, max_size or configured_pool_max())
+        self.wait_timeout = configured_wait_timeout() if wait_timeout is None else wait_timeout
+        self._idle = asyncio.Queue()
+        self._all = []
+        self._creating = 0
+        self._executor = None
+
+        # Metrics
+        self.waiting = 0
+        self.checkouts = 0
+        self.created = 0
+        self.timeouts = 0
+        self.total_wait_s = 0.0
+        self.max_wait_s = 0.0
+
+    def _create_warm(self):
+        detector = self.factory()
+        detector.warm_up()
+        return detector
+
+    @staticmethod
+    def _reset_warm(detector):
+        detector.reset()
+        detector.warm_up()
+
+    async def _grow(self):
+        """Build one more detector on the executor and count it in the pool"""
+        self._creating += 1
+        try:
+            detector = await self._executor.run(self._create_warm)
+        finally:
+            self._creating -= 1
+        self._all.append(detector)
+        self.created += 1
+        return detector
+
+    async def start(self, executor):
+        """
+        Build and warm the warm set on the inference executor
+
+        Args:
+            executor: PoseScheduler used for blocking model work
+        """
+        self._executor = executor
+        started = time.perf_counter()
+        detectors = await asyncio.gather(*[self._grow() for _ in range(self.size)])
+        for detector in detectors:
+            self._idle.put_nowait(detector)
+        print(f"Pose detector pool warmed: {self.size} detectors in "
+              f"{time.perf_counter() - started:.2f}s (grows to {self.max_size})")
+
+    async def acquire(self):
+        """
+        Check out a detector, building one if none is idle and the cap allows
+
+        Returns:
+            PoseDetector: Exclusive to the caller until release()
+
+        Raises:
+            DetectorPoolExhausted: If max_size detectors are in use and none
+                became free within wait_timeout
+        """
+        started = time.perf_counter()
+        self.waiting += 1
+        try:
+            try:
+                # Taken without yielding, so concurrent arrivals cannot all
+                # count on the same idle detector
+                detector = self._idle.get_nowait()
+            except asyncio.QueueEmpty:
+                if len(self._all) + self._creating < self.max_size:
+                    detector = await self._grow()
+                else:
+                    detector = await asyncio.wait_for(self._idle.get(), timeout=self.wait_timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise DetectorPoolExhausted(
+                f"All {self.max_size} pose detectors are busy, try again shortly"
+            )
+        finally:
+            self.waiting -= 1
+
+        waited = time.perf_counter() - started
+        self.checkouts += 1
+        self.total_wait_s += waited
+        self.max_wait_s = max(self.max_wait_s, waited)
+        return detector
+
+    async def release(self, detector):
+        """Reset a detector's tracking state and return it to the pool"""
+        if self._idle.qsize() >= self.size and not self.waiting:
+            # Past the warm set: free the model instead of keeping it idle
+            self._all.remove(detector)
+            detector.close()
+            return
+        try:
+            await self._executor.run(self._reset_warm, detector)
+        except Exception as e:
+            # A broken graph is dropped rather than handed to the next session;
+            # acquire() builds a replacement when one is needed
+            print(f"WARNING: Dropping pose detector after reset failure: {e}")
+            self._all.remove(detector)
+            try:
+                detector.close()
+            except Exception:
+                pass
+            if self.waiting:
+                # Sessions waiting at max_size would otherwise time out
+                try:
+                    self._idle.put_nowait(await self._grow())
+                except Exception as e:
+                    print(f"WARNING: Could not replace pose detector: {e}")
+            return
+        self._idle.put_nowait(detector)
+
+    def metrics(self):
+        """Pool utilization and checkout wait times"""
+        in_use = len(self._all) - self._idle.qsize()
+        return {
+            "size": len(self._all),
+            "warm_size": self.size,
+            "max_size": self.max_size,
+            "in_use": in_use,
+            "idle": self._idle.qsize(),
+            "utilization": round(in_use / self.max_size, 3),
+            "waiting": self.waiting,
+            "checkouts": self.checkouts,
+            "created": self.created,
+            "timeouts": self.timeouts,
+            "avg_wait_ms": round(self.total_wait_s * 1000 / self.checkouts, 2) if self.checkouts else 0.0,
+            "max_wait_ms": round(self.max_wait_s * 1000, 2)
+        }
+
+    def close(self):
+        """Release every detector's MediaPipe resources"""
+        for detector in self._all:
+            detector.close()
+        self._all = []
+
+
+_detector_pool = None
+_start_lock = asyncio.Lock()
+
+
+def get_detector_pool():
+    """Return the process-wide detector pool, or None before startup"""
+    return _detector_pool
+
+
+async def start_detector_pool(factory, executor):
+    """Create and warm the process-wide detector pool"""
+    global _detector_pool
+    # Without preloading, the first sessions may arrive together
+    async with _start_lock:
+        if _detector_pool is None:
+            pool = DetectorPool(factory)
+            await pool.start(executor)
+            _detector_pool = pool
+    return _detector_pool
+
+
+def close_detector_pool():
+    """Close the process-wide detector pool if it was started"""
+    global _detector_pool
+    if _detector_pool is not None:
+        _detector_pool.close()
+        _detector_pool = None
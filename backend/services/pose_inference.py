@@ -0,0 +1,182 @@
+"""
+Pose Inference
+Frame decoding, MediaPipe inference and encoding for one /ws/pose frame
+"""
+
+import base64
+
+import cv2
+import numpy as np
+
+from services.pose_protocol import pack_analysis
+
+
+def analyze_landmarks(exercise_analyzer, exercise, landmarks):
+    """
+    Dispatch landmarks to the analyzer for the current exercise
+
+    Returns:
+        dict: Analyzer result (empty defaults when exercise is unknown)
+    """
+    if exercise == "squat":
+        return exercise_analyzer.analyze_squat(landmarks)
+    elif exercise == "pushup":
+        return exercise_analyzer.analyze_pushup(landmarks)
+    elif exercise == "plank":
+        return exercise_analyzer.analyze_plank(landmarks)
+    return {"exercise": exercise, "reps": 0, "score": 0, "feedback": []}
+
+
+RESPONSE_MODES = ("image", "landmarks")
+
+
+def serialize_landmarks(landmarks):
+    """
+    Compact JSON form of the 33 normalized pose landmarks
+
+    Returns:
+        list: [[x, y, z, visibility], ...] rounded to keep messages small
+    """
+    return [
+        [round(lm.x, 3), round(lm.y, 3), round(lm.z, 3), round(lm.visibility, 2)]
+        for lm in landmarks.landmark
+    ]
+
+
+def run_pipeline(pose_detector, exercise_analyzer, exercise, image_bytes, response_mode="image", recorder=None,
+                 timer=None):
+    """
+    Decode a JPEG frame, detect the pose, analyze it and encode the overlay
+
+    Runs on an executor thread. A session must not submit its next frame
+    before this returns, because the detector and analyzer keep state.
+
+    Args:
+        pose_detector: The session's PoseDetector
+        exercise_analyzer: The session's ExerciseAnalyzer
+        exercise: Current exercise name
+        image_bytes: Encoded image bytes received from the client
+        response_mode: "image" draws and re-encodes the overlay, "landmarks"
+            skips both and returns the landmark coordinates instead
+        recorder: Optional LandmarkRecorder the frame is appended to
+        timer: Optional StageTimer; each stage is lapped as it completes
+
+    Returns:
+        tuple: (analysis dict, encoded JPEG buffer or None), or None if
+        decoding failed
+    """
+    nparr = np.frombuffer(image_bytes, np.uint8)
+    frame = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
+    if frame is None:
+        return None
+    if timer is not None:
+        timer.lap("imdecode")
+
+    # Detect pose
+    frame_with_pose, landmarks = pose_detector.detect_pose(frame, draw=False, timer=timer)
+
+    # Analyze exercise
+    result = {"exercise": exercise, "reps": 0, "score": 0, "feedback": []}
+
+    if landmarks:
+        result = analyze_landmarks(exercise_analyzer, exercise, landmarks)
+    if timer is not None:
+        timer.lap("analyze")
+
+    if recorder is not None:
+        recorder.record(landmarks, exercise, result)
+        if timer is not None:
+            timer.skip()
+
+    analysis = {
+        "type": "analysis",
+        "rep_count": result.get("reps", 0),
+        "form_score": result.get("score", 0),
+        "feedback": result.get("feedback", []),
+        "exercise": exercise,
+        "stage": result.get("stage", "")
+    }
+
+    if response_mode == "landmarks":
+        # The client already shows the live video and draws the overlay itself
+        analysis["landmarks"] = serialize_landmarks(landmarks) if landmarks else []
+        return analysis, None
+
+    if landmarks:
+        # Draw skeleton from the cached results (no second inference pass)
+        pose_detector.draw_landmarks(frame_with_pose)
+    if timer is not None:
+        timer.lap("draw")
+
+    # Encode processed frame
+    _, buffer = cv2.imencode('.jpg', frame_with_pose)
+    if timer is not None:
+        timer.lap("imencode")
+    return analysis, buffer
+
+
+def process_frame(pose_detector, exercise_analyzer, exercise, image, response_mode="image", recorder=None,
+                  timer=None, echo_timings=False):
+    """
+    Text protocol: handle a base64 data-URL frame and answer with JSON
+
+    Args:
+        image: Data URL string ("data:image/jpeg;base64,...")
+        response_mode: "image" or "landmarks" (see run_pipeline)
+        recorder: Optional LandmarkRecorder (see run_pipeline)
+        timer: Optional StageTimer (see run_pipeline)
+        echo_timings: Add the stage timings so far as "timings_ms"
+
+    Returns:
+        dict: Analysis message ready for send_json, or None if decoding failed
+    """
+    if timer is not None:
+        timer.lap("queue_wait")
+    image_bytes = base64.b64decode(image.split(",")[1])
+    if timer is not None:
+        timer.lap("b64_decode")
+    output = run_pipeline(pose_detector, exercise_analyzer, exercise, image_bytes, response_mode, recorder, timer)
+    if output is None:
+        return None
+
+    analysis, buffer = output
+    if echo_timings and timer is not None:
+        analysis["timings_ms"] = timer.milliseconds()
+    if buffer is not None:
+        processed_image = base64.b64encode(buffer).decode('utf-8')
+        analysis["image"] = f"data:image/jpeg;base64,{processed_image}"
+    if timer is not None:
+        timer.lap("encode_response")
+    return analysis
+
+
+def process_binary_frame(pose_detector, exercise_analyzer, exercise, frame_id, jpeg, response_mode="image",
+                         recorder=None, timer=None, echo_timings=False):
+    """
+    Binary protocol: handle raw JPEG bytes and answer with a binary analysis
+
+    Args:
+        frame_id: Id from the frame header, echoed back to the client
+        jpeg: Raw JPEG bytes (header already stripped)
+        response_mode: "image" or "landmarks" (see run_pipeline)
+        recorder: Optional LandmarkRecorder (see run_pipeline)
+        timer: Optional StageTimer (see run_pipeline)
+        echo_timings: Add the stage timings so far as "timings_ms"
+
+    Returns:
+        bytes: Analysis message ready for send_bytes, or None if decoding failed
+    """
+    if timer is not None:
+        timer.lap("queue_wait")
+    output = run_pipeline(pose_detector, exercise_analyzer, exercise, jpeg, response_mode, recorder, timer)
+    if output is None:
+        return None
+
+    analysis, buffer = output
+    analysis["frame_id"] = frame_id
+    if echo_timings and timer is not None:
+        analysis["timings_ms"] = timer.milliseconds()
+    message = pack_analysis(frame_id, analysis, buffer if buffer is not None else b"")
+    if timer is not None:
+        timer.lap("encode_response")
+    return message
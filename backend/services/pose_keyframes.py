@@ -0,0 +1,38 @@
+"""
+Pose Keyframes
+Opt-in keyframe inference for /ws/pose sessions (see keyframe_engine.py)
+"""
+
+import os
+
+KEYFRAME_MODES = ("off", "opt-in", "all")
+
+
+def configured_keyframe_mode():
+    """
+    Keyframe policy from POSE_KEYFRAMES (default "off")
+
+    "off" infers every frame, "opt-in" runs keyframes for sessions whose
+    hello sets "keyframes": true, "all" for every session.
+    """
+    value = os.getenv("POSE_KEYFRAMES", "off").strip().lower()
+    if value not in KEYFRAME_MODES:
+        print(f"WARNING: Invalid POSE_KEYFRAMES={value!r}, using 'off'")
+        return "off"
+    return value
+
+
+def create_keyframe_detector(pose_detector, exercise):
+    """
+    Wrap a session's pooled detector so it only infers keyframes
+
+    Args:
+        pose_detector: The session's PoseDetector (still owned by the pool)
+        exercise: Current exercise, whose joints set the keyframe rate
+
+    Returns:
+        KeyframePoseDetector
+    """
+    from keyframe_engine import KeyframePoseDetector
+
+    return KeyframePoseDetector(pose_detector, exercise)
@@ -0,0 +1,209 @@
+"""
+Pose Pipeline Metrics
+Per-stage latency histograms for /ws/pose, per session and process-wide
+"""
+
+import itertools
+import time
+
+# Pipeline stages in processing order; "total" is receive-to-sent
+STAGES = (
+    "queue_wait",       # received until picked up by an inference thread
+    "b64_decode",       # text protocol only
+    "imdecode",
+    "cvt_color",
+    "inference",        # MediaPipe pose.process
+    "analyze",
+    "draw",             # "image" response mode only
+    "imencode",         # "image" response mode only
+    "encode_response",  # base64 data URL or binary packing
+    "send",
+    "total",
+)
+
+# Each power of two is split into 2**_SUB_BITS buckets (~19% wide)
+_SUB_BITS = 2
+_SUB_BUCKETS = 1 << _SUB_BITS
+_BUCKETS = 64 * _SUB_BUCKETS
+
+
+def _bucket(ns):
+    """Log-scale bucket index of a duration in nanoseconds"""
+    bits = ns.bit_length()
+    if bits <= _SUB_BITS:
+        return ns
+    return (bits << _SUB_BITS) | ((ns >> (bits - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1))
+
+
+def _bucket_upper_ns(index):
+    """Upper bound of a bucket in nanoseconds"""
+    bits, sub = divmod(index, _SUB_BUCKETS)
+    if bits == 0:
+        return index
+    low = 1 << (bits - 1)
+    return low + (sub + 1) * (low >> _SUB_BITS)
+
+
+class LatencyHistogram:
+    """
+    Fixed-size log-bucketed histogram of durations
+
+    Recording is a bit_length and a list increment, cheap enough for every
+    frame. Percentiles are reported as the upper bound of their bucket, so
+    they are accurate to within one bucket width (~19%).
+    """
+
+    __slots__ = ("counts", "count", "total_ns", "max_ns")
+
+    def __init__(self):
+        self.counts = [0] * _BUCKETS
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def record(self, ns):
+        self.counts[_bucket(ns)] += 1
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+
+    def merge(self, other):
+        """Add another histogram's samples to this one"""
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.count += other.count
+        self.total_ns += other.total_ns
+        self.max_ns = max(self.max_ns, other.max_ns)
+
+    def percentile_ns(self, percentile):
+        """Duration below which `percentile` percent of samples fall"""
+        if not self.count:
+            return 0
+        rank = self.count * percentile / 100
+        for index, cumulative in enumerate(itertools.accumulate(self.counts)):
+            if cumulative >= rank:
+                return min(_bucket_upper_ns(index), self.max_ns)
+        return self.max_ns
+
+    def summary(self):
+        """Count, mean, p50/p95/p99 and max in milliseconds"""
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total_ns / self.count / 1e6, 3) if self.count else 0.0,
+            "p50_ms": round(self.percentile_ns(50) / 1e6, 3),
+            "p95_ms": round(self.percentile_ns(95) / 1e6, 3),
+            "p99_ms": round(self.percentile_ns(99) / 1e6, 3),
+            "max_ms": round(self.max_ns / 1e6, 3)
+        }
+
+
+class StageHistograms:
+    """One LatencyHistogram per pipeline stage"""
+
+    def __init__(self):
+        self.stages = {stage: LatencyHistogram() for stage in STAGES}
+
+    def record(self, timings):
+        """
+        Args:
+            timings: {stage: nanoseconds} for one frame
+        """
+        # LatencyHistogram.record() inlined: this runs for every frame
+        stages = self.stages
+        for stage, ns in timings.items():
+            histogram = stages[stage]
+            bits = ns.bit_length()
+            histogram.counts[
+                (bits << _SUB_BITS) | ((ns >> (bits - _SUB_BITS - 1)) & (_SUB_BUCKETS - 1))
+                if bits > _SUB_BITS else ns
+            ] += 1
+            histogram.count += 1
+            histogram.total_ns += ns
+            if ns > histogram.max_ns:
+                histogram.max_ns = ns
+
+    def merge(self, other):
+        """Add another StageHistograms' samples to this one"""
+        for stage, histogram in other.stages.items():
+            self.stages[stage].merge(histogram)
+
+    def summary(self):
+        """Summaries of every stage that has samples"""
+        return {
+            stage: histogram.summary()
+            for stage, histogram in self.stages.items()
+            if histogram.count
+        }
+
+
+class StageTimer:
+    """
+    Collects the per-stage durations of a single frame
+
+    Stages are timed with perf_counter_ns as consecutive laps, so timing a
+    frame costs one clock read per stage.
+    """
+
+    __slots__ = ("timings", "started", "_last")
+
+    def __init__(self, started=None):
+        self.started = time.perf_counter_ns() if started is None else started
+        self._last = self.started
+        self.timings = {}
+
+    def lap(self, stage):
+        """Record the time since the previous lap as `stage`"""
+        now = time.perf_counter_ns()
+        self.timings[stage] = now - self._last
+        self._last = now
+
+    def skip(self):
+        """Restart the lap clock without recording (untimed work in between)"""
+        self._last = time.perf_counter_ns()
+
+    def finish(self):
+        """Record "total" since the timer started and return all timings"""
+        self.timings["total"] = time.perf_counter_ns() - self.started
+        return self.timings
+
+    def milliseconds(self):
+        """Stages recorded so far, in milliseconds (for echoing to the client)"""
+        return {stage: round(ns / 1e6, 3) for stage, ns in self.timings.items()}
+
+
+# Frames are only recorded per session; the global view is the sum of the
+# live sessions plus everything folded in from sessions that have ended
+_finished_histograms = StageHistograms()
+_sessions = {}
+
+
+def record_frame(session_histograms, timings):
+    """Add one frame's timings to its session's histograms"""
+    session_histograms.record(timings)
+
+
+def register_session(session_id, histograms):
+    """Include a live session's histograms in latency_metrics()"""
+    _sessions[session_id] = histograms
+
+
+def unregister_session(session_id):
+    """Fold an ended session into the global histograms"""
+    histograms = _sessions.pop(session_id, None)
+    if histograms is not None:
+        _finished_histograms.merge(histograms)
+
+
+def latency_metrics():
+    """Global and per-session per-stage latency summaries"""
+    combined = StageHistograms()
+    combined.merge(_finished_histograms)
+    for histograms in _sessions.values():
+        combined.merge(histograms)
+    return {
+        "global": combined.summary(),
+        "sessions": {
+            session_id: histograms.summary()
+            for session_id, histograms in _sessions.items()
+        }
+    }
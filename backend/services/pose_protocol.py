@@ -0,0 +1,97 @@
+"""
+Binary /ws/pose Frame Protocol
+Packs and unpacks the versioned binary messages used for video frames
+
+Every binary message starts with a 12 byte header (network byte order):
+
+    offset  size  field
+    0       2     magic b"AP"
+    2       1     protocol version (1)
+    3       1     kind (1 = frame, 2 = analysis)
+    4       4     frame id (uint32, echoed back in the analysis)
+    8       1     exercise code (0 = keep current, see EXERCISE_CODES)
+    9       1     flags (reserved, 0)
+    10      2     reserved
+
+A frame message (client -> server) is the header followed by raw JPEG
+bytes. An analysis message (server -> client) is the header, a uint32
+JSON length, the UTF-8 JSON analysis and then the JPEG overlay bytes (if
+any). Control messages (hello, change_exercise, reset) stay JSON text and
+the original base64 data-URL text protocol is still accepted.
+"""
+
+import json
+import struct
+
+PROTOCOL_VERSION = 1
+SUPPORTED_VERSIONS = (1,)
+MAGIC = b"AP"
+
+KIND_FRAME = 1
+KIND_ANALYSIS = 2
+
+HEADER = struct.Struct("!2sBBIBB2x")
+JSON_LENGTH = struct.Struct("!I")
+
+EXERCISE_CODES = {
+    0: None,
+    1: "squat",
+    2: "pushup",
+    3: "plank",
+}
+EXERCISE_IDS = {name: code for code, name in EXERCISE_CODES.items() if name}
+
+
+class ProtocolError(ValueError):
+    """Raised when a binary message cannot be decoded"""
+
+
+def unpack_frame(data):
+    """
+    Split a binary frame message into its header fields and JPEG payload
+
+    Args:
+        data: Raw bytes received from the WebSocket
+
+    Returns:
+        tuple: (frame_id, exercise or None, jpeg memoryview)
+
+    Raises:
+        ProtocolError: On a bad magic, version, kind or exercise code
+    """
+    if len(data) < HEADER.size:
+        raise ProtocolError("Binary message shorter than header")
+
+    magic, version, kind, frame_id, exercise_code, _flags = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ProtocolError("Bad magic in binary message")
+    if version not in SUPPORTED_VERSIONS:
+        raise ProtocolError(f"Unsupported protocol version {version}")
+    if kind != KIND_FRAME:
+        raise ProtocolError(f"Unexpected message kind {kind}")
+    if exercise_code not in EXERCISE_CODES:
+        raise ProtocolError(f"Unknown exercise code {exercise_code}")
+
+    return frame_id, EXERCISE_CODES[exercise_code], memoryview(data)[HEADER.size:]
+
+
+def pack_analysis(frame_id, analysis, jpeg=b""):
+    """
+    Build a binary analysis message
+
+    Args:
+        frame_id: Id of the frame this analysis answers
+        analysis: JSON-serializable analysis dict
+        jpeg: Encoded overlay image bytes (may be empty)
+
+    Returns:
+        bytes: Message ready for websocket.send_bytes
+    """
+    body = json.dumps(analysis, separators=(",", ":")).encode("utf-8")
+    exercise_code = EXERCISE_IDS.get(analysis.get("exercise"), 0)
+    return b"".join((
+        HEADER.pack(MAGIC, PROTOCOL_VERSION, KIND_ANALYSIS, frame_id, exercise_code, 0),
+        JSON_LENGTH.pack(len(body)),
+        body,
+        jpeg,
+    ))
@@ -0,0 +1,44 @@
+"""
+Pose Session Recording
+Opt-in landmark recordings of /ws/pose sessions (see landmark_recorder.py)
+"""
+
+import os
+import time
+import uuid
+
+RECORDING_MODES = ("off", "opt-in", "all")
+
+
+def configured_recording_mode():
+    """
+    Recording policy from POSE_RECORDING (default "off")
+
+    "off" never records, "opt-in" records sessions whose hello sets
+    "record": true, "all" records every session.
+    """
+    value = os.getenv("POSE_RECORDING", "off").strip().lower()
+    if value not in RECORDING_MODES:
+        print(f"WARNING: Invalid POSE_RECORDING={value!r}, using 'off'")
+        return "off"
+    return value
+
+
+def configured_recording_dir():
+    """Directory for session recordings (POSE_RECORDING_DIR, default ./recordings)"""
+    return os.getenv("POSE_RECORDING_DIR", "recordings")
+
+
+def create_session_recorder():
+    """
+    Start a recorder writing to a new file in the recording directory
+
+    Returns:
+        LandmarkRecorder
+    """
+    from landmark_recorder import LandmarkRecorder
+
+    directory = configured_recording_dir()
+    os.makedirs(directory, exist_ok=True)
+    name = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}.pose"
+    return LandmarkRecorder(os.path.join(directory, name))
@@ -0,0 +1,335 @@
+"""
+Pose Inference Scheduler
+Central, fair scheduling of frames from every /ws/pose session onto a fixed set of workers
+"""
+
+import asyncio
+import os
+import threading
+import time
+from collections import deque
+
+
+def configured_workers():
+    """
+    Number of inference threads to use
+
+    Reads POSE_INFERENCE_WORKERS from the environment and falls back to the
+    number of CPU cores. OpenCV and the MediaPipe graph release the GIL while
+    they work, so one thread per core keeps every core busy. Lives here
+    rather than in pose_inference.py so reading it does not import OpenCV.
+    """
+    value = os.getenv("POSE_INFERENCE_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_INFERENCE_WORKERS={value!r}, using CPU count")
+    return os.cpu_count() or 1
+
+
+def configured_latency_slo_ms():
+    """Receive-to-result latency budget per frame (POSE_LATENCY_SLO_MS, default 500)"""
+    value = os.getenv("POSE_LATENCY_SLO_MS")
+    if value:
+        try:
+            return max(1.0, float(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_LATENCY_SLO_MS={value!r}, using 500")
+    return 500.0
+
+
+def configured_batch_size():
+    """Frames a worker claims per scheduling round (POSE_SCHEDULER_BATCH, default 4)"""
+    value = os.getenv("POSE_SCHEDULER_BATCH")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_SCHEDULER_BATCH={value!r}, using 4")
+    return 4
+
+
+class DeadlineExceeded(Exception):
+    """Raised for a frame dropped because it could not finish within the latency SLO"""
+
+
+class _Job:
+    __slots__ = ("lane", "tag", "func", "args", "deadline_ns", "future", "loop")
+
+    def __init__(self, lane, tag, func, args, deadline_ns, future, loop):
+        self.lane = lane
+        self.tag = tag
+        self.func = func
+        self.args = args
+        self.deadline_ns = deadline_ns
+        self.future = future
+        self.loop = loop
+
+
+def _resolve(future, result, error):
+    if future.cancelled():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+class PoseScheduler:
+    """
+    Fixed set of inference workers shared by every session
+
+    Each session has its own lane, and a lane never has two frames in
+    flight because a session's detector and analyzer keep state. Lanes are
+    served by start-time fair queuing: every frame gets a virtual tag one
+    past its lane's previous frame (or the current virtual time, for a
+    lane that has been idle), and workers always take the smallest tag.
+    Under overload every session therefore gets an equal share of the
+    workers, whatever its send rate or arrival phase.
+
+    Before a frame runs, its deadline is checked against the current
+    service-time estimate; a frame that would miss it is dropped with
+    DeadlineExceeded instead of burning CPU on a stale answer. Its lane
+    keeps the dropped frame's place in line, so the session's next frame
+    runs ahead of sessions that were served.
+
+    Workers claim up to `batch_size` frames from different lanes at once
+    (one lock round-trip per batch). MediaPipe's Pose solution processes a
+    single image per call, so frames in a batch still run one after another
+    on the worker.
+    """
+
+    def __init__(self, workers=None, batch_size=None, smoothing=0.1):
+        """
+        Args:
+            workers: Worker threads (defaults to configured_workers())
+            batch_size: Most frames claimed per round (defaults to configured_batch_size())
+            smoothing: Weight of the newest sample in the service-time estimate
+        """
+        self.max_workers = workers or configured_workers()
+        self.batch_size = batch_size or configured_batch_size()
+        self.smoothing = smoothing
+        self._lanes = {}     # lane -> deque of pending jobs
+        self._ready = []     # lanes with a pending job and nothing in flight
+        self._busy = set()
+        self._tags = {}      # lane -> tag of its latest frame
+        self._owed = set()   # lanes whose latest frame was dropped
+        self._vtime = 0
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Metrics
+        self.service_ns = 0.0
+        self.completed = 0
+        self.dropped_late = 0
+        self.batches = 0
+        self.batched_jobs = 0
+
+        self._threads = [
+            threading.Thread(target=self._work, name=f"pose-scheduler-{i}", daemon=True)
+            for i in range(self.max_workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _submit(self, lane, func, args, deadline_ns):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("Pose scheduler is shut down")
+            if lane is None:
+                # Maintenance work (detector warm-up and reset) goes ahead of
+                # every frame, each job in a lane of its own so that several
+                # run in parallel instead of queueing behind each other
+                lane = object()
+                tag = self._vtime
+            elif lane in self._owed:
+                # Its last frame was dropped: keep its place instead of queueing at the back
+                self._owed.discard(lane)
+                tag = self._tags[lane] + 1
+                self._tags[lane] = tag
+            else:
+                tag = max(self._vtime, self._tags.get(lane, 0)) + 1
+                self._tags[lane] = tag
+            queue = self._lanes.setdefault(lane, deque())
+            queue.append(_Job(lane, tag, func, args, deadline_ns, future, loop))
+            if lane not in self._busy and len(queue) == 1:
+                self._ready.append(lane)
+            self._cond.notify()
+        return future
+
+    async def run(self, func, *args):
+        """
+        Run maintenance work (no deadline) on the workers
+
+        The detector pool uses the scheduler as its executor through this.
+        """
+        return await self._submit(None, func, args, None)
+
+    async def run_frame(self, lane, deadline_ns, func, *args):
+        """
+        Run one frame for a session
+
+        Args:
+            lane: Session key (frames of one lane run strictly one at a time)
+            deadline_ns: perf_counter_ns() by which the result is needed
+            func, *args: Blocking frame processing call
+
+        Returns:
+            Whatever func returns
+
+        Raises:
+            DeadlineExceeded: If the frame was dropped to protect the SLO
+        """
+        return await self._submit(lane, func, args, deadline_ns)
+
+    def forget(self, lane):
+        """Drop a finished session's fair-share state"""
+        with self._cond:
+            self._tags.pop(lane, None)
+            self._owed.discard(lane)
+
+    def _drop_late(self, job):
+        """Refund a dropped frame's tag (caller holds the lock)"""
+        self.dropped_late += 1
+        if self._tags.get(job.lane) == job.tag:
+            self._tags[job.lane] = job.tag - 1
+            self._owed.add(job.lane)
+        try:
+            job.loop.call_soon_threadsafe(
+                _resolve, job.future, None, DeadlineExceeded("Frame dropped: it could not meet the latency SLO")
+            )
+        except RuntimeError:
+            pass  # event loop already closed
+
+    def _claim(self):
+        """Take jobs with the smallest tags from distinct lanes (caller holds the lock)"""
+        # Leave work for idle workers rather than taking a whole batch
+        limit = min(self.batch_size, max(1, len(self._ready) // self.max_workers))
+        now = time.perf_counter_ns()
+        jobs = []
+        while self._ready and len(jobs) < limit:
+            lane = min(self._ready, key=lambda ready: self._lanes[ready][0].tag)
+            self._ready.remove(lane)
+            queue = self._lanes[lane]
+            job = queue.popleft()
+            if job.deadline_ns is not None and now + self.service_ns > job.deadline_ns:
+                self._drop_late(job)
+                if queue:
+                    self._ready.append(lane)
+                else:
+                    del self._lanes[lane]
+                continue
+            self._busy.add(lane)
+            self._vtime = max(self._vtime, job.tag)
+            jobs.append(job)
+        return jobs
+
+    def _finish(self, lane):
+        with self._cond:
+            self._busy.discard(lane)
+            queue = self._lanes.get(lane)
+            if queue:
+                self._ready.append(lane)
+                self._cond.notify()
+            elif queue is not None:
+                del self._lanes[lane]
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._ready and not self._closed:
+                    self._cond.wait()
+                if self._closed and not self._ready:
+                    return
+                jobs = self._claim()
+                if not jobs:
+                    # Everything was late: decay the estimate so one slow
+                    # frame cannot keep every later frame from running
+                    self.service_ns *= 0.5
+                    continue
+                self.batches += 1
+                self.batched_jobs += len(jobs)
+
+            for job in jobs:
+                started = time.perf_counter_ns()
+                if job.deadline_ns is not None and started + self.service_ns > job.deadline_ns:
+                    # Became late while earlier frames of the batch ran
+                    with self._cond:
+                        self._drop_late(job)
+                    self._finish(job.lane)
+                    continue
+
+                result = error = None
+                try:
+                    result = job.func(*job.args)
+                except Exception as e:
+                    error = e
+                elapsed = time.perf_counter_ns() - started
+                if job.deadline_ns is not None:
+                    # Maintenance work (detector warm-up) would skew the estimate
+                    if self.completed:
+                        self.service_ns += self.smoothing * (elapsed - self.service_ns)
+                    else:
+                        self.service_ns = float(elapsed)
+                    self.completed += 1
+                self._finish(job.lane)
+                try:
+                    job.loop.call_soon_threadsafe(_resolve, job.future, result, error)
+                except RuntimeError:
+                    pass  # event loop already closed
+
+    def metrics(self):
+        """Queue depth, drops and service time"""
+        with self._cond:
+            queued = sum(len(queue) for queue in self._lanes.values())
+            active_lanes = len(self._lanes)
+            tracked = len(self._tags)
+        return {
+            "workers": self.max_workers,
+            "batch_size": self.batch_size,
+            "active_sessions": active_lanes,
+            "tracked_sessions": tracked,
+            "queued_frames": queued,
+            "completed_frames": self.completed,
+            "dropped_late": self.dropped_late,
+            "avg_batch": round(self.batched_jobs / self.batches, 2) if self.batches else 0.0,
+            "service_ms": round(self.service_ns / 1e6, 2)
+        }
+
+    def shutdown(self, wait=True):
+        """Finish queued work and stop the workers"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if wait:
+            for thread in self._threads:
+                thread.join()
+
+
+_pose_scheduler = None
+
+
+def get_pose_scheduler():
+    """Return the process-wide scheduler, creating it on first use"""
+    global _pose_scheduler
+    if _pose_scheduler is None:
+        _pose_scheduler = PoseScheduler()
+        print(f"Pose scheduler started with {_pose_scheduler.max_workers} workers, "
+              f"batch size {_pose_scheduler.batch_size}")
+    return _pose_scheduler
+
+
+def current_pose_scheduler():
+    """Return the process-wide scheduler, or None if nothing has started it yet"""
+    return _pose_scheduler
+
+
+def shutdown_pose_scheduler():
+    """Shut down the process-wide scheduler if it was started"""
+    global _pose_scheduler
+    if _pose_scheduler is not None:
+        _pose_scheduler.shutdown()
+        _pose_scheduler = None
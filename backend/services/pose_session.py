@@ -0,0 +1,221 @@
+"""
+Pose Session State
+Per-connection state and backpressure for /ws/pose
+"""
+
+import asyncio
+import secrets
+import time
+import uuid
+
+from services.pose_metrics import StageHistograms
+
+
+class LatestFrameSlot:
+    """
+    Bounded ingest stage holding at most one pending frame
+
+    A frame that arrives while another is still waiting replaces it, so the
+    processor always works on the newest frame and latency cannot build up
+    when inference is slower than the client's send rate.
+    """
+
+    def __init__(self):
+        self._frame = None
+        self._closed = False
+        self._ready = asyncio.Event()
+        self.received = 0
+        self.dropped = 0
+
+    def put(self, frame):
+        """Offer a frame, dropping the one still waiting (if any)"""
+        if self._frame is not None:
+            self.dropped += 1
+        self._frame = frame
+        self.received += 1
+        self._ready.set()
+
+    async def get(self):
+        """
+        Wait for the newest frame
+
+        Returns:
+            The pending frame, or None once the slot is closed
+        """
+        while self._frame is None and not self._closed:
+            self._ready.clear()
+            await self._ready.wait()
+        frame, self._frame = self._frame, None
+        return frame
+
+    def close(self):
+        """Wake the consumer and make get() return None from now on"""
+        self._closed = True
+        self._frame = None
+        self._ready.set()
+
+
+class RateAdvisor:
+    """
+    Suggests a client send interval from measured processing time
+
+    Keeps exponentially weighted averages of the per-frame processing time
+    and of the gap between incoming frames. When processing cannot keep up
+    the client is told to slow down; when there is plenty of headroom it is
+    told it may speed up.
+    """
+
+    def __init__(self, min_interval_ms=100, max_interval_ms=2000, smoothing=0.2, hint_every_s=2.0):
+        self.min_interval_ms = min_interval_ms
+        self.max_interval_ms = max_interval_ms
+        self.smoothing = smoothing
+        self.hint_every_s = hint_every_s
+        self.processing_ms = None
+        self.arrival_interval_ms = None
+        self._last_arrival = None
+        self._last_hint_at = 0.0
+        self._last_action = None
+
+    def _smooth(self, current, sample):
+        if current is None:
+            return sample
+        return current + self.smoothing * (sample - current)
+
+    def record_arrival(self, now=None):
+        """Record that a frame arrived from the client"""
+        now = time.perf_counter() if now is None else now
+        if self._last_arrival is not None:
+            gap_ms = (now - self._last_arrival) * 1000
+            self.arrival_interval_ms = self._smooth(self.arrival_interval_ms, gap_ms)
+        self._last_arrival = now
+
+    def record_processing(self, seconds):
+        """Record how long one frame took end to end"""
+        self.processing_ms = self._smooth(self.processing_ms, seconds * 1000)
+
+    def hint(self, now=None):
+        """
+        Build a rate hint if one is due
+
+        Returns:
+            dict: {'action', 'suggested_interval_ms', 'processing_ms'} or None
+        """
+        if self.processing_ms is None or self.arrival_interval_ms is None:
+            return None
+
+        now = time.perf_counter() if now is None else now
+        if now - self._last_hint_at < self.hint_every_s:
+            return None
+
+        # Aim for ~25% headroom over the measured processing time
+        target_ms = min(max(self.processing_ms * 1.25, self.min_interval_ms), self.max_interval_ms)
+
+        if self.processing_ms > self.arrival_interval_ms * 0.9:
+            action = "slow_down"
+        elif target_ms < self.arrival_interval_ms * 0.75:
+            action = "speed_up"
+        else:
+            action = "ok"
+
+        # Only repeat "ok" when something changed
+        if action == "ok" and self._last_action in (None, "ok"):
+            return None
+
+        self._last_hint_at = now
+        self._last_action = action
+        return {
+            "action": action,
+            "suggested_interval_ms": int(target_ms),
+            "processing_ms": round(self.processing_ms, 1)
+        }
+
+
+class PoseSession:
+    """
+    Everything one /ws/pose connection owns
+
+    The detector and analyzer are only touched while holding `lock`, so
+    control messages (reset, change_exercise) never race a frame that is
+    being processed on the scheduler.
+    """
+
+    def __init__(self, pose_detector, exercise_analyzer, exercise="squat"):
+        self.pose_detector = pose_detector
+        self.exercise_analyzer = exercise_analyzer
+        self.current_exercise = exercise
+        self.response_mode = "image"
+        self.frames = LatestFrameSlot()
+        self.rate = RateAdvisor()
+        self.lock = asyncio.Lock()
+        self.processed = 0
+        self.late = 0  # frames the scheduler dropped to protect the latency SLO
+        self.recorder = None  # LandmarkRecorder when this session is recorded
+        self.keyframes = None  # KeyframePoseDetector when only keyframes are inferred
+        self.session_id = uuid.uuid4().hex[:12]
+        self.latency = StageHistograms()
+        self.echo_timings = False
+        self.token = secrets.token_urlsafe(16)  # resume key for the session store
+        # After a resume, frames may still carry the exercise the client
+        # had before it read the hello reply; see frame_exercise_changed()
+        self.resyncing_exercise = False
+        self._checkpointed = None
+
+    def state(self):
+        """Resumable state: current exercise and rep counting"""
+        return {
+            "exercise": self.current_exercise,
+            "analyzer": self.exercise_analyzer.state_dict()
+        }
+
+    def restore(self, token, state):
+        """Continue a checkpointed session under its token (hold `lock`)"""
+        self.token = token
+        self.current_exercise = state.get("exercise", self.current_exercise)
+        self.exercise_analyzer.load_state(state.get("analyzer", {}))
+        if self.keyframes is not None:
+            self.keyframes.set_exercise(self.current_exercise)
+        self.resyncing_exercise = True
+        self._checkpointed = state
+
+    def use_keyframes(self, keyframes):
+        """Run frames through a KeyframePoseDetector wrapping the pooled detector (hold `lock`)"""
+        self.keyframes = keyframes
+        self.pose_detector = keyframes
+
+    def frame_exercise_changed(self, frame_exercise):
+        """
+        Whether a frame's exercise code switches the exercise
+
+        Right after a resume the client may still tag frames with its
+        default exercise; those are ignored (instead of resetting the
+        restored reps) until a frame carries the restored exercise. An
+        explicit change_exercise message always applies.
+
+        Args:
+            frame_exercise: Exercise from the frame header, or None
+        """
+        if not frame_exercise:
+            return False
+        if frame_exercise == self.current_exercise:
+            self.resyncing_exercise = False
+            return False
+        return not self.resyncing_exercise
+
+    def checkpoint(self, checkpointer):
+        """Queue the state for the next batched store write if it changed"""
+        state = self.state()
+        if state != self._checkpointed:
+            self._checkpointed = state
+            checkpointer.mark(self.token, state)
+
+    def stats(self):
+        """Per-session frame counters"""
+        stats = {
+            "frames_received": self.frames.received,
+            "frames_processed": self.processed,
+            "frames_dropped": self.frames.dropped,
+            "frames_late": self.late
+        }
+        if self.keyframes is not None:
+            stats.update(self.keyframes.stats())
+        return stats
@@ -0,0 +1,276 @@
+"""
+Pose Session Store
+Checkpoints /ws/pose session state so a reconnect can resume on any worker
+"""
+
+import asyncio
+import json
+import os
+import sqlite3
+import threading
+import time
+
+SESSION_STORES = ("memory", "sqlite")
+
+
+def configured_session_store():
+    """
+    Session store backend from POSE_SESSION_STORE (default "memory")
+
+    "memory" keeps checkpoints in this process only, "sqlite" shares them
+    with every worker that points at the same POSE_SESSION_STORE_PATH.
+    """
+    value = os.getenv("POSE_SESSION_STORE", "memory").strip().lower()
+    if value not in SESSION_STORES:
+        print(f"WARNING: Invalid POSE_SESSION_STORE={value!r}, using 'memory'")
+        return "memory"
+    return value
+
+
+def configured_store_path():
+    """SQLite file for the "sqlite" store (POSE_SESSION_STORE_PATH, default ./pose_sessions.db)"""
+    return os.getenv("POSE_SESSION_STORE_PATH", "pose_sessions.db")
+
+
+def configured_checkpoint_interval():
+    """Seconds between checkpoint flushes (POSE_CHECKPOINT_INTERVAL, default 2)"""
+    value = os.getenv("POSE_CHECKPOINT_INTERVAL")
+    if value:
+        try:
+            return max(0.1, float(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_CHECKPOINT_INTERVAL={value!r}, using 2")
+    return 2.0
+
+
+def configured_session_ttl():
+    """Seconds a checkpoint stays resumable (POSE_SESSION_TTL, default 3600)"""
+    value = os.getenv("POSE_SESSION_TTL")
+    if value:
+        try:
+            return max(1.0, float(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_SESSION_TTL={value!r}, using 3600")
+    return 3600.0
+
+
+class MemorySessionStore:
+    """
+    In-process checkpoints
+
+    Only resumes reconnects that land on the same worker; use the SQLite
+    store when running several workers.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or configured_session_ttl()
+        self._states = {}  # token -> (updated_at, state)
+        self._lock = threading.Lock()
+
+    def get(self, token):
+        """Latest checkpoint for a token, or None if unknown or expired"""
+        with self._lock:
+            entry = self._states.get(token)
+        if entry is None or time.time() - entry[0] > self.ttl:
+            return None
+        return entry[1]
+
+    def put_many(self, states):
+        """
+        Write a batch of checkpoints
+
+        Args:
+            states: {token: JSON-serializable state}
+        """
+        now = time.time()
+        with self._lock:
+            for token, state in states.items():
+                self._states[token] = (now, state)
+
+    def delete(self, token):
+        with self._lock:
+            self._states.pop(token, None)
+
+    def purge_expired(self):
+        """Forget checkpoints older than the TTL"""
+        cutoff = time.time() - self.ttl
+        with self._lock:
+            for token in [token for token, (updated_at, _) in self._states.items() if updated_at < cutoff]:
+                del self._states[token]
+
+    def close(self):
+        pass
+
+
+class SQLiteSessionStore:
+    """
+    Checkpoints in a SQLite file shared by all workers on the host
+
+    The database runs in WAL mode, so resuming (a primary-key read) never
+    waits for another worker's batch write. Each batch is one transaction.
+    """
+
+    def __init__(self, path=None, ttl=None):
+        self.path = path or configured_store_path()
+        self.ttl = ttl or configured_session_ttl()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.path, timeout=5, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pose_sessions ("
+            "token TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def get(self, token):
+        """Latest checkpoint for a token, or None if unknown or expired"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT state FROM pose_sessions WHERE token = ? AND updated_at >= ?",
+                (token, time.time() - self.ttl)
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_many(self, states):
+        """
+        Write a batch of checkpoints in one transaction
+
+        Args:
+            states: {token: JSON-serializable state}
+        """
+        now = time.time()
+        rows = [(token, json.dumps(state), now) for token, state in states.items()]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT INTO pose_sessions (token, state, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(token) DO UPDATE SET state = excluded.state, updated_at = excluded.updated_at",
+                rows
+            )
+
+    def delete(self, token):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pose_sessions WHERE token = ?", (token,))
+
+    def purge_expired(self):
+        """Delete checkpoints older than the TTL"""
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM pose_sessions WHERE updated_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class SessionCheckpointer:
+    """
+    Batches checkpoints from every session into periodic store writes
+
+    Sessions call mark() whenever their state changes; that only replaces
+    an entry in a dict on the event loop. A background task hands
+    everything marked since the last flush to the store in one batch, so
+    a session's state is written at most once per interval however many
+    frames it sends.
+    """
+
+    def __init__(self, store, interval=None, purge_every=600.0):
+        """
+        Args:
+            store: MemorySessionStore or SQLiteSessionStore
+            interval: Seconds between flushes (defaults to configured_checkpoint_interval())
+            purge_every: Seconds between expired-checkpoint purges
+        """
+        self.store = store
+        self.interval = interval or configured_checkpoint_interval()
+        self.purge_every = purge_every
+        self._dirty = {}
+        self._flushing = {}  # batch being written right now
+        self._task = None
+        self._last_purge = time.monotonic()
+        self.flushes = 0
+        self.written = 0
+
+    def mark(self, token, state):
+        """Queue a session's latest state for the next flush"""
+        self._dirty[token] = state
+
+    async def load(self, token):
+        """
+        State to resume a session from, or None
+
+        A state marked on this worker but not yet flushed is newer than
+        anything in the store.
+        """
+        state = self._dirty.get(token) or self._flushing.get(token)
+        if state is not None:
+            return state
+        return await asyncio.to_thread(self.store.get, token)
+
+    async def flush(self):
+        """Write everything marked since the last flush"""
+        if not self._dirty:
+            return
+        batch, self._dirty = self._dirty, {}
+        self._flushing = batch
+        try:
+            await asyncio.to_thread(self.store.put_many, batch)
+        except Exception as e:
+            print(f"WARNING: Session checkpoint failed: {e}")
+            # Keep the states unless a newer one was marked meanwhile
+            for token, state in batch.items():
+                self._dirty.setdefault(token, state)
+            return
+        finally:
+            self._flushing = {}
+        self.flushes += 1
+        self.written += len(batch)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.flush()
+            if time.monotonic() - self._last_purge > self.purge_every:
+                self._last_purge = time.monotonic()
+                await asyncio.to_thread(self.store.purge_expired)
+
+    def start(self):
+        """Start the periodic flusher on the running event loop"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Stop the flusher and write what is still pending"""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        await self.flush()
+
+
+def create_session_store():
+    """Build the store selected by POSE_SESSION_STORE"""
+    if configured_session_store() == "sqlite":
+        return SQLiteSessionStore()
+    return MemorySessionStore()
+
+
+_checkpointer = None
+
+
+def get_checkpointer():
+    """Return the process-wide checkpointer, creating its store on first use"""
+    global _checkpointer
+    if _checkpointer is None:
+        _checkpointer = SessionCheckpointer(create_session_store())
+        print(f"Pose session store: {configured_session_store()}, "
+              f"checkpoints every {_checkpointer.interval:g}s")
+    return _checkpointer
+
+
+async def close_checkpointer():
+    """Flush pending checkpoints and close the store"""
+    global _checkpointer
+    if _checkpointer is not None:
+        await _checkpointer.stop()
+        _checkpointer.store.close()
+        _checkpointer = None
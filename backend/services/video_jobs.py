@@ -0,0 +1,138 @@
+"""
+Video Analysis Jobs
+In-memory registry of offline video analysis jobs for /api/pose/analyze-video
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import uuid
+
+# Add ml_models to path for the offline analyzer (imported lazily per job)
+ml_models_path = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..', 'ml_models', 'pose_detection'))
+if ml_models_path not in sys.path:
+    sys.path.insert(0, ml_models_path)
+
+
+def configured_video_workers():
+    """Worker processes per video job (POSE_VIDEO_WORKERS, default CPU count)"""
+    value = os.getenv("POSE_VIDEO_WORKERS")
+    if value:
+        try:
+            return max(1, int(value))
+        except ValueError:
+            print(f"WARNING: Invalid POSE_VIDEO_WORKERS={value!r}, using CPU count")
+    return os.cpu_count() or 1
+
+
+class VideoJobRegistry:
+    """
+    Tracks queued, running and finished video analysis jobs
+
+    Jobs live in memory only; finished jobs are kept for `retention_s`
+    seconds so clients can poll for the result.
+    """
+
+    def __init__(self, retention_s=3600):
+        self.retention_s = retention_s
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def create(self, exercise, filename):
+        """Register a new queued job and return its id"""
+        self._expire()
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "job_id": job_id,
+                "status": "queued",
+                "exercise": exercise,
+                "filename": filename,
+                "progress": 0.0,
+                "frames_done": 0,
+                "total_frames": None,
+                "result": None,
+                "error": None,
+                "created_at": time.time(),
+                "finished_at": None
+            }
+        return job_id
+
+    def get(self, job_id):
+        """Snapshot of a job, or None if unknown or expired"""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def update(self, job_id, **fields):
+        with self._lock:
+            if job_id in self._jobs:
+                self._jobs[job_id].update(fields)
+
+    def _expire(self):
+        cutoff = time.time() - self.retention_s
+        with self._lock:
+            for job_id in [job_id for job_id, job in self._jobs.items()
+                           if job["finished_at"] and job["finished_at"] < cutoff]:
+                del self._jobs[job_id]
+
+
+_registry = VideoJobRegistry()
+
+# Each job already fans out across every worker process, so jobs run one
+# at a time and later uploads stay "queued" instead of oversubscribing cores
+_job_slot = threading.Semaphore(1)
+
+
+def get_video_jobs():
+    """Return the process-wide job registry"""
+    return _registry
+
+
+def save_upload(upload_file, suffix=".mp4"):
+    """
+    Stream an uploaded file to a temporary path without reading it into memory
+
+    Returns:
+        str: Path of the temporary file (the caller deletes it)
+    """
+    handle, path = tempfile.mkstemp(prefix="pose-video-", suffix=suffix)
+    with os.fdopen(handle, "wb") as out:
+        shutil.copyfileobj(upload_file, out, length=1024 * 1024)
+    return path
+
+
+def run_video_job(job_id, path, exercise):
+    """
+    Analyze an uploaded video and record the outcome on the job
+
+    Blocking; meant to run as a background task. Deletes `path` when done.
+    """
+    registry = get_video_jobs()
+
+    def progress(frames_done, total_frames):
+        registry.update(
+            job_id,
+            frames_done=frames_done,
+            total_frames=total_frames,
+            progress=round(frames_done / total_frames, 3) if total_frames else 0.0
+        )
+
+    try:
+        from video_analyzer import analyze_video
+
+        with _job_slot:
+            registry.update(job_id, status="running")
+            result = analyze_video(path, exercise, workers=configured_video_workers(), progress=progress)
+        registry.update(job_id, status="completed", progress=1.0, result=result, finished_at=time.time())
+    except Exception as e:
+        print(f"Video analysis job {job_id} failed: {e}")
+        registry.update(job_id, status="failed", error=str(e), finished_at=time.time())
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,314 @@
+"""
+Workout Records
+Queries on the workouts table; every read is a range on (user_id, completed_at)
+
+Each tracked workout is also added to the user's rollup tables
+(workout_daily_rollups, workout_totals), which the analytics read instead
+of the raw history.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import delete, func, insert, select
+
+from models.database import User, Workout, WorkoutDailyRollup, WorkoutTotal
+
+# Columns the Analytics Engine expects, in the workout history CSV's order
+ANALYTICS_COLUMNS = ['date', 'exercise_type', 'duration_minutes', 'calories_burned', 'intensity', 'reps', 'sets']
+
+
+def workout_to_dict(workout):
+    """JSON-ready dict for one Workout row"""
+    return {
+        "id": workout.id,
+        "user_id": workout.user_id,
+        "exercise_type": workout.exercise_type,
+        "duration_minutes": workout.duration_minutes,
+        "calories_burned": workout.calories_burned,
+        "form_score": workout.form_score,
+        "intensity": workout.intensity,
+        "reps": workout.reps,
+        "sets": workout.sets,
+        "completed_at": workout.completed_at.isoformat() if workout.completed_at else None
+    }
+
+
+def add_workout(session, user_id, **fields):
+    """
+    Insert one workout
+
+    Args:
+        session: Open session (see services.database.run_in_session)
+        user_id: Owner of the workout
+        **fields: Workout columns; completed_at defaults to now
+
+    Returns:
+        dict: The stored workout
+
+    Raises:
+        LookupError: If the user does not exist
+    """
+    if session.get(User, user_id) is None:
+        raise LookupError(f"User {user_id} not found")
+    workout = Workout(user_id=user_id, **fields)
+    session.add(workout)
+    session.flush()
+    _add_to_rollups(session, workout)
+    return workout_to_dict(workout)
+
+
+def _increment(session, model, keys, increments):
+    """
+    Add to a rollup row, creating it if missing
+
+    Uses the dialect's INSERT ... ON CONFLICT DO UPDATE so concurrent
+    transactions cannot both create the same row.
+    """
+    dialect = session.get_bind().dialect.name
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as upsert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as upsert
+    else:
+        row = session.get(model, tuple(keys.values()))
+        if row is None:
+            session.add(model(**keys, **increments))
+        else:
+            for column, value in increments.items():
+                setattr(row, column, getattr(row, column) + value)
+        return
+    statement = upsert(model).values(**keys, **increments)
+    session.execute(statement.on_conflict_do_update(
+        index_elements=list(keys),
+        set_={column: getattr(model, column) + statement.excluded[column] for column in increments}
+    ))
+
+
+def _add_to_rollups(session, workout):
+    """Count one workout in its day's and its weekday's buckets"""
+    day = workout.completed_at.date()
+    intensity = workout.intensity
+    _increment(session, WorkoutDailyRollup,
+               {"user_id": workout.user_id, "day": day, "exercise_type": workout.exercise_type},
+               {"workouts": 1,
+                "calories_burned": workout.calories_burned or 0,
+                "duration_minutes": workout.duration_minutes or 0,
+                "intensity_sum": intensity or 0,
+                "intensity_count": 0 if intensity is None else 1})
+    _increment(session, WorkoutTotal,
+               {"user_id": workout.user_id, "exercise_type": workout.exercise_type, "weekday": day.weekday()},
+               {"workouts": 1,
+                "calories_burned": workout.calories_burned or 0,
+                "duration_minutes": workout.duration_minutes or 0})
+
+
+def day_buckets(session, user_id, today, days):
+    """
+    A user's daily rollups for the last `days` calendar days, today included
+
+    Returns:
+        list: Dicts shaped like WorkoutRollup.day_buckets()
+    """
+    rows = session.scalars(
+        select(WorkoutDailyRollup)
+        .where(WorkoutDailyRollup.user_id == user_id)
+        .where(WorkoutDailyRollup.day > today - timedelta(days=days))
+        .where(WorkoutDailyRollup.day <= today)
+    )
+    return [
+        {"day": row.day, "exercise_type": row.exercise_type, "workouts": row.workouts,
+         "calories_burned": row.calories_burned, "duration_minutes": row.duration_minutes,
+         "intensity_sum": row.intensity_sum, "intensity_count": row.intensity_count}
+        for row in rows
+    ]
+
+
+def total_buckets(session, user_id):
+    """
+    A user's lifetime rollups
+
+    Returns:
+        list: Dicts shaped like WorkoutRollup.total_buckets()
+    """
+    rows = session.scalars(select(WorkoutTotal).where(WorkoutTotal.user_id == user_id))
+    return [
+        {"exercise_type": row.exercise_type, "weekday": row.weekday, "workouts": row.workouts,
+         "calories_burned": row.calories_burned, "duration_minutes": row.duration_minutes}
+        for row in rows
+    ]
+
+
+def current_streak(session, user_id, today):
+    """
+    Consecutive days with a workout, ending today
+
+    Walks the user's active days newest first and stops at the first gap,
+    so it reads streak + 1 index entries.
+    """
+    days = session.scalars(
+        select(WorkoutDailyRollup.day).distinct()
+        .where(WorkoutDailyRollup.user_id == user_id)
+        .where(WorkoutDailyRollup.day <= today)
+        .order_by(WorkoutDailyRollup.day.desc())
+    )
+    streak = 0
+    for day in days:
+        if day != today - timedelta(days=streak):
+            break
+        streak += 1
+    return streak
+
+
+def user_streaks(session, today=None):
+    """
+    Current and longest streak of every user, e.g. for a nightly job
+
+    Streams the (user_id, day) keys of the daily rollups, one row per
+    active day and exercise, and hands them to the vectorized
+    streaks_by_user() pass instead of walking each user's days.
+
+    Returns:
+        DataFrame indexed by user_id with current_streak and longest_streak
+    """
+    import numpy as np
+    from analytics.analytics_engine import epoch_days, streaks_by_user
+    from analytics.rollups import utc_today
+
+    today = today or utc_today()
+    rows = session.execute(
+        select(WorkoutDailyRollup.user_id, WorkoutDailyRollup.day)
+        .execution_options(yield_per=50000)
+    )
+    user_ids, days = [], []
+    for partition in rows.partitions():
+        chunk = np.array(partition, dtype=object)
+        user_ids.append(chunk[:, 0].astype(np.int64))
+        days.append(epoch_days(list(chunk[:, 1])))
+    if not user_ids:
+        return streaks_by_user([], [], int(epoch_days(today)))
+    return streaks_by_user(np.concatenate(user_ids), np.concatenate(days), int(epoch_days(today)))
+
+
+def weekly_rollups(session, user_id, today=None):
+    """Inputs of AnalyticsEngine.weekly_stats_from_rollups(): (day buckets, streak)"""
+    from analytics.rollups import utc_today
+
+    today = today or utc_today()
+    return day_buckets(session, user_id, today, 7), current_streak(session, user_id, today)
+
+
+def performance_rollups(session, user_id, today=None):
+    """Inputs of AnalyticsEngine.performance_metrics_from_rollups(): (totals, workouts in 30 days)"""
+    from analytics.rollups import utc_today
+
+    today = today or utc_today()
+    recent = session.scalar(
+        select(func.coalesce(func.sum(WorkoutDailyRollup.workouts), 0))
+        .where(WorkoutDailyRollup.user_id == user_id)
+        .where(WorkoutDailyRollup.day > today - timedelta(days=30))
+        .where(WorkoutDailyRollup.day <= today)
+    )
+    return total_buckets(session, user_id), recent
+
+
+def rebuild_rollups(session, user_id):
+    """
+    Recompute a user's rollups from their workouts
+
+    For data written without going through add_workout() (imports,
+    databases created before the rollup tables). Reads the whole history
+    once.
+    """
+    from analytics.rollups import DAY_FIELDS, WorkoutRollup
+
+    session.execute(delete(WorkoutDailyRollup).where(WorkoutDailyRollup.user_id == user_id))
+    session.execute(delete(WorkoutTotal).where(WorkoutTotal.user_id == user_id))
+
+    rollup = WorkoutRollup()
+    rows = session.execute(
+        select(Workout.completed_at, Workout.exercise_type, Workout.calories_burned,
+               Workout.duration_minutes, Workout.intensity)
+        .where(Workout.user_id == user_id)
+        .execution_options(yield_per=5000)
+    )
+    for completed_at, exercise_type, calories, duration, intensity in rows:
+        if completed_at is None:
+            continue
+        rollup.add(completed_at.date(), exercise_type, 1, calories or 0, duration or 0,
+                   intensity or 0, 0 if intensity is None else 1)
+
+    days = [
+        {"day": day, "exercise_type": exercise_type, **dict(zip(DAY_FIELDS, values))}
+        for day, exercises in rollup.days.items()
+        for exercise_type, values in exercises.items()
+    ]
+    if days:
+        session.execute(insert(WorkoutDailyRollup), [{"user_id": user_id, **bucket} for bucket in days])
+    totals = rollup.total_buckets()
+    if totals:
+        session.execute(insert(WorkoutTotal), [{"user_id": user_id, **bucket} for bucket in totals])
+    return len(days), len(totals)
+
+
+def list_workouts(session, user_id, since=None, until=None, limit=None):
+    """
+    A user's workouts, newest first
+
+    Filters and orders on (user_id, completed_at) only, so SQLite walks
+    the ix_workouts_user_completed index backwards and stops after
+    `limit` rows instead of scanning and sorting the table.
+
+    Args:
+        since, until: Optional completed_at bounds (inclusive, exclusive)
+        limit: Optional row limit
+
+    Returns:
+        list: Workout dicts
+    """
+    query = select(Workout).where(Workout.user_id == user_id)
+    if since is not None:
+        query = query.where(Workout.completed_at >= since)
+    if until is not None:
+        query = query.where(Workout.completed_at < until)
+    query = query.order_by(Workout.completed_at.desc())
+    if limit is not None:
+        query = query.limit(limit)
+    return [workout_to_dict(workout) for workout in session.scalars(query)]
+
+
+def analytics_rows(session, user_id, since=None):
+    """
+    A user's workouts in the Analytics Engine's layout, oldest first
+
+    Args:
+        since: Optional earliest completed_at
+
+    Returns:
+        list: Dicts with ANALYTICS_COLUMNS keys ('date' is completed_at)
+    """
+    query = select(
+        Workout.completed_at, Workout.exercise_type, Workout.duration_minutes,
+        Workout.calories_burned, Workout.intensity, Workout.reps, Workout.sets
+    ).where(Workout.user_id == user_id)
+    if since is not None:
+        query = query.where(Workout.completed_at >= since)
+    query = query.order_by(Workout.completed_at)
+    return [dict(zip(ANALYTICS_COLUMNS, row)) for row in session.execute(query)]
+
+
+def parse_completed_at(value):
+    """
+    completed_at from an ISO date or datetime string (None means now)
+
+    Datetimes with an offset (e.g. toISOString()'s trailing Z) are
+    converted to naive UTC, the form completed_at is stored in.
+
+    Raises:
+        ValueError: If value is not an ISO date or datetime
+    """
+    if value is None:
+        return datetime.utcnow()
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
@@ -35,6 +35,44 @@ interface AnalysisResult {
   status: string;
 }
 
+// Binary /ws/pose frame protocol (see backend/services/pose_protocol.py)
+const PROTOCOL_VERSION = 1;
+const HEADER_SIZE = 12;
+const KIND_FRAME = 1;
+const KIND_ANALYSIS = 2;
+const EXERCISE_CODES: Record<string, number> = { squat: 1, pushup: 2, plank: 3 };
+const SESSION_TOKEN_KEY = "poseSessionToken";
+
+const packFrame = (frameId: number, exercise: string, jpeg: ArrayBuffer): ArrayBuffer => {
+  const message = new Uint8Array(HEADER_SIZE + jpeg.byteLength);
+  const header = new DataView(message.buffer);
+  header.setUint8(0, 0x41); // "A"
+  header.setUint8(1, 0x50); // "P"
+  header.setUint8(2, PROTOCOL_VERSION);
+  header.setUint8(3, KIND_FRAME);
+  header.setUint32(4, frameId);
+  header.setUint8(8, EXERCISE_CODES[exercise] ?? 0);
+  message.set(new Uint8Array(jpeg), HEADER_SIZE);
+  return message.buffer;
+};
+
+const unpackAnalysis = (data: ArrayBuffer) => {
+  const view = new DataView(data);
+  if (view.getUint8(3) !== KIND_ANALYSIS) return null;
+  const jsonLength = view.getUint32(HEADER_SIZE);
+  const json = new TextDecoder().decode(new Uint8Array(data, HEADER_SIZE + 4, jsonLength));
+  return JSON.parse(json);
+};
+
+// MediaPipe Pose skeleton, used to draw the overlay from landmarks-only responses
+const POSE_CONNECTIONS: [number, number][] = [
+  [0, 1], [0, 4], [1, 2], [2, 3], [3, 7], [4, 5], [5, 6], [6, 8], [9, 10],
+  [11, 12], [11, 13], [11, 23], [12, 14], [12, 24], [13, 15], [14, 16],
+  [15, 17], [15, 19], [15, 21], [16, 18], [16, 20], [16, 22], [17, 19],
+  [18, 20], [23, 24], [23, 25], [24, 26], [25, 27], [26, 28], [27, 29],
+  [27, 31], [28, 30], [28, 32], [29, 31], [30, 32],
+];
+
 export default function PoseDetectionPage() {
   const [exercises, setExercises] = useState<Exercise[]>([]);
   const [stats, setStats] = useState<PoseStats | null>(null);
@@ -51,6 +89,8 @@ export default function PoseDetectionPage() {
   const canvasRef = useRef<HTMLCanvasElement>(null);
   const wsRef = useRef<WebSocket | null>(null);
   const intervalRef = useRef<number | null>(null);
+  const frameIdRef = useRef(0);
+  const exerciseRef = useRef<string>("squat");
 
   useEffect(() => {
     fetchExercises();
@@ -123,23 +163,50 @@ export default function PoseDetectionPage() {
         
         // Connect to WebSocket
         const ws = new WebSocket("ws://127.0.0.1:8001/ws/pose");
+        ws.binaryType = "arraybuffer";
         wsRef.current = ws;
         
         ws.onopen = () => {
           console.log("WebSocket connected");
+          ws.send(JSON.stringify({
+            type: "hello",
+            protocol: "binary",
+            version: PROTOCOL_VERSION,
+            response_mode: "landmarks",
+            // Resume rep count and exercise after a reconnect (any server worker)
+            session_token: sessionStorage.getItem(SESSION_TOKEN_KEY),
+          }));
           setProcessingActive(true);
           startFrameCapture();
         };
         
         ws.onmessage = (event) => {
-          const data = JSON.parse(event.data);
+          const data = event.data instanceof ArrayBuffer
+            ? unpackAnalysis(event.data)
+            : JSON.parse(event.data);
+          if (!data) return;
           
-          if (data.type === "analysis") {
+          if (data.type === "hello") {
+            sessionStorage.setItem(SESSION_TOKEN_KEY, data.session_token);
+            if (data.resumed) {
+              // Continue the checkpointed set: its exercise and rep count
+              setRepCount(data.rep_count || 0);
+              if (data.exercise) {
+                setSelectedExercise(data.exercise);
+                exerciseRef.current = data.exercise;
+              }
+            }
+          } else if (data.type === "analysis") {
             setRepCount(data.rep_count || 0);
             setFormScore(data.form_score || 0);
             setCurrentFeedback(data.feedback || []);
             
-            // Don't display processed frame - keep smooth video
+            // Keep the smooth local video and draw the skeleton on top of it
+            drawSkeleton(data.landmarks || []);
+          } else if (data.type === "rate_hint" && data.action !== "ok") {
+            // Server measured its processing time; follow its suggested pace
+            const interval = Math.min(Math.max(data.suggested_interval_ms, 100), 2000);
+            restartFrameCapture(interval);
           } else if (data.error) {
             console.error("WebSocket error:", data.error);
             alert(data.error);
@@ -162,7 +229,15 @@ export default function PoseDetectionPage() {
     }
   };
 
-  const startFrameCapture = () => {
+  const restartFrameCapture = (intervalMs: number) => {
+    if (intervalRef.current) {
+      clearInterval(intervalRef.current);
+      intervalRef.current = null;
+    }
+    startFrameCapture(intervalMs);
+  };
+
+  const startFrameCapture = (intervalMs = 300) => {
     if (intervalRef.current) return;
     
     // Create a temporary canvas for capturing frames
@@ -181,18 +256,16 @@ export default function PoseDetectionPage() {
           // Draw current frame
           tempCtx.drawImage(video, 0, 0, tempCanvas.width, tempCanvas.height);
           
-          // Convert to base64
-          const imageData = tempCanvas.toDataURL('image/jpeg', 0.5);
-          
-          // Send to WebSocket
-          wsRef.current.send(JSON.stringify({
-            type: "frame",
-            image: imageData,
-            exercise: selectedExercise
-          }));
+          // Encode as JPEG and send raw bytes with the binary frame header
+          tempCanvas.toBlob(async (blob) => {
+            if (!blob || wsRef.current?.readyState !== WebSocket.OPEN) return;
+            const jpeg = await blob.arrayBuffer();
+            frameIdRef.current = (frameIdRef.current + 1) >>> 0;
+            wsRef.current.send(packFrame(frameIdRef.current, exerciseRef.current, jpeg));
+          }, 'image/jpeg', 0.5);
         }
       }
-    }, 300); // Send frame every 300ms (3 FPS) for analysis only
+    }, intervalMs); // 300ms (3 FPS) by default, adjusted by server rate hints
   };
 
   const stopCamera = () => {
@@ -207,6 +280,9 @@ export default function PoseDetectionPage() {
       intervalRef.current = null;
     }
     
+    // The set is over: the next start should not resume it
+    sessionStorage.removeItem(SESSION_TOKEN_KEY);
+    
     // Close WebSocket
     if (wsRef.current) {
       wsRef.current.close();
@@ -220,6 +296,7 @@ export default function PoseDetectionPage() {
       videoRef.current.srcObject = null;
     }
     
+    canvasRef.current?.getContext('2d')?.clearRect(0, 0, canvasRef.current.width, canvasRef.current.height);
     setCameraActive(false);
     setProcessingActive(false);
     setRepCount(0);
@@ -271,8 +348,36 @@ export default function PoseDetectionPage() {
     setFormScore(0);
   };
 
+  const drawSkeleton = (landmarks: number[][]) => {
+    const canvas = canvasRef.current;
+    const video = videoRef.current;
+    const ctx = canvas?.getContext('2d');
+    if (!canvas || !video || !ctx) return;
+
+    canvas.width = video.videoWidth;
+    canvas.height = video.videoHeight;
+    ctx.clearRect(0, 0, canvas.width, canvas.height);
+    if (landmarks.length === 0) return;
+
+    ctx.strokeStyle = "#00ff00";
+    ctx.fillStyle = "#00ff00";
+    ctx.lineWidth = 2;
+    for (const [a, b] of POSE_CONNECTIONS) {
+      ctx.beginPath();
+      ctx.moveTo(landmarks[a][0] * canvas.width, landmarks[a][1] * canvas.height);
+      ctx.lineTo(landmarks[b][0] * canvas.width, landmarks[b][1] * canvas.height);
+      ctx.stroke();
+    }
+    for (const [x, y] of landmarks) {
+      ctx.beginPath();
+      ctx.arc(x * canvas.width, y * canvas.height, 3, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+  };
+
   const changeExercise = (exercise: string) => {
     setSelectedExercise(exercise);
+    exerciseRef.current = exercise;
     if (wsRef.current?.readyState === WebSocket.OPEN) {
       wsRef.current.send(JSON.stringify({ 
         type: "change_exercise", 
@@ -455,6 +560,10 @@ export default function PoseDetectionPage() {
                   muted
                   className="w-full h-full object-cover"
                 />
+                <canvas
+                  ref={canvasRef}
+                  className="absolute inset-0 w-full h-full object-cover pointer-events-none"
+                />
                 
                 {!cameraActive && (
                   <div className="absolute inset-0 flex items-center justify-center bg-gray-900/80">
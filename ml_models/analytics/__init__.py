@@ -4,5 +4,7 @@ Workout analytics and progress tracking
 """
 
 from .analytics_engine import AnalyticsEngine
+from .history_store import WorkoutHistoryStore
+from .rollups import WorkoutRollup
 
-__all__ = ['AnalyticsEngine']
+__all__ = ['AnalyticsEngine', 'WorkoutHistoryStore', 'WorkoutRollup']
@@ -3,10 +3,107 @@ Analytics Engine
 Provides workout analytics, progress tracking, and goal predictions
 """
 
+import calendar
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple, Union
+
+
+def _as_frame(workouts: Union[pd.DataFrame, List[Dict]]) -> pd.DataFrame:
+    """
+    Workouts as a DataFrame with a datetime 'date' column
+
+    A DataFrame that already has parsed dates (e.g. from
+    WorkoutHistoryStore) is used as is, without copying.
+    """
+    if isinstance(workouts, pd.DataFrame):
+        df = workouts
+    else:
+        df = pd.DataFrame(workouts)
+    if 'date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['date']):
+        df = df.assign(date=pd.to_datetime(df['date']))
+    return df
+
+
+def epoch_days(dates) -> np.ndarray:
+    """Dates or datetimes as whole days since 1970-01-01 (int64)"""
+    return np.asarray(dates, dtype='datetime64[D]').astype(np.int64)
+
+
+def streak_runs(days: np.ndarray, today: int) -> Tuple[int, int]:
+    """
+    Current and longest workout streak from workout days
+    
+    One run-length pass over the sorted distinct days: a streak ends
+    wherever two neighbouring active days are more than one day apart.
+    
+    Args:
+        days: Day numbers of workouts (see epoch_days), any order, repeats allowed
+        today: Day number of today; later days are ignored
+        
+    Returns:
+        (current, longest): current counts consecutive days ending today
+    """
+    days = np.unique(days)
+    days = days[days <= today]
+    if days.size == 0:
+        return 0, 0
+    run_starts = np.flatnonzero(np.diff(days) != 1) + 1
+    lengths = np.diff(np.concatenate(([0], run_starts, [days.size])))
+    current = int(lengths[-1]) if days[-1] == today else 0
+    return current, int(lengths.max())
+
+
+def streaks_by_user(user_ids, days, today: int) -> pd.DataFrame:
+    """
+    Current and longest streak of many users in one vectorized pass
+    
+    Sorts all (user, day) pairs once, then finds run boundaries (a new
+    user or a gap of more than a day) for everyone at the same time, so
+    the cost is a sort of the input rather than a Python loop per user.
+    
+    Args:
+        user_ids: User of each entry
+        days: Day number of each entry (see epoch_days); repeats allowed
+        today: Day number of today; later days are ignored
+        
+    Returns:
+        DataFrame indexed by user_id with current_streak and longest_streak
+    """
+    user_ids = np.asarray(user_ids)
+    days = np.asarray(days, dtype=np.int64)
+    keep = days <= today
+    user_ids, days = user_ids[keep], days[keep]
+    if days.size == 0:
+        return pd.DataFrame({'current_streak': [], 'longest_streak': []},
+                            index=pd.Index([], name='user_id'), dtype=np.int64)
+    
+    order = np.lexsort((days, user_ids))
+    user_ids, days = user_ids[order], days[order]
+    distinct = np.ones(days.size, dtype=bool)
+    distinct[1:] = (user_ids[1:] != user_ids[:-1]) | (days[1:] != days[:-1])
+    user_ids, days = user_ids[distinct], days[distinct]
+    
+    # Runs of consecutive days within one user
+    new_user = np.ones(days.size, dtype=bool)
+    new_user[1:] = user_ids[1:] != user_ids[:-1]
+    new_run = new_user.copy()
+    new_run[1:] |= days[1:] != days[:-1] + 1
+    run_starts = np.flatnonzero(new_run)
+    run_ends = np.append(run_starts[1:], days.size)
+    lengths = run_ends - run_starts
+    
+    # Per user: longest run, and the last run if it ends today
+    user_first_run = np.flatnonzero(new_user[run_starts])
+    user_last_run = np.append(user_first_run[1:], run_starts.size) - 1
+    longest = np.maximum.reduceat(lengths, user_first_run)
+    current = np.where(days[run_ends[user_last_run] - 1] == today, lengths[user_last_run], 0)
+    
+    return pd.DataFrame(
+        {'current_streak': current, 'longest_streak': longest},
+        index=pd.Index(user_ids[run_starts[user_first_run]], name='user_id')
+    )
 
 
 class AnalyticsEngine:
@@ -19,20 +116,21 @@ class AnalyticsEngine:
     
     def add_workout(self, workout_data: Dict):
         """Add a workout session to history"""
-        workout_data['date'] = datetime.now().isoformat()
+        workout_data['date'] = datetime.utcnow().isoformat()
         self.workouts.append(workout_data)
     
-    def calculate_weekly_stats(self, user_workouts: List[Dict]) -> Dict:
+    def calculate_weekly_stats(self, user_workouts: Union[pd.DataFrame, List[Dict]]) -> Dict:
         """
         Calculate weekly statistics from workout history
         
         Args:
-            user_workouts: List of workout dictionaries
+            user_workouts: List of workout dictionaries or a workout DataFrame
             
         Returns:
             Dictionary with weekly stats
         """
-        if not user_workouts:
+        df = _as_frame(user_workouts)
+        if df.empty:
             return {
                 'total_workouts': 0,
                 'total_calories': 0,
@@ -42,13 +140,8 @@ class AnalyticsEngine:
                 'workout_streak': 0
             }
         
-        df = pd.DataFrame(user_workouts)
-        
-        # Convert date strings to datetime
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Filter last 7 days
-        week_ago = datetime.now() - timedelta(days=7)
+        week_ago = datetime.utcnow() - timedelta(days=7)
         df_week = df[df['date'] >= week_ago]
         
         # Calculate stats
@@ -63,25 +156,68 @@ class AnalyticsEngine:
         
         return stats
     
-    def _calculate_streak(self, df: pd.DataFrame) -> int:
-        """Calculate current workout streak in days"""
-        if df.empty:
-            return 0
+    def weekly_stats_from_rollups(self, day_buckets: List[Dict], streak: int) -> Dict:
+        """
+        Weekly statistics from daily rollup buckets
         
-        df = df.sort_values('date', ascending=False)
-        df['date_only'] = df['date'].dt.date
-        unique_dates = df['date_only'].unique()
+        Same result as calculate_weekly_stats(), but adds up at most seven
+        days of buckets instead of filtering the whole history. "This
+        week" is the last 7 calendar days, today included.
         
-        streak = 0
-        current_date = datetime.now().date()
+        Args:
+            day_buckets: Buckets of the last 7 days (see rollups.WorkoutRollup.day_buckets)
+            streak: Current workout streak in days
+            
+        Returns:
+            Dictionary with weekly stats
+        """
+        workouts = sum(bucket['workouts'] for bucket in day_buckets)
+        if not workouts:
+            return {
+                'total_workouts': 0,
+                'total_calories': 0,
+                'total_duration': 0,
+                'avg_intensity': 0,
+                'most_common_exercise': 'None',
+                'workout_streak': streak
+            }
         
-        for date in unique_dates:
-            if date == current_date or date == current_date - timedelta(days=streak):
-                streak += 1
-            else:
-                break
+        intensity_count = sum(bucket['intensity_count'] for bucket in day_buckets)
+        per_exercise = {}
+        for bucket in day_buckets:
+            per_exercise[bucket['exercise_type']] = per_exercise.get(bucket['exercise_type'], 0) + bucket['workouts']
         
-        return streak
+        return {
+            'total_workouts': workouts,
+            'total_calories': int(sum(bucket['calories_burned'] for bucket in day_buckets)),
+            'total_duration': int(sum(bucket['duration_minutes'] for bucket in day_buckets)),
+            'avg_intensity': round(sum(bucket['intensity_sum'] for bucket in day_buckets) / intensity_count, 1) if intensity_count else 0,
+            # Ties go to the alphabetically first exercise, like Series.mode()
+            'most_common_exercise': min(per_exercise, key=lambda exercise: (-per_exercise[exercise], exercise)),
+            'workout_streak': streak
+        }
+    
+    def _calculate_streak(self, df: pd.DataFrame) -> int:
+        """Calculate current workout streak in days"""
+        return self.calculate_streaks(df)['current_streak']
+    
+    def calculate_streaks(self, workouts: Union[pd.DataFrame, List[Dict]]) -> Dict:
+        """
+        Current and longest workout streak
+        
+        Args:
+            workouts: List of workout dictionaries or a workout DataFrame
+            
+        Returns:
+            Dictionary with current_streak (consecutive days ending today, UTC)
+            and longest_streak, in days
+        """
+        df = _as_frame(workouts)
+        if df.empty or 'date' not in df.columns:
+            return {'current_streak': 0, 'longest_streak': 0}
+        
+        current, longest = streak_runs(epoch_days(df['date'].dropna()), int(epoch_days(datetime.utcnow().date())))
+        return {'current_streak': current, 'longest_streak': longest}
     
     def predict_goal_achievement(self, current_progress: float, goal: float, 
                                  history: List[Dict]) -> Dict:
@@ -162,15 +298,12 @@ class AnalyticsEngine:
         """
         insights = []
         
-        workouts = user_data.get('workouts', [])
-        if not workouts:
+        df = _as_frame(user_data.get('workouts', []))
+        if df.empty:
             return ["Start tracking workouts to get personalized insights!"]
         
-        df = pd.DataFrame(workouts)
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Recent activity
-        week_ago = datetime.now() - timedelta(days=7)
+        week_ago = datetime.utcnow() - timedelta(days=7)
         recent_workouts = df[df['date'] >= week_ago]
         
         if len(recent_workouts) >= 3:
@@ -198,15 +331,16 @@ class AnalyticsEngine:
         # Rest day reminder
         if len(df) > 0:
             last_workout = df['date'].max()
-            days_since = (datetime.now() - last_workout).days
+            days_since = (datetime.utcnow() - last_workout).days
             if days_since > 2:
                 insights.append(f"💤 It's been {days_since} days since your last workout. Ready to get back?")
         
         return insights if insights else ["Keep up the good work! 💪"]
     
-    def calculate_performance_metrics(self, workouts: List[Dict]) -> Dict:
+    def calculate_performance_metrics(self, workouts: Union[pd.DataFrame, List[Dict]]) -> Dict:
         """Calculate comprehensive performance metrics"""
-        if not workouts:
+        df = _as_frame(workouts)
+        if df.empty:
             return {
                 'total_workouts': 0,
                 'total_time_minutes': 0,
@@ -217,12 +351,8 @@ class AnalyticsEngine:
                 'consistency_percentage': 0
             }
         
-        df = pd.DataFrame(workouts)
-        df['date'] = pd.to_datetime(df['date'])
-        
         # Calculate day of week distribution
-        df['day_of_week'] = df['date'].dt.day_name()
-        day_counts = df['day_of_week'].value_counts()
+        day_counts = df['date'].dt.day_name().value_counts()
         
         # Find favorite exercises
         if 'exercise_type' in df.columns:
@@ -231,7 +361,7 @@ class AnalyticsEngine:
             favorite_exercises = []
         
         # Calculate consistency (workouts in last 30 days / 30 * 100)
-        thirty_days_ago = datetime.now() - timedelta(days=30)
+        thirty_days_ago = datetime.utcnow() - timedelta(days=30)
         recent_count = len(df[df['date'] >= thirty_days_ago])
         consistency = (recent_count / 30) * 100
         
@@ -246,3 +376,46 @@ class AnalyticsEngine:
         }
         
         return metrics
+    
+    def performance_metrics_from_rollups(self, total_buckets: List[Dict], recent_workouts: int) -> Dict:
+        """
+        Performance metrics from lifetime rollup buckets
+        
+        Same result as calculate_performance_metrics(), from at most one
+        bucket per exercise and weekday instead of every workout.
+        
+        Args:
+            total_buckets: Lifetime buckets (see rollups.WorkoutRollup.total_buckets)
+            recent_workouts: Workouts in the last 30 calendar days
+            
+        Returns:
+            Dictionary with performance metrics
+        """
+        total_workouts = sum(bucket['workouts'] for bucket in total_buckets)
+        if not total_workouts:
+            return {
+                'total_workouts': 0,
+                'total_time_minutes': 0,
+                'avg_workout_duration': 0,
+                'total_calories_burned': 0,
+                'favorite_exercises': [],
+                'peak_performance_day': 'Not enough data',
+                'consistency_percentage': 0
+            }
+        
+        per_exercise = {}
+        per_weekday = {}
+        for bucket in total_buckets:
+            per_exercise[bucket['exercise_type']] = per_exercise.get(bucket['exercise_type'], 0) + bucket['workouts']
+            per_weekday[bucket['weekday']] = per_weekday.get(bucket['weekday'], 0) + bucket['workouts']
+        total_time = sum(bucket['duration_minutes'] for bucket in total_buckets)
+        
+        return {
+            'total_workouts': total_workouts,
+            'total_time_minutes': int(total_time),
+            'avg_workout_duration': round(total_time / total_workouts, 1),
+            'total_calories_burned': int(sum(bucket['calories_burned'] for bucket in total_buckets)),
+            'favorite_exercises': sorted(per_exercise, key=lambda exercise: (-per_exercise[exercise], exercise))[:3],
+            'peak_performance_day': calendar.day_name[max(per_weekday, key=per_weekday.get)],
+            'consistency_percentage': round(min(recent_workouts / 30 * 100, 100), 1)
+        }
@@ -0,0 +1,354 @@
+"""
+Workout History Store
+Keeps the workout history CSV in memory as a typed DataFrame
+"""
+
+import csv
+import io
+import os
+import queue
+import threading
+from concurrent.futures import Future
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    from rollups import WorkoutRollup, utc_today
+except ImportError:
+    from .rollups import WorkoutRollup, utc_today
+
+COLUMNS = ['date', 'exercise_type', 'duration_minutes', 'calories_burned', 'intensity', 'reps', 'sets']
+INT_COLUMNS = ['duration_minutes', 'calories_burned', 'intensity', 'reps', 'sets']
+
+
+def _parse_dates(dates: pd.Series) -> pd.Series:
+    """
+    ISO dates and datetimes as naive UTC timestamps (NaT if unparseable)
+
+    Datetimes with an offset, e.g. toISOString()'s trailing Z, are
+    converted to UTC, so they sort and compare with the naive ones.
+    """
+    return pd.to_datetime(dates, format='mixed', errors='coerce', utc=True).dt.tz_convert(None)
+
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    """Parse dates and give every column its dtype"""
+    df = df.reindex(columns=COLUMNS)
+    df['date'] = _parse_dates(df['date'])
+    df['exercise_type'] = df['exercise_type'].fillna('').astype(str)
+    for column in INT_COLUMNS:
+        df[column] = pd.to_numeric(df[column], errors='coerce').fillna(0).astype('int64')
+    return df
+
+
+def _format_dates(dates: pd.Series) -> np.ndarray:
+    """Dates back to strings: YYYY-MM-DD unless they carry a time of day"""
+    has_time = dates != dates.dt.normalize()
+    return np.where(
+        has_time,
+        dates.dt.strftime('%Y-%m-%dT%H:%M:%S'),
+        dates.dt.strftime('%Y-%m-%d')
+    )
+
+
+def _normalize_date(value) -> str:
+    """
+    A workout date in the form the log stores: naive UTC, as _format_dates() writes it
+
+    Raises:
+        ValueError: If value is not an ISO date or datetime
+    """
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid workout date: {value!r}") from None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    if parsed.time() == datetime.min.time():
+        return parsed.strftime('%Y-%m-%d')
+    return parsed.strftime('%Y-%m-%dT%H:%M:%S')
+
+
+class WorkoutHistoryStore:
+    """
+    Process-wide, typed, in-memory copy of the workout history CSV
+
+    The file is parsed once. Every access compares the file's mtime and
+    size with what was loaded (one stat call) and only re-parses when the
+    file was changed by someone else. Derived results (weekly stats,
+    insights, ...) are cached per data version with cached(), or with
+    cached_rollup() for results that daily/lifetime buckets can answer
+    without touching the full history.
+
+    The file is an append-only log with a single writer thread: append()
+    queues a row, the writer writes everything queued in one write() and
+    one fsync, then resolves each row's future. Inserts therefore cost
+    the same however long the history is, and concurrent appends can
+    neither interleave nor overwrite each other. Once compact_every rows
+    have been appended, the writer rewrites the file when it is idle:
+    rows whose date cannot be parsed (e.g. a line torn by a crash) are
+    dropped and the rest sorted by date, written to a temporary file and
+    swapped in atomically.
+
+    The DataFrame returned by frame() is shared: treat it as read-only.
+    """
+
+    def __init__(self, path: str, compact_every: int = 100000, max_batch: int = 1024):
+        """
+        Args:
+            path: Workout history CSV (created with a header on first append)
+            compact_every: Appended rows between compactions (0 disables)
+            max_batch: Most rows written per fsync
+        """
+        self.path = path
+        self.compact_every = compact_every
+        self.max_batch = max_batch
+        self._lock = threading.Lock()
+        self._df = _typed(pd.DataFrame(columns=COLUMNS))
+        self._pending = []  # typed batches already in the file but not yet in _df
+        self._rollup = WorkoutRollup()
+        self._signature = None
+        self._writing = False  # file is being changed by our writer
+        self._results = {}
+        self._queue = queue.Queue()
+        self._writer = None
+        self._checked_tail = False
+        self._since_compaction = 0
+        self.version = 0
+        self.loads = 0
+        self.appended = 0
+        self.fsyncs = 0
+        self.compactions = 0
+
+    def _stat_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _refresh(self, fold=True):
+        """
+        Bring _df up to date (caller holds the lock)
+
+        Args:
+            fold: Also merge rows appended since the last read into _df
+        """
+        if not self._writing:
+            signature = self._stat_signature()
+            if signature != self._signature:
+                # Changed outside this store: parse it again
+                if signature is None:
+                    df = pd.DataFrame(columns=COLUMNS)
+                else:
+                    df = pd.read_csv(self.path)
+                    self.loads += 1
+                self._df = _typed(df)
+                self._pending = []
+                self._rollup = WorkoutRollup.from_frame(self._df)
+                self._signature = signature
+                self._changed()
+                return
+        if fold and self._pending:
+            # One concat per read after writes, not one per appended row
+            self._df = pd.concat([self._df, *self._pending], ignore_index=True)
+            self._pending = []
+
+    def _changed(self):
+        self.version += 1
+        self._results = {}
+
+    def frame(self) -> pd.DataFrame:
+        """Current history, oldest first as stored"""
+        with self._lock:
+            self._refresh()
+            return self._df
+
+    def cached(self, name: str, compute: Callable[[pd.DataFrame], Dict]):
+        """
+        Result of compute(frame), recomputed only when the data or the day changes
+
+        Results that depend on "now" (last 7 days, streaks) roll over at
+        midnight UTC, so the current date is part of the cache key.
+
+        Args:
+            name: Cache key for this kind of result
+            compute: Function of the history DataFrame
+        """
+        with self._lock:
+            self._refresh()
+            key = (name, utc_today())
+            if key not in self._results:
+                self._results[key] = compute(self._df)
+            return self._results[key]
+
+    def cached_rollup(self, name: str, compute: Callable[[WorkoutRollup], Dict]):
+        """
+        Result of compute(rollup), recomputed only when the data or the day changes
+
+        Unlike cached(), this never folds freshly appended rows into the
+        DataFrame, so its cost does not grow with the history.
+
+        Args:
+            name: Cache key for this kind of result
+            compute: Function of the WorkoutRollup
+        """
+        with self._lock:
+            self._refresh(fold=False)
+            key = (name, 'rollup', utc_today())
+            if key not in self._results:
+                self._results[key] = compute(self._rollup)
+            return self._results[key]
+
+    def append(self, workout: Dict) -> Future:
+        """
+        Queue one workout for the log
+
+        Args:
+            workout: Dict with the COLUMNS keys
+
+        Returns:
+            Future: Resolves to None once the row is on disk and visible
+                to readers (wrap with asyncio.wrap_future() to await it)
+
+        Raises:
+            ValueError: If the date is not an ISO date or datetime (rows
+                the log could not read back are never written)
+        """
+        row = {column: workout.get(column) for column in COLUMNS}
+        row['date'] = _normalize_date(row['date'])
+        future = Future()
+        with self._lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name="workout-log-writer", daemon=True)
+                self._writer.start()
+            self._queue.put((row, future))
+        return future
+
+    def _write_loop(self):
+        """Single writer: group-commit queued rows, compact when idle"""
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._write_batch(batch)
+                    return
+                batch.append(item)
+            self._write_batch(batch)
+
+            if self.compact_every and self._since_compaction >= self.compact_every and self._queue.empty():
+                try:
+                    self.compact()
+                except Exception as e:
+                    print(f"WARNING: Workout log compaction failed: {e}")
+
+    def _write_batch(self, batch):
+        """Write and fsync a batch of rows, then publish them to readers"""
+        buffer = io.StringIO()
+        writer = csv.DictWriter(buffer, fieldnames=COLUMNS)
+        with self._lock:
+            self._refresh(fold=False)
+            new_file = self._signature is None or self._signature[1] == 0
+            self._writing = True
+        try:
+            with open(self.path, 'ab') as f:
+                if new_file:
+                    writer.writeheader()
+                elif not self._checked_tail:
+                    # A crash can leave a torn last line; never glue a row onto it
+                    with open(self.path, 'rb') as existing:
+                        existing.seek(-1, os.SEEK_END)
+                        if existing.read(1) != b'\n':
+                            buffer.write('\n')
+                self._checked_tail = True
+                for row, _ in batch:
+                    writer.writerow(row)
+                f.write(buffer.getvalue().encode())
+                f.flush()
+                os.fsync(f.fileno())
+        except Exception as e:
+            with self._lock:
+                self._writing = False
+            for _, future in batch:
+                future.set_exception(e)
+            return
+
+        typed = _typed(pd.DataFrame([row for row, _ in batch]))
+        with self._lock:
+            self._pending.append(typed)
+            self._rollup.add_frame(typed)
+            self._signature = self._stat_signature()
+            self._writing = False
+            self._changed()
+        self.fsyncs += 1
+        self.appended += len(batch)
+        self._since_compaction += len(batch)
+        for _, future in batch:
+            future.set_result(None)
+
+    def compact(self):
+        """
+        Rewrite the log from the in-memory history
+
+        Drops rows without a valid date and sorts by date. The new file is
+        fsynced before it replaces the old one, so a crash leaves either
+        file intact. Called by the writer thread; call it directly only
+        when nothing is being appended.
+        """
+        with self._lock:
+            self._refresh()
+            df = self._df
+            self._writing = True
+        try:
+            compacted = df[df['date'].notna()].sort_values('date', kind='stable').reset_index(drop=True)
+            out = compacted.copy()
+            out['date'] = _format_dates(compacted['date'])
+            temp_path = f"{self.path}.compact"
+            with open(temp_path, 'w', newline='') as f:
+                out.to_csv(f, index=False)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        finally:
+            with self._lock:
+                self._writing = False
+        with self._lock:
+            self._df = compacted
+            self._signature = self._stat_signature()
+            self._changed()
+        self._since_compaction = 0
+        self.compactions += 1
+
+    def close(self):
+        """Write everything queued and stop the writer thread"""
+        with self._lock:
+            writer, self._writer = self._writer, None
+        if writer is not None:
+            self._queue.put(None)
+            writer.join()
+
+    def records(self, limit: Optional[int] = None) -> List[Dict]:
+        """
+        Newest workouts first, as JSON-ready dicts
+
+        Dates without a time of day are returned as YYYY-MM-DD, like they
+        were logged.
+        """
+        def compute(df):
+            newest = df[df['date'].notna()].sort_values('date', ascending=False, kind='stable')
+            out = newest.copy()
+            out['date'] = _format_dates(newest['date'])
+            return out.to_dict('records')
+
+        workouts = self.cached('records', compute)
+        return workouts[:limit] if limit is not None else workouts
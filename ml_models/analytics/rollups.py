@@ -0,0 +1,117 @@
+"""
+Workout Rollups
+Daily and lifetime workout buckets, updated as workouts are logged
+"""
+
+from datetime import date, datetime, timedelta
+from typing import Dict, List
+
+import pandas as pd
+
+# Per (day, exercise_type)
+DAY_FIELDS = ('workouts', 'calories_burned', 'duration_minutes', 'intensity_sum', 'intensity_count')
+# Per (exercise_type, weekday), weekday 0 = Monday
+TOTAL_FIELDS = ('workouts', 'calories_burned', 'duration_minutes')
+
+
+def _native(value):
+    """numpy scalar to the plain Python number (JSON-serializable)"""
+    return value.item() if hasattr(value, 'item') else value
+
+
+def utc_today() -> date:
+    """
+    Today's date in UTC
+
+    Workouts are logged with UTC dates (the backend stores utcnow(), the
+    frontend sends toISOString() dates), so "today" for day buckets and
+    streaks must come from the same clock.
+    """
+    return datetime.utcnow().date()
+
+
+class WorkoutRollup:
+    """
+    One user's workouts summed into buckets
+
+    Daily buckets answer "last N days" questions by adding up at most N
+    days; lifetime buckets per exercise and weekday answer all-time ones.
+    Both are updated per logged workout, so reading them costs the same
+    however long the history is. The database keeps the same buckets in
+    tables (see backend/services/workout_records.py).
+    """
+
+    def __init__(self):
+        self.days = {}  # date -> {exercise_type: [DAY_FIELDS]}
+        self.totals = {}  # (exercise_type, weekday) -> [TOTAL_FIELDS]
+
+    def add(self, day: date, exercise_type: str, workouts: int, calories_burned: float,
+            duration_minutes: float, intensity_sum: float = 0, intensity_count: int = 0):
+        """Add workouts (already summed for one day and exercise) to the buckets"""
+        bucket = self.days.setdefault(day, {}).setdefault(exercise_type, [0, 0, 0, 0, 0])
+        for i, value in enumerate((workouts, calories_burned, duration_minutes, intensity_sum, intensity_count)):
+            bucket[i] += value
+        total = self.totals.setdefault((exercise_type, day.weekday()), [0, 0, 0])
+        for i, value in enumerate((workouts, calories_burned, duration_minutes)):
+            total[i] += value
+
+    def add_frame(self, df: pd.DataFrame):
+        """
+        Add workouts from a typed history DataFrame (see history_store.py)
+
+        Rows without a valid date are skipped.
+        """
+        df = df[df['date'].notna()]
+        if df.empty:
+            return
+        grouped = df.assign(
+            day=df['date'].dt.date,
+            intensity_count=df['intensity'].notna().astype('int64')
+        ).groupby(['day', 'exercise_type']).agg(
+            workouts=('date', 'size'),
+            calories_burned=('calories_burned', 'sum'),
+            duration_minutes=('duration_minutes', 'sum'),
+            intensity_sum=('intensity', 'sum'),
+            intensity_count=('intensity_count', 'sum')
+        )
+        for (day, exercise_type), row in zip(grouped.index, grouped.itertuples(index=False)):
+            self.add(day, exercise_type, *(_native(value) for value in row))
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'WorkoutRollup':
+        rollup = cls()
+        rollup.add_frame(df)
+        return rollup
+
+    def day_buckets(self, today: date, days: int) -> List[Dict]:
+        """
+        Daily buckets of the last `days` calendar days, today included
+
+        Returns:
+            list: Dicts with day, exercise_type and DAY_FIELDS
+        """
+        buckets = []
+        for offset in range(days):
+            day = today - timedelta(days=offset)
+            for exercise_type, values in self.days.get(day, {}).items():
+                buckets.append({'day': day, 'exercise_type': exercise_type, **dict(zip(DAY_FIELDS, values))})
+        return buckets
+
+    def total_buckets(self) -> List[Dict]:
+        """
+        Lifetime buckets
+
+        Returns:
+            list: Dicts with exercise_type, weekday and TOTAL_FIELDS
+        """
+        return [
+            {'exercise_type': exercise_type, 'weekday': weekday, **dict(zip(TOTAL_FIELDS, values))}
+            for (exercise_type, weekday), values in self.totals.items()
+        ]
+
+    def current_streak(self, today: date) -> int:
+        """Consecutive days with a workout, ending today"""
+        streak = 0
+        while today - timedelta(days=streak) in self.days:
+            streak += 1
+        return streak
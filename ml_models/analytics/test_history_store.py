@@ -0,0 +1,49 @@
+"""
+Tests for the workout history store
+
+Run from ml_models/:
+    python -m pytest analytics/test_history_store.py
+"""
+
+import pandas as pd
+import pytest
+
+from analytics.analytics_engine import AnalyticsEngine
+from analytics.history_store import WorkoutHistoryStore
+
+WORKOUT = {'exercise_type': 'squat', 'duration_minutes': 20, 'calories_burned': 150,
+           'intensity': 6, 'reps': 12, 'sets': 3}
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = WorkoutHistoryStore(str(tmp_path / 'history.csv'))
+    yield store
+    store.close()
+
+
+def test_utc_datetimes_from_the_frontend(store):
+    # toISOString() dates next to naive ones must not break sorting or comparisons
+    store.append({**WORKOUT, 'date': '2026-10-15'}).result()
+    store.append({**WORKOUT, 'date': '2026-10-16T10:00:00.000Z'}).result()
+    store.append({**WORKOUT, 'date': '2026-10-16T12:30:00+02:00'}).result()
+
+    assert [row['date'] for row in store.records()] == [
+        '2026-10-16T10:30:00', '2026-10-16T10:00:00', '2026-10-15'
+    ]
+    assert pd.api.types.is_datetime64_dtype(store.frame()['date'])
+
+    insights = AnalyticsEngine().generate_insights({'workouts': store.frame()})
+    assert insights
+
+    store.compact()
+    reopened = WorkoutHistoryStore(store.path)
+    assert [row['date'] for row in reopened.records()] == [row['date'] for row in store.records()]
+
+
+def test_unparseable_date_is_rejected(store):
+    with pytest.raises(ValueError):
+        store.append({**WORKOUT, 'date': 'garbage'})
+    with pytest.raises(ValueError):
+        store.append({**WORKOUT, 'date': None})
+    assert store.records() == []
@@ -0,0 +1,254 @@
+"""
+Pose Pipeline Benchmarks
+Micro-benchmarks for the per-frame pose detection and analysis path
+
+Usage:
+    python benchmark_pose.py detect [--image person.jpg] [--frames 200]
+    python benchmark_pose.py kinematics [--frames 20000]
+    python benchmark_pose.py roi --image person.jpg [--frames 100]
+
+Use an image or video with a person in it for representative numbers;
+without one a synthetic frame is used and only the detector stage runs.
+"""
+
+import argparse
+import time
+
+import cv2
+import numpy as np
+
+from pose_detector import PoseDetector
+from exercise_analyzer import ExerciseAnalyzer
+from kinematics import (
+    PoseLandmark, ANGLE_INDEX, JOINT_ANGLES, calculate_angle, get_landmark_coords,
+    joint_angles, landmarks_to_array, stack_landmarks, batch_joint_angles
+)
+
+
+def load_frames(image_path=None, video_path=None, width=640, height=480, count=200):
+    """
+    Load benchmark frames from an image, a video or synthetic noise
+
+    Returns:
+        list: BGR frames
+    """
+    if video_path:
+        cap = cv2.VideoCapture(video_path)
+        frames = []
+        while len(frames) < count:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        if not frames:
+            raise SystemExit(f"Could not read video: {video_path}")
+        return frames
+
+    if image_path:
+        frame = cv2.imread(image_path)
+        if frame is None:
+            raise SystemExit(f"Could not read image: {image_path}")
+    else:
+        rng = np.random.default_rng(0)
+        frame = rng.integers(0, 255, (height, width, 3), dtype=np.uint8)
+    return [frame] * count
+
+
+def time_per_frame(func, frames, warmup=5):
+    """
+    Run func on every frame and return the mean cost in milliseconds
+    """
+    for frame in frames[:warmup]:
+        func(frame.copy())
+
+    copies = [frame.copy() for frame in frames]
+    start = time.perf_counter()
+    for frame in copies:
+        func(frame)
+    return (time.perf_counter() - start) * 1000 / len(copies)
+
+
+def bench_detect(args):
+    """Double-pass (detect, then detect again to draw) vs single-pass detection"""
+    frames = load_frames(args.image, args.video, args.width, args.height, args.frames)
+    detector = PoseDetector()
+
+    def double_pass(frame):
+        detector.detect_pose(frame, draw=False)
+        detector.detect_pose(frame, draw=True)
+
+    def single_pass(frame):
+        detector.detect_pose(frame, draw=False)
+        detector.draw_landmarks(frame)
+
+    double_ms = time_per_frame(double_pass, frames)
+    detector.pose.reset()
+    single_ms = time_per_frame(single_pass, frames)
+    detector.close()
+
+    print(f"Frames: {len(frames)} at {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"  detect + detect(draw=True):  {double_ms:8.2f} ms/frame")
+    print(f"  detect + draw_landmarks:     {single_ms:8.2f} ms/frame")
+    print(f"  speedup:                     {double_ms / single_ms:8.2f}x")
+
+
+def place_on_canvas(frame, width, height, person_height=0.6):
+    """Scale a frame to `person_height` of a gray width x height canvas, like a trainee in a webcam shot"""
+    canvas = np.full((height, width, 3), 90, dtype=np.uint8)
+    scale = min(height * person_height / frame.shape[0], width * 0.9 / frame.shape[1])
+    person = cv2.resize(frame, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    ph, pw = person.shape[:2]
+    top = height - ph - height // 20
+    left = (width - pw) // 3
+    canvas[top:top + ph, left:left + pw] = person
+    return canvas
+
+
+def bench_roi(args):
+    """Full-frame inference vs person ROI tracking at common webcam resolutions"""
+    sources = load_frames(args.image, args.video, 640, 480, args.frames)
+    if not (args.image or args.video):
+        print("No --image/--video given: without a person tracking never engages, "
+              "so both columns measure the full-frame path")
+
+    print(f"{'resolution':>11}  {'full frame':>10}  {'roi':>8}  {'saved':>8}  {'roi side':>8}  "
+          f"{'no pose':>11}  landmark diff")
+    for width, height in ((640, 480), (1280, 720), (1920, 1080)):
+        frames = [place_on_canvas(frame, width, height) for frame in sources]
+        detectors = {roi: PoseDetector(roi_tracking=roi) for roi in (False, True)}
+        samples = {False: [], True: []}
+        missed = {False: 0, True: 0}
+        landmarks = {}
+
+        for detector in detectors.values():
+            for frame in frames[:5]:
+                detector.detect_pose(frame, draw=False)
+
+        # Interleave both detectors so background noise hits them equally
+        for frame in frames:
+            for roi, detector in detectors.items():
+                start = time.perf_counter()
+                _, result = detector.detect_pose(frame, draw=False)
+                samples[roi].append((time.perf_counter() - start) * 1000)
+                landmarks[roi] = result
+                missed[roi] += result is None
+
+        full_ms = float(np.median(samples[False]))
+        roi_ms = float(np.median(samples[True]))
+        diff = "n/a"
+        if landmarks[False] and landmarks[True]:
+            full = landmarks_to_array(landmarks[False])
+            tracked = landmarks_to_array(landmarks[True])
+            visible = full[:, 3] > 0.5
+            diff = f"{np.abs(full[visible, :2] - tracked[visible, :2]).mean():.4f}"
+        roi_side = detectors[True].roi[2] if detectors[True].roi else "-"
+        print(f"{width:>5}x{height:<5}  {full_ms:8.2f}ms  {roi_ms:6.2f}ms  {full_ms - roi_ms:6.2f}ms  "
+              f"{roi_side!s:>8}  {missed[False]:>4} / {missed[True]:<4}  {diff}")
+
+        for detector in detectors.values():
+            detector.close()
+
+
+def random_landmark_lists(count, seed=0):
+    """Synthetic MediaPipe NormalizedLandmarkList messages"""
+    from mediapipe.framework.formats import landmark_pb2
+
+    rng = np.random.default_rng(seed)
+    values = rng.random((count, 33, 4))
+    frames = []
+    for frame_values in values:
+        landmarks = landmark_pb2.NormalizedLandmarkList()
+        for x, y, z, visibility in frame_values:
+            landmarks.landmark.add(x=x, y=y, z=z, visibility=visibility)
+        frames.append(landmarks)
+    return frames
+
+
+def legacy_squat_angles(landmarks):
+    """Per-point path the analyzers used before: Python lists + calculate_angle"""
+    hip = get_landmark_coords(landmarks, PoseLandmark.LEFT_HIP)
+    knee = get_landmark_coords(landmarks, PoseLandmark.LEFT_KNEE)
+    ankle = get_landmark_coords(landmarks, PoseLandmark.LEFT_ANKLE)
+    shoulder = get_landmark_coords(landmarks, PoseLandmark.LEFT_SHOULDER)
+    return calculate_angle(hip, knee, ankle), calculate_angle(shoulder, hip, knee)
+
+
+def legacy_all_angles(landmarks):
+    """Per-point path for every joint angle the vectorized kernel produces (cross-check only)"""
+    return [
+        calculate_angle(*(get_landmark_coords(landmarks, index) for index in triplet))
+        for _, triplet in JOINT_ANGLES
+    ]
+
+
+def vectorized_squat_angles(landmarks):
+    """Path analyze_squat takes now: convert once, then all joint angles in one call"""
+    angles = joint_angles(landmarks_to_array(landmarks))
+    return angles[ANGLE_INDEX['left_knee']], angles[ANGLE_INDEX['left_hip']]
+
+
+def bench_kinematics(args):
+    """Per-frame squat analysis cost: old per-point angles vs the vectorized path"""
+    frames = random_landmark_lists(args.frames)
+
+    # Same angles from both paths
+    for landmarks in frames[:100]:
+        assert np.allclose(legacy_all_angles(landmarks), joint_angles(landmarks_to_array(landmarks)), atol=1e-3)
+        assert np.allclose(legacy_squat_angles(landmarks), vectorized_squat_angles(landmarks), atol=1e-3)
+
+    def per_frame_us(func):
+        start = time.perf_counter()
+        for landmarks in frames:
+            func(landmarks)
+        return (time.perf_counter() - start) * 1e6 / len(frames)
+
+    # Both produce the two angles analyze_squat needs per frame
+    legacy_us = per_frame_us(legacy_squat_angles)
+    vectorized_us = per_frame_us(vectorized_squat_angles)
+    convert_us = per_frame_us(landmarks_to_array)
+    analyzer = ExerciseAnalyzer()
+    analyze_us = per_frame_us(analyzer.analyze_squat)
+
+    print(f"Frames: {len(frames)}")
+    print(f"  squat angles, per-point (before):    {legacy_us:8.1f} us/frame")
+    print(f"  squat angles, vectorized (now):      {vectorized_us:8.1f} us/frame"
+          f"  ({convert_us:.1f} us of it converting to (33, 4))")
+    print(f"  vectorized / per-point:              {vectorized_us / legacy_us:8.2f}x")
+    print(f"  full ExerciseAnalyzer.analyze_squat: {analyze_us:8.1f} us/frame")
+
+    # Offline path: the whole session in one call, against the per-frame loop it replaces
+    tensor = stack_landmarks(frames)
+    start = time.perf_counter()
+    batch_joint_angles(tensor)
+    batch_us = (time.perf_counter() - start) * 1e6 / len(frames)
+    print(f"  batch_joint_angles over the session: {batch_us:8.2f} us/frame"
+          f"  ({legacy_us / batch_us:.0f}x faster than per-point squat angles)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    detect = subparsers.add_parser('detect', help='Single-pass vs double-pass detection')
+    detect.set_defaults(func=bench_detect)
+
+    kinematics = subparsers.add_parser('kinematics', help='Per-point vs vectorized squat angles')
+    kinematics.set_defaults(func=bench_kinematics, frames=20000)
+
+    roi = subparsers.add_parser('roi', help='Full-frame vs person ROI tracking per resolution')
+    roi.set_defaults(func=bench_roi, frames=100)
+
+    for sub in subparsers.choices.values():
+        sub.add_argument('--image', help='Image with a person in it')
+        sub.add_argument('--video', help='Video with a person in it')
+        sub.add_argument('--width', type=int, default=640)
+        sub.add_argument('--height', type=int, default=480)
+        sub.add_argument('--frames', type=int, default=sub.get_default('frames') or 200)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
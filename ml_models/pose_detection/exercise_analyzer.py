@@ -3,12 +3,10 @@ Exercise Form Analyzer
 Analyzes specific exercises and provides real-time feedback
 """
 
-import numpy as np
-import mediapipe as mp
 try:
-    from pose_detector import PoseDetector
+    from kinematics import PoseLandmark, ANGLE_INDEX, joint_angles, landmarks_to_array
 except ImportError:
-    from .pose_detector import PoseDetector
+    from .kinematics import PoseLandmark, ANGLE_INDEX, joint_angles, landmarks_to_array
 
 
 class ExerciseAnalyzer:
@@ -16,13 +14,17 @@ class ExerciseAnalyzer:
     Analyzes different exercise types and provides form correction feedback
     """
     
-    def __init__(self):
+    def __init__(self, thresholds=None):
         """
         Initialize exercise templates and thresholds
-        """
-        self.pose_detector = PoseDetector()
-        self.mp_pose = mp.solutions.pose
         
+        Only pure geometry is used here (no MediaPipe model), so creating
+        an analyzer is cheap enough to do per set.
+        
+        Args:
+            thresholds: Optional overrides merged over the defaults, e.g.
+                {'squat': {'knee_angle_down': 100}}
+        """
         # Rep counting state
         self.rep_count = 0
         self.stage = None  # "up" or "down"
@@ -31,12 +33,14 @@ class ExerciseAnalyzer:
         self.thresholds = {
             'squat': {
                 'knee_angle_down': 90,
+                'knee_angle_partial': 120,  # above this the rep counts as complete
                 'knee_angle_up': 160,
                 'back_angle_min': 160,
                 'back_angle_max': 200
             },
             'pushup': {
                 'elbow_angle_down': 90,
+                'elbow_angle_partial': 120,  # above this the rep counts as complete
                 'elbow_angle_up': 160,
                 'body_angle_min': 160,
                 'body_angle_max': 200
@@ -47,13 +51,17 @@ class ExerciseAnalyzer:
                 'min_hold_time': 5  # seconds
             }
         }
+        for exercise, overrides in (thresholds or {}).items():
+            if exercise not in self.thresholds:
+                raise ValueError(f"Unknown exercise in thresholds: {exercise}")
+            self.thresholds[exercise].update(overrides)
     
     def analyze_squat(self, landmarks):
         """
         Analyze squat form
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: MediaPipe pose landmarks or a (33, 4) landmark array
             
         Returns:
             dict: {
@@ -63,19 +71,31 @@ class ExerciseAnalyzer:
                 'stage': Current movement stage
             }
         """
-        if not landmarks:
+        if landmarks is None:
             return {'feedback': ['No pose detected'], 'score': 0, 'angles': {}, 'stage': None}
         
-        # Get joint coordinates
-        hip = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_HIP.value)
-        knee = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_KNEE.value)
-        ankle = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_ANKLE.value)
-        shoulder = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_SHOULDER.value)
-        
-        # Calculate angles
-        knee_angle = self.pose_detector.calculate_angle(hip, knee, ankle)
-        back_angle = self.pose_detector.calculate_angle(shoulder, hip, knee)
+        # Convert once, then compute all joint angles in one batched call
+        points = landmarks_to_array(landmarks)
+        angles = joint_angles(points)
+        return self.evaluate_squat(
+            float(angles[ANGLE_INDEX['left_knee']]),
+            float(angles[ANGLE_INDEX['left_hip']]),
+            points[PoseLandmark.LEFT_KNEE, 0],
+            points[PoseLandmark.LEFT_ANKLE, 0]
+        )
+    
+    def evaluate_squat(self, knee_angle, back_angle, knee_x, ankle_x):
+        """
+        Squat rules on precomputed measurements (advances rep state)
         
+        Args:
+            knee_angle: Left hip-knee-ankle angle in degrees
+            back_angle: Left shoulder-hip-knee angle in degrees
+            knee_x, ankle_x: Normalized x of the left knee and ankle
+            
+        Returns:
+            dict: Same as analyze_squat()
+        """
         feedback = []
         score_components = []
         
@@ -84,7 +104,7 @@ class ExerciseAnalyzer:
             if self.stage != "down":
                 self.stage = "down"
             score_components.append(100)
-        elif knee_angle < 120:
+        elif knee_angle < self.thresholds['squat']['knee_angle_partial']:
             score_components.append(70)
             feedback.append("Go deeper")
         else:
@@ -101,8 +121,6 @@ class ExerciseAnalyzer:
             feedback.append("Keep back straight")
         
         # Knee alignment
-        knee_x = knee[0]
-        ankle_x = ankle[0]
         if abs(knee_x - ankle_x) < 0.1:
             score_components.append(100)
         else:
@@ -110,7 +128,7 @@ class ExerciseAnalyzer:
             if knee_x > ankle_x:
                 feedback.append("Knees too forward")
         
-        final_score = int(np.mean(score_components)) if score_components else 0
+        final_score = sum(score_components) // len(score_components) if score_components else 0
         
         return {
             'feedback': feedback,
@@ -125,7 +143,7 @@ class ExerciseAnalyzer:
         Analyze push-up form
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: MediaPipe pose landmarks or a (33, 4) landmark array
             
         Returns:
             dict: {
@@ -135,20 +153,27 @@ class ExerciseAnalyzer:
                 'stage': Current movement stage
             }
         """
-        if not landmarks:
+        if landmarks is None:
             return {'feedback': ['No pose detected'], 'score': 0, 'angles': {}, 'stage': None}
         
-        # Get joint coordinates
-        shoulder = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_SHOULDER.value)
-        elbow = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_ELBOW.value)
-        wrist = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_WRIST.value)
-        hip = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_HIP.value)
-        knee = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_KNEE.value)
-        
-        # Calculate angles
-        elbow_angle = self.pose_detector.calculate_angle(shoulder, elbow, wrist)
-        body_angle = self.pose_detector.calculate_angle(shoulder, hip, knee)
+        # Convert once, then compute all joint angles in one batched call
+        angles = joint_angles(landmarks_to_array(landmarks))
+        return self.evaluate_pushup(
+            float(angles[ANGLE_INDEX['left_elbow']]),
+            float(angles[ANGLE_INDEX['left_hip']])
+        )
+    
+    def evaluate_pushup(self, elbow_angle, body_angle):
+        """
+        Push-up rules on precomputed angles (advances rep state)
         
+        Args:
+            elbow_angle: Left shoulder-elbow-wrist angle in degrees
+            body_angle: Left shoulder-hip-knee angle in degrees
+            
+        Returns:
+            dict: Same as analyze_pushup()
+        """
         feedback = []
         score_components = []
         
@@ -157,7 +182,7 @@ class ExerciseAnalyzer:
             if self.stage != "down":
                 self.stage = "down"
             score_components.append(100)
-        elif elbow_angle < 120:
+        elif elbow_angle < self.thresholds['pushup']['elbow_angle_partial']:
             score_components.append(70)
             feedback.append("Go lower")
         else:
@@ -176,7 +201,7 @@ class ExerciseAnalyzer:
             else:
                 feedback.append("Hips too high")
         
-        final_score = int(np.mean(score_components)) if score_components else 0
+        final_score = sum(score_components) // len(score_components) if score_components else 0
         
         return {
             'feedback': feedback,
@@ -191,7 +216,7 @@ class ExerciseAnalyzer:
         Analyze plank form
         
         Args:
-            landmarks: MediaPipe pose landmarks
+            landmarks: MediaPipe pose landmarks or a (33, 4) landmark array
             
         Returns:
             dict: {
@@ -200,17 +225,23 @@ class ExerciseAnalyzer:
                 'angles': Dict of joint angles
             }
         """
-        if not landmarks:
+        if landmarks is None:
             return {'feedback': ['No pose detected'], 'score': 0, 'angles': {}}
         
-        # Get joint coordinates
-        shoulder = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_SHOULDER.value)
-        hip = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_HIP.value)
-        ankle = self.pose_detector.get_landmark_coords(landmarks, self.mp_pose.PoseLandmark.LEFT_ANKLE.value)
-        
         # Calculate body alignment angle
-        body_angle = self.pose_detector.calculate_angle(shoulder, hip, ankle)
+        angles = joint_angles(landmarks_to_array(landmarks))
+        return self.evaluate_plank(float(angles[ANGLE_INDEX['left_body_line']]))
+    
+    def evaluate_plank(self, body_angle):
+        """
+        Plank rules on a precomputed angle
         
+        Args:
+            body_angle: Left shoulder-hip-ankle angle in degrees
+            
+        Returns:
+            dict: Same as analyze_plank()
+        """
         feedback = []
         score_components = []
         
@@ -224,7 +255,7 @@ class ExerciseAnalyzer:
             else:
                 feedback.append("Hips too high")
         
-        final_score = int(np.mean(score_components)) if score_components else 0
+        final_score = sum(score_components) // len(score_components) if score_components else 0
         
         return {
             'feedback': feedback,
@@ -240,3 +271,22 @@ class ExerciseAnalyzer:
     def get_rep_count(self):
         """Get current rep count"""
         return self.rep_count
+
+    def state_dict(self):
+        """
+        Rep counting state, JSON-serializable
+
+        Thresholds are configuration, not state, and are not included.
+        """
+        return {'rep_count': self.rep_count, 'stage': self.stage}
+
+    def load_state(self, state):
+        """
+        Restore rep counting state saved by state_dict()
+
+        Args:
+            state: Dict from state_dict()
+        """
+        self.rep_count = int(state.get('rep_count', 0))
+        stage = state.get('stage')
+        self.stage = stage if stage in ("up", "down") else None
@@ -0,0 +1,371 @@
+"""
+Keyframe Pose Engine
+Runs pose inference only on keyframes and extrapolates landmarks in between
+
+Usage (evaluate on recorded sessions):
+    python keyframe_engine.py recordings/*.pose [--max-step 6] [--max-shift 0.02] [--max-interval 0.5]
+
+Live, KeyframePoseDetector puts the engine in front of a PoseDetector
+(/ws/pose with POSE_KEYFRAMES, run_pose_demo.py --keyframe).
+
+The gap to the next keyframe is chosen from how fast the exercise's
+joints moved between the last two keyframes: dense during a fast squat
+descent, sparse during a plank hold. Whenever the extrapolated angle of a
+rep-counting joint comes near, or would cross, one of the analyzer's rep
+thresholds, the frame is inferred for real. Rep transitions therefore only
+ever happen on measured frames, and no bottom position is skipped.
+"""
+
+import argparse
+import time
+from collections import deque
+
+import numpy as np
+
+try:
+    from exercise_analyzer import ExerciseAnalyzer
+    from kinematics import ANGLE_INDEX, joint_angles, landmarks_to_array
+except ImportError:
+    from .exercise_analyzer import ExerciseAnalyzer
+    from .kinematics import ANGLE_INDEX, joint_angles, landmarks_to_array
+
+# Joints whose speed sets the keyframe interval
+MOTION_ANGLES = {
+    'squat': ('left_knee', 'left_hip'),
+    'pushup': ('left_elbow', 'left_hip'),
+    'plank': ('left_body_line',),
+}
+
+# Rep-counting joint and the analyzer thresholds its state machine switches on
+REP_GUARDS = {
+    'squat': ('left_knee', ('knee_angle_down', 'knee_angle_partial')),
+    'pushup': ('left_elbow', ('elbow_angle_down', 'elbow_angle_partial')),
+}
+
+
+class KeyframePoseEngine:
+    """
+    Adaptive keyframe scheduler in front of a pose model
+
+    The engine is model-agnostic: `infer` is any callable turning a frame
+    into a (33, 4) landmark array (or None when no person is found), e.g.
+    KeyframePoseEngine.from_detector(PoseDetector()).
+    """
+
+    def __init__(self, infer, exercise="squat", thresholds=None, max_angle_step=6.0, max_shift=0.02,
+                 min_interval=0.0, max_interval=0.5, guard_band=12.0):
+        """
+        Args:
+            infer: Callable frame -> (33, 4) landmark array or None
+            exercise: "squat", "pushup" or "plank"
+            thresholds: ExerciseAnalyzer threshold overrides in use
+            max_angle_step: Degrees a joint may move between keyframes
+            max_shift: Distance the body may move between keyframes, in
+                normalized image units (None disables the bound)
+            min_interval, max_interval: Bounds on the keyframe gap in seconds
+            guard_band: Degrees around a rep threshold where every frame is inferred
+        """
+        self.infer = infer
+        self.max_angle_step = max_angle_step
+        self.max_shift = max_shift
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.guard_band = guard_band
+        self.thresholds = ExerciseAnalyzer(thresholds).thresholds
+        self.set_exercise(exercise)
+
+        self.frames = 0
+        self.inferences = 0
+
+    def set_exercise(self, exercise):
+        """Switch exercise and forget keyframes"""
+        self.exercise = exercise
+        self._motion = [ANGLE_INDEX[name] for name in MOTION_ANGLES.get(exercise, ())]
+        guard = REP_GUARDS.get(exercise)
+        if guard:
+            name, keys = guard
+            self._guard_index = ANGLE_INDEX[name]
+            self._guard_values = [self.thresholds[exercise][key] for key in keys]
+        else:
+            self._guard_index = None
+            self._guard_values = []
+        self.reset()
+
+    @classmethod
+    def from_detector(cls, detector, exercise="squat", **kwargs):
+        """Engine running a PoseDetector on keyframes"""
+        def infer(frame):
+            _, landmarks = detector.detect_pose(frame, draw=False)
+            return landmarks_to_array(landmarks) if landmarks else None
+        return cls(infer, exercise, **kwargs)
+
+    def reset(self):
+        """Forget keyframes; the next frame is always inferred"""
+        self._keyframes = deque(maxlen=2)  # (t, points, angles)
+        self._next_keyframe_at = None
+
+    def _predict(self, t):
+        """Linear extrapolation from the last two keyframes"""
+        if not self._keyframes:
+            return None
+        t1, points1, _ = self._keyframes[-1]
+        if len(self._keyframes) == 1 or points1 is None:
+            return points1
+        t0, points0, _ = self._keyframes[0]
+        if points0 is None or t1 <= t0:
+            return points1
+        predicted = points1.copy()
+        predicted[:, :3] += (points1[:, :3] - points0[:, :3]) * ((t - t1) / (t1 - t0))
+        return predicted
+
+    def _near_threshold(self, predicted):
+        """True if the predicted rep angle is close to, or across, a rep threshold"""
+        if self._guard_index is None or predicted is None:
+            return False
+        predicted_angle = joint_angles(predicted)[self._guard_index]
+        last_angle = self._keyframes[-1][2][self._guard_index]
+        for threshold in self._guard_values:
+            if abs(predicted_angle - threshold) < self.guard_band:
+                return True
+            if (predicted_angle - threshold) * (last_angle - threshold) <= 0:
+                return True
+        return False
+
+    def _add_keyframe(self, t, points):
+        if points is None:
+            # Nobody in view: keep inferring every frame until someone is found
+            self._keyframes.clear()
+            self._keyframes.append((t, None, None))
+            self._next_keyframe_at = t
+            return
+
+        angles = joint_angles(points)
+        interval = self.max_interval
+        if self._keyframes and self._keyframes[-1][1] is not None and self._motion:
+            t0, points0, angles0 = self._keyframes[-1]
+            if t > t0:
+                speed = float(np.max(np.abs(angles[self._motion] - angles0[self._motion]))) / (t - t0)
+                if speed > 0:
+                    interval = self.max_angle_step / speed
+                if self.max_shift:
+                    # Walking or swaying moves every landmark without bending a
+                    # joint; the median displacement ignores single jittery points
+                    shift = float(np.median(np.hypot(*(points[:, :2] - points0[:, :2]).T))) / (t - t0)
+                    if shift > 0:
+                        interval = min(interval, self.max_shift / shift)
+        else:
+            # No velocity yet: take the next frame as the second keyframe
+            interval = self.min_interval
+        interval = min(max(interval, self.min_interval), self.max_interval)
+
+        self._keyframes.append((t, points, angles))
+        self._next_keyframe_at = t + interval
+
+    def process(self, frame, t):
+        """
+        Landmarks for one frame, inferred or extrapolated
+
+        Args:
+            frame: Whatever `infer` accepts (only used on keyframes)
+            t: Frame timestamp in seconds
+
+        Returns:
+            tuple: (landmarks (33, 4) array or None, True if inferred)
+        """
+        self.frames += 1
+        if self._keyframes and self._keyframes[-1][1] is not None and t < self._next_keyframe_at:
+            predicted = self._predict(t)
+            if not self._near_threshold(predicted):
+                return predicted, False
+
+        points = self.infer(frame)
+        self.inferences += 1
+        if points is not None:
+            points = landmarks_to_array(points)
+        self._add_keyframe(t, points)
+        return points, True
+
+
+def _landmark_list(points):
+    """(33, 4) array back to a MediaPipe NormalizedLandmarkList"""
+    from mediapipe.framework.formats import landmark_pb2
+
+    return landmark_pb2.NormalizedLandmarkList(landmark=[
+        landmark_pb2.NormalizedLandmark(x=x, y=y, z=z, visibility=visibility)
+        for x, y, z, visibility in points.tolist()
+    ])
+
+
+class KeyframePoseDetector:
+    """
+    PoseDetector stand-in that only runs the detector on keyframes
+
+    Has the detect_pose()/draw_landmarks()/reset() interface the live
+    pipelines use, so it can replace a session's detector as is. Inferred
+    frames return the detector's own landmarks; extrapolated ones are
+    converted back to a landmark list so analyzers, recorders and drawing
+    accept them unchanged.
+    """
+
+    def __init__(self, detector, exercise="squat", **engine_kwargs):
+        """
+        Args:
+            detector: The PoseDetector to run on keyframes
+            exercise: "squat", "pushup" or "plank"
+            **engine_kwargs: KeyframePoseEngine options (thresholds, max_angle_step, ...)
+        """
+        self.detector = detector
+        self.engine = KeyframePoseEngine.from_detector(detector, exercise, **engine_kwargs)
+        self.landmarks = None
+
+    def detect_pose(self, frame, draw=True, timer=None, t=None):
+        """
+        Detect or extrapolate pose landmarks in a video frame
+
+        Args:
+            frame: Input image/video frame (BGR format)
+            draw: Whether to draw landmarks on frame
+            timer: Optional stage timer; "inference" is lapped with the time
+                spent inferring or extrapolating
+            t: Frame timestamp in seconds (defaults to now)
+
+        Returns:
+            tuple: (processed_frame, landmarks)
+        """
+        points, inferred = self.engine.process(frame, time.perf_counter() if t is None else t)
+        if points is None:
+            self.landmarks = None
+        elif inferred:
+            self.landmarks = self.detector.results.pose_landmarks
+        else:
+            self.landmarks = _landmark_list(points)
+        if timer is not None:
+            timer.lap("inference")
+
+        if draw:
+            self.draw_landmarks(frame)
+        return frame, self.landmarks
+
+    def draw_landmarks(self, frame):
+        """Draw the skeleton from the last detect_pose call onto a frame"""
+        return self.detector.draw_landmarks(frame, self.landmarks) if self.landmarks else frame
+
+    def set_exercise(self, exercise):
+        """Switch the exercise whose joints and rep thresholds set the keyframes"""
+        self.engine.set_exercise(exercise)
+
+    def reset(self):
+        """Forget tracking state and keyframes"""
+        self.detector.reset()
+        self.engine.reset()
+        self.landmarks = None
+
+    def close(self):
+        """Release the detector's MediaPipe resources"""
+        self.detector.close()
+
+    def stats(self):
+        """Frames seen and frames actually inferred"""
+        return {"keyframe_frames": self.engine.frames, "keyframe_inferences": self.engine.inferences}
+
+
+def evaluate_recording(path, **engine_kwargs):
+    """
+    Replay a recording with every frame inferred vs keyframes only
+
+    The recorded landmarks stand in for the model's output, so "inferred"
+    frames return exactly what full inference produced live.
+
+    Returns:
+        dict: Frames, inference calls and rep counts for both modes
+    """
+    try:
+        from landmark_recorder import EXERCISES, open_recording
+    except ImportError:
+        from .landmark_recorder import EXERCISES, open_recording
+
+    _, records = open_recording(path)
+    landmarks = np.asarray(records['landmarks'])
+    present = np.asarray(records['present']).astype(bool)
+    timestamps = np.asarray(records['t'])
+
+    engine = KeyframePoseEngine(lambda i: landmarks[i] if present[i] else None, **engine_kwargs)
+    full_reps = 0
+    keyframe_reps = 0
+    full = keyframe = None
+    exercise = None
+    last_reps = 0
+
+    for i in range(len(records)):
+        frame_exercise = EXERCISES[records['exercise'][i]]
+        recorded_reps = int(records['reps'][i])
+        # Segment like the live session: new analyzers on exercise change or reset
+        if frame_exercise != exercise or (present[i] and recorded_reps < last_reps):
+            if full is not None:
+                full_reps += full.rep_count
+                keyframe_reps += keyframe.rep_count
+            exercise = frame_exercise
+            full = ExerciseAnalyzer(engine_kwargs.get('thresholds'))
+            keyframe = ExerciseAnalyzer(engine_kwargs.get('thresholds'))
+            engine.set_exercise(exercise)
+        if present[i]:
+            last_reps = recorded_reps
+        if exercise is None:
+            continue
+
+        analyze = f"analyze_{exercise}"
+        if present[i]:
+            getattr(full, analyze)(landmarks[i])
+        points, _ = engine.process(i, float(timestamps[i]))
+        if points is not None:
+            getattr(keyframe, analyze)(points)
+
+    if full is not None:
+        full_reps += full.rep_count
+        keyframe_reps += keyframe.rep_count
+
+    return {
+        'frames': len(records),
+        'full_inferences': len(records),
+        'keyframe_inferences': engine.inferences,
+        'full_reps': full_reps,
+        'keyframe_reps': keyframe_reps
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('recordings', nargs='+', help='Recordings from LandmarkRecorder')
+    parser.add_argument('--max-step', type=float, default=6.0, help='Degrees a joint may move between keyframes')
+    parser.add_argument('--max-shift', type=float, default=0.02,
+                        help='Body movement between keyframes, in normalized image units (0 disables)')
+    parser.add_argument('--max-interval', type=float, default=0.5, help='Longest keyframe gap in seconds')
+    parser.add_argument('--guard', type=float, default=12.0, help='Guard band around rep thresholds in degrees')
+    args = parser.parse_args()
+
+    print(f"{'session':<28} {'frames':>7} {'inferred':>9} {'saved':>7} {'reps full':>10} {'reps kf':>8} "
+          f"{'inf/rep full':>13} {'inf/rep kf':>11}")
+    totals = {'frames': 0, 'full_inferences': 0, 'keyframe_inferences': 0, 'full_reps': 0, 'keyframe_reps': 0}
+    for path in args.recordings:
+        result = evaluate_recording(
+            path, max_angle_step=args.max_step, max_shift=args.max_shift, max_interval=args.max_interval,
+            guard_band=args.guard
+        )
+        for key in totals:
+            totals[key] += result[key]
+        _print_row(path.rsplit('/', 1)[-1], result)
+    if len(args.recordings) > 1:
+        _print_row('TOTAL', totals)
+
+
+def _print_row(name, result):
+    saved = 1 - result['keyframe_inferences'] / max(result['full_inferences'], 1)
+    per_rep_full = result['full_inferences'] / result['full_reps'] if result['full_reps'] else float('nan')
+    per_rep_kf = result['keyframe_inferences'] / result['keyframe_reps'] if result['keyframe_reps'] else float('nan')
+    flag = "" if result['full_reps'] == result['keyframe_reps'] else "  REP MISMATCH"
+    print(f"{name:<28} {result['frames']:>7} {result['keyframe_inferences']:>9} {saved:>6.0%} "
+          f"{result['full_reps']:>10} {result['keyframe_reps']:>8} {per_rep_full:>13.1f} {per_rep_kf:>11.1f}{flag}")
+
+
+if __name__ == "__main__":
+    main()
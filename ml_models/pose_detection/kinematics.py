@@ -0,0 +1,221 @@
+"""
+Pose Kinematics
+Model-free geometry helpers for pose landmarks (joint angles, coordinates)
+
+Nothing here imports MediaPipe or loads a model, so analyzers built on
+these helpers are cheap to create. Landmarks are converted once per frame
+into a (33, 4) float32 array of [x, y, z, visibility] and every joint
+angle the analyzers need is computed from it in one vectorized call.
+"""
+
+from enum import IntEnum
+
+import numpy as np
+
+
+class PoseLandmark(IntEnum):
+    """
+    Indices of the 33 MediaPipe Pose landmarks
+    (same values as mediapipe.solutions.pose.PoseLandmark)
+    """
+    NOSE = 0
+    LEFT_EYE_INNER = 1
+    LEFT_EYE = 2
+    LEFT_EYE_OUTER = 3
+    RIGHT_EYE_INNER = 4
+    RIGHT_EYE = 5
+    RIGHT_EYE_OUTER = 6
+    LEFT_EAR = 7
+    RIGHT_EAR = 8
+    MOUTH_LEFT = 9
+    MOUTH_RIGHT = 10
+    LEFT_SHOULDER = 11
+    RIGHT_SHOULDER = 12
+    LEFT_ELBOW = 13
+    RIGHT_ELBOW = 14
+    LEFT_WRIST = 15
+    RIGHT_WRIST = 16
+    LEFT_PINKY = 17
+    RIGHT_PINKY = 18
+    LEFT_INDEX = 19
+    RIGHT_INDEX = 20
+    LEFT_THUMB = 21
+    RIGHT_THUMB = 22
+    LEFT_HIP = 23
+    RIGHT_HIP = 24
+    LEFT_KNEE = 25
+    RIGHT_KNEE = 26
+    LEFT_ANKLE = 27
+    RIGHT_ANKLE = 28
+    LEFT_HEEL = 29
+    RIGHT_HEEL = 30
+    LEFT_FOOT_INDEX = 31
+    RIGHT_FOOT_INDEX = 32
+
+
+NUM_LANDMARKS = len(PoseLandmark)
+
+# Joint angles used by the exercise analyzers: name -> (a, vertex, c)
+JOINT_ANGLES = (
+    ('left_knee', (PoseLandmark.LEFT_HIP, PoseLandmark.LEFT_KNEE, PoseLandmark.LEFT_ANKLE)),
+    ('right_knee', (PoseLandmark.RIGHT_HIP, PoseLandmark.RIGHT_KNEE, PoseLandmark.RIGHT_ANKLE)),
+    ('left_hip', (PoseLandmark.LEFT_SHOULDER, PoseLandmark.LEFT_HIP, PoseLandmark.LEFT_KNEE)),
+    ('right_hip', (PoseLandmark.RIGHT_SHOULDER, PoseLandmark.RIGHT_HIP, PoseLandmark.RIGHT_KNEE)),
+    ('left_elbow', (PoseLandmark.LEFT_SHOULDER, PoseLandmark.LEFT_ELBOW, PoseLandmark.LEFT_WRIST)),
+    ('right_elbow', (PoseLandmark.RIGHT_SHOULDER, PoseLandmark.RIGHT_ELBOW, PoseLandmark.RIGHT_WRIST)),
+    ('left_body_line', (PoseLandmark.LEFT_SHOULDER, PoseLandmark.LEFT_HIP, PoseLandmark.LEFT_ANKLE)),
+    ('right_body_line', (PoseLandmark.RIGHT_SHOULDER, PoseLandmark.RIGHT_HIP, PoseLandmark.RIGHT_ANKLE)),
+)
+
+ANGLE_NAMES = tuple(name for name, _ in JOINT_ANGLES)
+ANGLE_INDEX = {name: i for i, name in enumerate(ANGLE_NAMES)}
+
+_TRIPLETS = np.array([triplet for _, triplet in JOINT_ANGLES], dtype=np.intp)
+_ENDS = _TRIPLETS[:, [0, 2]]
+_VERTICES = _TRIPLETS[:, 1:2]
+
+
+def calculate_angle(point1, point2, point3):
+    """
+    Calculate angle between three points (for joint angles)
+
+    Args:
+        point1, point2, point3: Coordinates [x, y] of the three points
+
+    Returns:
+        Angle in degrees (0-180) at point2
+    """
+    point1 = np.array(point1)
+    point2 = np.array(point2)
+    point3 = np.array(point3)
+
+    # Calculate vectors
+    radians = np.arctan2(point3[1] - point2[1], point3[0] - point2[0]) - \
+              np.arctan2(point1[1] - point2[1], point1[0] - point2[0])
+
+    angle = np.abs(radians * 180.0 / np.pi)
+
+    if angle > 180.0:
+        angle = 360 - angle
+
+    return angle
+
+
+def get_landmark_coords(landmarks, landmark_id):
+    """
+    Extract x, y coordinates for a specific landmark
+
+    Args:
+        landmarks: MediaPipe pose landmarks
+        landmark_id: Landmark index (int or PoseLandmark)
+
+    Returns:
+        list: [x, y] coordinates
+    """
+    landmark = landmarks.landmark[landmark_id]
+    return [landmark.x, landmark.y]
+
+
+def get_visibility(landmarks, landmark_id):
+    """
+    Get visibility score for a landmark
+
+    Args:
+        landmarks: MediaPipe pose landmarks
+        landmark_id: Landmark index (int or PoseLandmark)
+
+    Returns:
+        float: Visibility score (0-1)
+    """
+    return landmarks.landmark[landmark_id].visibility
+
+
+def landmarks_to_array(landmarks):
+    """
+    Convert pose landmarks to a (33, 4) float32 array
+
+    Args:
+        landmarks: MediaPipe pose landmarks, or an array already in this layout
+
+    Returns:
+        np.ndarray: Rows of [x, y, z, visibility] indexed by PoseLandmark
+    """
+    if isinstance(landmarks, np.ndarray):
+        return landmarks.astype(np.float32, copy=False)
+
+    return np.array(
+        [(lm.x, lm.y, lm.z, lm.visibility) for lm in landmarks.landmark],
+        dtype=np.float32
+    )
+
+
+def joint_angles(points):
+    """
+    Compute every angle in JOINT_ANGLES in one vectorized pass
+
+    Same math as calculate_angle(): the direction of both limb vectors
+    from the vertex, with their difference folded into 0-180 degrees.
+
+    Args:
+        points: Landmark array of shape (..., 33, >=2)
+
+    Returns:
+        np.ndarray: Angles in degrees (0-180) of shape (..., len(JOINT_ANGLES)),
+        ordered like ANGLE_NAMES
+    """
+    xy = points[..., :2]
+    limbs = xy[..., _ENDS, :] - xy[..., _VERTICES, :]
+    directions = np.arctan2(limbs[..., 1], limbs[..., 0])
+    radians = np.abs(directions[..., 1] - directions[..., 0])
+    return np.degrees(np.minimum(radians, 2 * np.pi - radians))
+
+
+def stack_landmarks(frames):
+    """
+    Stack a landmark sequence into an (N_frames, 33, 4) float32 tensor
+
+    Args:
+        frames: Iterable of MediaPipe pose landmarks, (33, 4) arrays or None
+            (frames without a detected pose)
+
+    Returns:
+        np.ndarray: Tensor where frames without a pose are NaN with zero visibility
+    """
+    frames = list(frames)
+    tensor = np.full((len(frames), NUM_LANDMARKS, 4), np.nan, dtype=np.float32)
+    tensor[..., 3] = 0.0
+    for i, landmarks in enumerate(frames):
+        if landmarks is not None:
+            tensor[i] = landmarks_to_array(landmarks)
+    return tensor
+
+
+def batch_joint_angles(landmarks, min_visibility=0.5):
+    """
+    Joint angles and visibility masks for a whole landmark time series
+
+    Uses the same JOINT_ANGLES definitions and kernel as the real-time
+    analyzers, so offline and live analysis agree.
+
+    Args:
+        landmarks: (N_frames, 33, 4) tensor of [x, y, z, visibility]
+        min_visibility: Visibility every landmark of a joint must exceed
+            for that angle to count as visible
+
+    Returns:
+        tuple: (angles, visible) where angles is (N_frames, N_angles) in
+        degrees ordered like ANGLE_NAMES and visible is a boolean mask of
+        the same shape
+    """
+    landmarks = np.asarray(landmarks, dtype=np.float32)
+    if landmarks.ndim != 3 or landmarks.shape[1:] != (NUM_LANDMARKS, 4):
+        raise ValueError(
+            f"Expected landmarks of shape (N_frames, {NUM_LANDMARKS}, 4), got {landmarks.shape}"
+        )
+
+    angles = joint_angles(landmarks)
+
+    # A joint is visible when all three of its landmarks are
+    joint_visibility = landmarks[:, _TRIPLETS, 3].min(axis=-1)
+    visible = (joint_visibility > min_visibility) & ~np.isnan(angles)
+    return angles, visible
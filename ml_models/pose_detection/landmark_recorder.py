@@ -0,0 +1,224 @@
+"""
+Landmark Session Recorder
+Compact, append-only recordings of pose landmarks and analyzer output
+
+File layout (little-endian):
+    64-byte header: magic b"POSEREC1", format version (u2), record size (u2),
+        landmarks per frame (u2), started at (unix time, f8), zero padding
+    Fixed-size records of RECORD_DTYPE, one per analyzed frame
+
+Because every record has the same size, a recording is replayed by
+memory-mapping it as a numpy structured array (see open_recording()), with
+no parsing and no copy. A record cut short by a crash is simply ignored.
+
+Writes never happen on the caller's thread: records are filled into a
+preallocated batch and full batches are handed to a background writer.
+"""
+
+import os
+import queue
+import struct
+import threading
+import time
+
+import numpy as np
+
+try:
+    from kinematics import NUM_LANDMARKS, landmarks_to_array
+except ImportError:
+    from .kinematics import NUM_LANDMARKS, landmarks_to_array
+
+MAGIC = b"POSEREC1"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<8sHHHd")
+HEADER_SIZE = 64
+
+RECORD_DTYPE = np.dtype([
+    ('t', '<f8'),                                 # unix time of the frame
+    ('landmarks', '<f4', (NUM_LANDMARKS, 4)),     # x, y, z, visibility (NaN when no pose)
+    ('reps', '<u2'),
+    ('exercise', 'u1'),                           # index into EXERCISES
+    ('stage', 'u1'),                              # index into STAGES
+    ('score', 'u1'),
+    ('present', 'u1'),                            # 1 when a pose was detected
+    ('_pad', 'u1', (2,)),
+    ('feedback', '<u4'),                          # bitmask over FEEDBACK_MESSAGES
+])
+
+EXERCISES = (None, "squat", "pushup", "plank")
+STAGES = (None, "up", "down")
+
+# Every message the analyzers emit; anything else sets FEEDBACK_OTHER
+FEEDBACK_MESSAGES = (
+    "No pose detected",
+    "Go deeper",
+    "Keep back straight",
+    "Knees too forward",
+    "Go lower",
+    "Hips too low",
+    "Hips too high",
+)
+FEEDBACK_OTHER = 1 << 31
+
+_EXERCISE_CODES = {name: code for code, name in enumerate(EXERCISES)}
+_STAGE_CODES = {name: code for code, name in enumerate(STAGES)}
+_FEEDBACK_BITS = {message: 1 << bit for bit, message in enumerate(FEEDBACK_MESSAGES)}
+
+
+def encode_feedback(messages):
+    """Pack feedback messages into a FEEDBACK_MESSAGES bitmask"""
+    mask = 0
+    for message in messages:
+        mask |= _FEEDBACK_BITS.get(message, FEEDBACK_OTHER)
+    return mask
+
+
+def decode_feedback(mask):
+    """
+    Unpack a feedback bitmask
+
+    Returns:
+        list: Messages in FEEDBACK_MESSAGES order
+    """
+    mask = int(mask)
+    return [message for message, bit in _FEEDBACK_BITS.items() if mask & bit]
+
+
+class LandmarkRecorder:
+    """
+    Buffered, append-only writer for one session's landmark stream
+
+    record() only copies the frame into a preallocated batch (~15 us,
+    mostly landmark conversion); file I/O runs on a background thread. If the disk falls
+    behind, whole batches are dropped and counted rather than stalling the
+    live loop.
+    """
+
+    def __init__(self, path, batch_size=64, max_pending_batches=32):
+        """
+        Args:
+            path: Recording file (appended to if it already exists)
+            batch_size: Records per write
+            max_pending_batches: Batches that may wait for the writer before
+                new ones are dropped
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.records = 0
+        self.dropped = 0
+        self._batch = np.zeros(batch_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        self._pending = queue.Queue(maxsize=max_pending_batches)
+        self._closed = False
+        self._writer = threading.Thread(
+            target=self._write_loop, name="landmark-recorder", daemon=True
+        )
+        self._writer.start()
+
+    def record(self, landmarks, exercise=None, analysis=None, timestamp=None):
+        """
+        Append one frame
+
+        Args:
+            landmarks: MediaPipe pose landmarks, a (33, 4) array, or None
+            exercise: Exercise name the frame was analyzed as
+            analysis: Analyzer result dict ('reps', 'score', 'stage', 'feedback')
+            timestamp: Unix time of the frame (defaults to now)
+        """
+        if self._closed:
+            return
+
+        i = self._count
+        batch = self._batch
+        batch['t'][i] = time.time() if timestamp is None else timestamp
+        if landmarks is None:
+            batch['landmarks'][i] = np.nan
+            batch['present'][i] = 0
+        else:
+            batch['landmarks'][i] = landmarks_to_array(landmarks)
+            batch['present'][i] = 1
+        batch['exercise'][i] = _EXERCISE_CODES.get(exercise, 0)
+
+        analysis = analysis or {}
+        batch['reps'][i] = min(analysis.get('reps', 0), 0xFFFF)
+        batch['score'][i] = min(max(int(analysis.get('score', 0)), 0), 255)
+        batch['stage'][i] = _STAGE_CODES.get(analysis.get('stage'), 0)
+        batch['feedback'][i] = encode_feedback(analysis.get('feedback', ()))
+
+        self._count += 1
+        self.records += 1
+        if self._count == self.batch_size:
+            self._submit()
+
+    def _submit(self):
+        batch, count = self._batch, self._count
+        self._batch = np.zeros(self.batch_size, dtype=RECORD_DTYPE)
+        self._count = 0
+        try:
+            self._pending.put_nowait(batch[:count])
+        except queue.Full:
+            self.dropped += count
+
+    def flush(self):
+        """Hand the partially filled batch to the writer"""
+        if self._count:
+            self._submit()
+
+    def close(self):
+        """Flush, wait for the writer to finish and close the file"""
+        if self._closed:
+            return
+        self.flush()
+        self._closed = True
+        self._pending.put(None)
+        self._writer.join()
+
+    def _write_loop(self):
+        with open(self.path, "ab") as out:
+            if out.tell() == 0:
+                out.write(HEADER.pack(
+                    MAGIC, FORMAT_VERSION, RECORD_DTYPE.itemsize, NUM_LANDMARKS, time.time()
+                ).ljust(HEADER_SIZE, b"\0"))
+            while True:
+                batch = self._pending.get()
+                if batch is None:
+                    return
+                out.write(batch.tobytes())
+                out.flush()
+
+
+def open_recording(path):
+    """
+    Memory-map a recording for zero-copy replay
+
+    Args:
+        path: Recording file written by LandmarkRecorder
+
+    Returns:
+        tuple: (header dict, records) where records is a read-only
+        np.memmap of RECORD_DTYPE; records['landmarks'] is an
+        (N_frames, 33, 4) view that batch_joint_angles() accepts directly
+
+    Raises:
+        ValueError: If the file is not a compatible recording
+    """
+    with open(path, "rb") as f:
+        raw = f.read(HEADER_SIZE)
+    if len(raw) < HEADER_SIZE:
+        raise ValueError(f"Not a landmark recording (truncated header): {path}")
+
+    magic, version, record_size, landmark_count, started_at = HEADER.unpack_from(raw)
+    if magic != MAGIC:
+        raise ValueError(f"Not a landmark recording: {path}")
+    if version != FORMAT_VERSION or record_size != RECORD_DTYPE.itemsize or landmark_count != NUM_LANDMARKS:
+        raise ValueError(
+            f"Unsupported recording format (version {version}, record size {record_size}): {path}"
+        )
+
+    # Ignore a trailing partial record from an interrupted write
+    count = (os.path.getsize(path) - HEADER_SIZE) // record_size
+    header = {'version': version, 'started_at': started_at, 'frames': count}
+    if count == 0:
+        return header, np.zeros(0, dtype=RECORD_DTYPE)
+    records = np.memmap(path, dtype=RECORD_DTYPE, mode='r', offset=HEADER_SIZE, shape=(count,))
+    return header, records
@@ -6,6 +6,10 @@ Uses MediaPipe for real-time human pose estimation and exercise form analysis
 import cv2
 import mediapipe as mp
 import numpy as np
+try:
+    from kinematics import calculate_angle, get_landmark_coords, get_visibility, landmarks_to_array
+except ImportError:
+    from .kinematics import calculate_angle, get_landmark_coords, get_visibility, landmarks_to_array
 
 
 class PoseDetector:
@@ -13,103 +17,193 @@ class PoseDetector:
     Real-time pose detection and analysis for fitness exercises
     """
     
-    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5):
+    def __init__(self, min_detection_confidence=0.5, min_tracking_confidence=0.5, model_complexity=1,
+                 roi_tracking=False, roi_margin=0.25, roi_input_size=256):
         """
         Initialize MediaPipe Pose detector
         
         Args:
             min_detection_confidence: Minimum confidence for person detection
             min_tracking_confidence: Minimum confidence for pose tracking
+            model_complexity: Pose landmark model (0=lite, 1=full, 2=heavy)
+            roi_tracking: Crop each frame to the person found in the previous
+                frame before color conversion and inference. Experimental:
+                benchmark_pose.py roi shows no latency win beyond run-to-run
+                noise up to 1080p, and a frame where the person leaves the
+                crop returns no landmarks
+            roi_margin: Margin around the person's box, as a fraction of its size
+            roi_input_size: Side in pixels the square crop is resized to
+                (the landmark model's input size)
         """
         self.mp_pose = mp.solutions.pose
         self.mp_drawing = mp.solutions.drawing_utils
         self.pose = self.mp_pose.Pose(
+            model_complexity=model_complexity,
             min_detection_confidence=min_detection_confidence,
             min_tracking_confidence=min_tracking_confidence,
             smooth_landmarks=True
         )
         self.results = None
+        
+        # Person ROI tracking state: square (x, y, side) in full-frame pixels
+        self.roi_tracking = roi_tracking
+        self.roi_margin = roi_margin
+        self.roi_input_size = roi_input_size
+        self.roi = None
     
-    def detect_pose(self, frame, draw=True):
+    def detect_pose(self, frame, draw=True, timer=None):
         """
         Detect pose landmarks in a video frame
         
         Args:
             frame: Input image/video frame (BGR format)
             draw: Whether to draw landmarks on frame
+            timer: Optional stage timer; its lap() is called with
+                "cvt_color" and "inference" after each step
             
         Returns:
             tuple: (processed_frame, landmarks)
         """
-        # Convert BGR to RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        if self.roi_tracking and self.roi is not None:
+            # One inference per frame: if the person left the crop, this
+            # frame has no pose and the next frame searches the whole image
+            self._detect_in_roi(frame, timer)
+            if self.results.pose_landmarks is None:
+                self.roi = None
+        else:
+            # Convert BGR to RGB
+            rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            if timer is not None:
+                timer.lap("cvt_color")
+            
+            # Process with MediaPipe
+            self.results = self.pose.process(rgb_frame)
+            if timer is not None:
+                timer.lap("inference")
         
-        # Process with MediaPipe
-        self.results = self.pose.process(rgb_frame)
+        if self.roi_tracking and self.results.pose_landmarks:
+            self._update_roi(self.results.pose_landmarks, frame.shape[1], frame.shape[0])
         
         # Draw landmarks if requested
-        if draw and self.results.pose_landmarks:
-            self.mp_drawing.draw_landmarks(
-                frame,
-                self.results.pose_landmarks,
-                self.mp_pose.POSE_CONNECTIONS,
-                self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
-                self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2)
-            )
+        if draw:
+            self.draw_landmarks(frame)
         
         return frame, self.results.pose_landmarks
     
-    def calculate_angle(self, point1, point2, point3):
+    def _detect_in_roi(self, frame, timer=None):
         """
-        Calculate angle between three points (for joint angles)
+        Run inference on the tracked crop and map landmarks to the full frame
         
-        Args:
-            point1, point2, point3: Coordinates [x, y] of the three points
-            
-        Returns:
-            Angle in degrees (0-180)
+        The crop is resized to a fixed square before color conversion, so
+        both steps and the model's own preprocessing work on a small image.
+        """
+        x, y, side = self.roi
+        height, width = frame.shape[:2]
+        crop = cv2.resize(
+            frame[y:y + side, x:x + side],
+            (self.roi_input_size, self.roi_input_size),
+            interpolation=cv2.INTER_LINEAR
+        )
+        rgb_crop = cv2.cvtColor(crop, cv2.COLOR_BGR2RGB)
+        if timer is not None:
+            timer.lap("cvt_color")
+        
+        self.results = self.pose.process(rgb_crop)
+        if timer is not None:
+            timer.lap("inference")
+        
+        if self.results.pose_landmarks:
+            scale_x = side / width
+            scale_y = side / height
+            offset_x = x / width
+            offset_y = y / height
+            for landmark in self.results.pose_landmarks.landmark:
+                landmark.x = offset_x + landmark.x * scale_x
+                landmark.y = offset_y + landmark.y * scale_y
+                landmark.z *= scale_x
+    
+    def _update_roi(self, landmarks, width, height):
         """
-        point1 = np.array(point1)
-        point2 = np.array(point2)
-        point3 = np.array(point3)
+        Derive the next crop from this frame's landmarks
         
-        # Calculate vectors
-        radians = np.arctan2(point3[1] - point2[1], point3[0] - point2[0]) - \
-                  np.arctan2(point1[1] - point2[1], point1[0] - point2[0])
+        The crop only moves when the person gets close to its edge or has
+        become much smaller than it: every move shifts the image the model's
+        own tracking and smoothing work on.
+        """
+        points = landmarks_to_array(landmarks)
+        visible = points[points[:, 3] > 0.5]
+        if len(visible) < 4:
+            visible = points
+        xs = np.clip(visible[:, 0], 0.0, 1.0) * width
+        ys = np.clip(visible[:, 1], 0.0, 1.0) * height
+        left, right, top, bottom = xs.min(), xs.max(), ys.min(), ys.max()
         
-        angle = np.abs(radians * 180.0 / np.pi)
+        if self.roi is not None:
+            x, y, side = self.roi
+            inner = side * self.roi_margin * 0.4
+            fits = (left >= x + inner and right <= x + side - inner and
+                    top >= y + inner and bottom <= y + side - inner)
+            if fits and max(right - left, bottom - top) > side * 0.4:
+                return
         
-        if angle > 180.0:
-            angle = 360 - angle
+        # Square box around the person with margin, kept inside the frame
+        side = int(max(right - left, bottom - top) * (1 + 2 * self.roi_margin))
+        side = min(max(side, self.roi_input_size), width, height)
+        x = int(min(max((left + right) / 2 - side / 2, 0), width - side))
+        y = int(min(max((top + bottom) / 2 - side / 2, 0), height - side))
         
-        return angle
+        # Ignore small corrections (e.g. a person taller than the crop allows)
+        if self.roi is not None:
+            tolerance = self.roi[2] * 0.05
+            if all(abs(new - old) <= tolerance for new, old in zip((x, y, side), self.roi)):
+                return
+        self.roi = (x, y, side)
     
-    def get_landmark_coords(self, landmarks, landmark_id):
+    def draw_landmarks(self, frame, landmarks=None):
         """
-        Extract x, y coordinates for a specific landmark
+        Draw the skeleton from the last detect_pose call onto a frame
+        
+        Reuses the cached self.results, so no inference is run and the
+        MediaPipe tracking state is not advanced.
         
         Args:
-            landmarks: MediaPipe pose landmarks
-            landmark_id: Landmark enum value
+            frame: Image to draw on (BGR format, modified in place)
+            landmarks: Landmarks to draw instead of the cached results
+                (e.g. extrapolated by KeyframePoseDetector)
             
         Returns:
-            list: [x, y] coordinates
+            The same frame, for convenience
+        """
+        if landmarks is None and self.results is not None:
+            landmarks = self.results.pose_landmarks
+        if landmarks:
+            self.mp_drawing.draw_landmarks(
+                frame,
+                landmarks,
+                self.mp_pose.POSE_CONNECTIONS,
+                self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2, circle_radius=3),
+                self.mp_drawing.DrawingSpec(color=(0, 255, 0), thickness=2)
+            )
+        
+        return frame
+    
+    def calculate_angle(self, point1, point2, point3):
+        """
+        Calculate angle between three points (see kinematics.calculate_angle)
         """
-        landmark = landmarks.landmark[landmark_id]
-        return [landmark.x, landmark.y]
+        return calculate_angle(point1, point2, point3)
+    
+    def get_landmark_coords(self, landmarks, landmark_id):
+        """
+        Extract [x, y] for a landmark (see kinematics.get_landmark_coords)
+        """
+        return get_landmark_coords(landmarks, landmark_id)
     
     def get_visibility(self, landmarks, landmark_id):
         """
-        Get visibility score for a landmark
-        
-        Args:
-            landmarks: MediaPipe pose landmarks
-            landmark_id: Landmark enum value
-            
-        Returns:
-            float: Visibility score (0-1)
+        Get visibility score for a landmark (see kinematics.get_visibility)
         """
-        return landmarks.landmark[landmark_id].visibility
+        return get_visibility(landmarks, landmark_id)
     
     def is_body_visible(self, landmarks, min_visibility=0.5):
         """
@@ -142,6 +236,27 @@ class PoseDetector:
         
         return visible_count >= 4  # At least 4 key points visible
     
+    def reset(self):
+        """
+        Forget tracking state from previous frames
+        
+        The next detect_pose call starts with fresh person detection, as if
+        the detector had just been created.
+        """
+        self.pose.reset()
+        self.results = None
+        self.roi = None
+    
+    def warm_up(self, width=640, height=480):
+        """
+        Run one blank frame so the first real frame does not pay graph start-up
+        
+        Args:
+            width, height: Size of the blank frame
+        """
+        self.detect_pose(np.zeros((height, width, 3), dtype=np.uint8), draw=False)
+        self.results = None
+    
     def close(self):
         """Release MediaPipe resources"""
         self.pose.close()
@@ -0,0 +1,312 @@
+"""
+Session Replay
+Re-score recorded sessions against new analyzer thresholds without MediaPipe
+
+Usage:
+    python replay.py compare recordings/*.pose --set squat.knee_angle_down=100
+    python replay.py sweep recordings/*.pose --exercise squat \\
+        --grid knee_angle_down=80,90,100 --grid back_angle_min=150,160,170
+
+Recordings come from LandmarkRecorder. Joint angles for a whole recording
+are computed once with batch_joint_angles(); each threshold set then only
+runs the analyzer's evaluate_* rules over those precomputed values.
+"""
+
+import argparse
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+try:
+    from exercise_analyzer import ExerciseAnalyzer
+    from kinematics import PoseLandmark, ANGLE_INDEX, batch_joint_angles
+    from landmark_recorder import EXERCISES, open_recording
+except ImportError:
+    from .exercise_analyzer import ExerciseAnalyzer
+    from .kinematics import PoseLandmark, ANGLE_INDEX, batch_joint_angles
+    from .landmark_recorder import EXERCISES, open_recording
+
+
+def _evaluate_columns(angles, landmarks):
+    """Per-exercise arguments of ExerciseAnalyzer.evaluate_<exercise>, one column each"""
+    return {
+        'squat': (
+            angles[:, ANGLE_INDEX['left_knee']],
+            angles[:, ANGLE_INDEX['left_hip']],
+            landmarks[:, PoseLandmark.LEFT_KNEE, 0],
+            landmarks[:, PoseLandmark.LEFT_ANKLE, 0],
+        ),
+        'pushup': (
+            angles[:, ANGLE_INDEX['left_elbow']],
+            angles[:, ANGLE_INDEX['left_hip']],
+        ),
+        'plank': (
+            angles[:, ANGLE_INDEX['left_body_line']],
+        ),
+    }
+
+
+class ReplaySession:
+    """
+    One recording, precomputed for fast replay
+
+    The recording is split into segments wherever the live session changed
+    exercise or its rep counter went down (a reset); each segment is replayed
+    with a fresh analyzer, like the live session was.
+    """
+
+    def __init__(self, records, name=""):
+        """
+        Args:
+            records: Structured records from open_recording()
+            name: Label used in reports
+        """
+        self.name = name
+        present = np.flatnonzero(records['present'])
+        landmarks = np.asarray(records['landmarks'][present])
+        exercises = np.asarray(records['exercise'][present])
+        recorded_reps = np.asarray(records['reps'][present]).astype(np.int64)
+
+        angles, _ = batch_joint_angles(landmarks)
+        columns = _evaluate_columns(angles, landmarks)
+
+        boundaries = np.flatnonzero(
+            (exercises[1:] != exercises[:-1]) | (recorded_reps[1:] < recorded_reps[:-1])
+        ) + 1
+        self.segments = []
+        self.recorded_reps = 0
+        for segment in np.split(np.arange(len(present)), boundaries):
+            if len(segment) == 0:
+                continue
+            exercise = EXERCISES[exercises[segment[0]]]
+            if exercise not in columns:
+                continue
+            rows = list(zip(*(column[segment].tolist() for column in columns[exercise])))
+            self.segments.append((exercise, rows))
+            self.recorded_reps += int(recorded_reps[segment].max())
+
+        self.frames = sum(len(rows) for _, rows in self.segments)
+
+    def replay(self, thresholds=None, exercise=None):
+        """
+        Run the analyzer rules over every segment
+
+        Args:
+            thresholds: ExerciseAnalyzer threshold overrides
+            exercise: Only replay segments of this exercise
+
+        Returns:
+            dict: {'reps', 'average_score', 'frames'}
+        """
+        reps = 0
+        score_total = 0
+        frames = 0
+        for segment_exercise, rows in self.segments:
+            if exercise and segment_exercise != exercise:
+                continue
+            analyzer = ExerciseAnalyzer(thresholds)
+            evaluate = getattr(analyzer, f"evaluate_{segment_exercise}")
+            for row in rows:
+                score_total += evaluate(*row)['score']
+            reps += analyzer.rep_count
+            frames += len(rows)
+        return {
+            'reps': reps,
+            'average_score': round(score_total / frames, 2) if frames else 0.0,
+            'frames': frames
+        }
+
+
+def load_session(path):
+    """Open a recording and precompute it for replay"""
+    _, records = open_recording(path)
+    return ReplaySession(records, name=os.path.basename(path))
+
+
+def compare(sessions, candidate, baseline=None, exercise=None):
+    """
+    Rep and score deltas between two threshold sets
+
+    Args:
+        sessions: ReplaySession instances
+        candidate: Threshold overrides to evaluate
+        baseline: Threshold overrides to compare against (defaults when None)
+        exercise: Only compare segments of this exercise
+
+    Returns:
+        list: One dict per session plus a final 'TOTAL' row
+    """
+    rows = []
+    totals = {'baseline_reps': 0, 'candidate_reps': 0, 'recorded_reps': 0, 'frames': 0,
+              'baseline_score_sum': 0.0, 'candidate_score_sum': 0.0}
+    for session in sessions:
+        before = session.replay(baseline, exercise)
+        after = session.replay(candidate, exercise)
+        rows.append({
+            'session': session.name,
+            'frames': before['frames'],
+            'recorded_reps': session.recorded_reps,
+            'baseline_reps': before['reps'],
+            'candidate_reps': after['reps'],
+            'reps_delta': after['reps'] - before['reps'],
+            'baseline_score': before['average_score'],
+            'candidate_score': after['average_score'],
+            'score_delta': round(after['average_score'] - before['average_score'], 2)
+        })
+        totals['frames'] += before['frames']
+        totals['recorded_reps'] += session.recorded_reps
+        totals['baseline_reps'] += before['reps']
+        totals['candidate_reps'] += after['reps']
+        totals['baseline_score_sum'] += before['average_score'] * before['frames']
+        totals['candidate_score_sum'] += after['average_score'] * after['frames']
+
+    frames = totals['frames'] or 1
+    baseline_score = round(totals['baseline_score_sum'] / frames, 2)
+    candidate_score = round(totals['candidate_score_sum'] / frames, 2)
+    rows.append({
+        'session': 'TOTAL',
+        'frames': totals['frames'],
+        'recorded_reps': totals['recorded_reps'],
+        'baseline_reps': totals['baseline_reps'],
+        'candidate_reps': totals['candidate_reps'],
+        'reps_delta': totals['candidate_reps'] - totals['baseline_reps'],
+        'baseline_score': baseline_score,
+        'candidate_score': candidate_score,
+        'score_delta': round(candidate_score - baseline_score, 2)
+    })
+    return rows
+
+
+def _replay_grid(paths, exercise, combos):
+    """Pool worker: load the recordings once and replay a slice of the grid"""
+    sessions = [load_session(path) for path in paths]
+    results = []
+    for combo in combos:
+        thresholds = {exercise: combo}
+        reps = 0
+        score_sum = 0.0
+        frames = 0
+        for session in sessions:
+            result = session.replay(thresholds, exercise)
+            reps += result['reps']
+            score_sum += result['average_score'] * result['frames']
+            frames += result['frames']
+        results.append({
+            'thresholds': combo,
+            'reps': reps,
+            'average_score': round(score_sum / frames, 2) if frames else 0.0,
+            'frames': frames
+        })
+    return results
+
+
+def sweep(paths, exercise, grid, workers=None):
+    """
+    Replay recordings under every combination of threshold values
+
+    Args:
+        paths: Recording files
+        exercise: Exercise whose thresholds are swept
+        grid: {threshold name: [values]}
+        workers: Worker processes (defaults to CPU count)
+
+    Returns:
+        list: One result per combination (in grid order), each with deltas
+        against the default thresholds
+    """
+    names = list(grid)
+    combos = [dict(zip(names, values)) for values in itertools.product(*(grid[name] for name in names))]
+    baseline = _replay_grid(paths, exercise, [{}])[0]
+
+    workers = min(workers or os.cpu_count() or 1, len(combos))
+    if workers <= 1:
+        results = _replay_grid(paths, exercise, combos)
+    else:
+        # Interleaved slices balance the load across workers
+        slices = [combos[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_replay_grid, [paths] * workers, [exercise] * workers, slices))
+        results = [None] * len(combos)
+        for i, part in enumerate(parts):
+            results[i::workers] = part
+
+    for result in results:
+        result['reps_delta'] = result['reps'] - baseline['reps']
+        result['score_delta'] = round(result['average_score'] - baseline['average_score'], 2)
+    return results
+
+
+def _parse_value(text):
+    """Threshold values are ints where possible, floats otherwise"""
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def _print_table(rows, columns):
+    widths = {column: max(len(column), *(len(str(row[column])) for row in rows)) for column in columns}
+    print("  ".join(column.ljust(widths[column]) for column in columns))
+    for row in rows:
+        print("  ".join(str(row[column]).ljust(widths[column]) for column in columns))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    compare_parser = subparsers.add_parser('compare', help='Deltas between default and candidate thresholds')
+    compare_parser.add_argument('recordings', nargs='+')
+    compare_parser.add_argument('--set', action='append', default=[], metavar='EXERCISE.NAME=VALUE',
+                                help='Candidate threshold override (repeatable)')
+    compare_parser.add_argument('--exercise', choices=('squat', 'pushup', 'plank'))
+
+    sweep_parser = subparsers.add_parser('sweep', help='Replay a grid of threshold values in parallel')
+    sweep_parser.add_argument('recordings', nargs='+')
+    sweep_parser.add_argument('--exercise', required=True, choices=('squat', 'pushup', 'plank'))
+    sweep_parser.add_argument('--grid', action='append', required=True, metavar='NAME=V1,V2,...',
+                              help='Threshold values to sweep (repeatable)')
+    sweep_parser.add_argument('--workers', type=int, default=None)
+
+    args = parser.parse_args()
+
+    if args.command == 'compare':
+        candidate = {}
+        for override in args.set:
+            key, value = override.split('=', 1)
+            exercise, name = key.split('.', 1)
+            candidate.setdefault(exercise, {})[name] = _parse_value(value)
+
+        started = time.perf_counter()
+        sessions = [load_session(path) for path in args.recordings]
+        rows = compare(sessions, candidate, exercise=args.exercise)
+        elapsed = time.perf_counter() - started
+
+        _print_table(rows, ['session', 'frames', 'recorded_reps', 'baseline_reps', 'candidate_reps',
+                            'reps_delta', 'baseline_score', 'candidate_score', 'score_delta'])
+        frames = rows[-1]['frames']
+        print(f"\nReplayed {frames} frames twice in {elapsed:.2f}s "
+              f"({2 * frames / elapsed:,.0f} frames/s including loading)")
+
+    else:
+        grid = {}
+        for entry in args.grid:
+            name, values = entry.split('=', 1)
+            grid[name] = [_parse_value(value) for value in values.split(',')]
+
+        started = time.perf_counter()
+        results = sweep(args.recordings, args.exercise, grid, workers=args.workers)
+        elapsed = time.perf_counter() - started
+
+        rows = [{**result['thresholds'], **{k: v for k, v in result.items() if k != 'thresholds'}}
+                for result in results]
+        _print_table(rows, list(grid) + ['reps', 'reps_delta', 'average_score', 'score_delta', 'frames'])
+        print(f"\n{len(results)} threshold sets x {results[0]['frames'] if results else 0} frames "
+              f"in {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,39 @@
 """
 Simple Pose Detection Demo - Run without Jupyter
 Just run: python run_pose_demo.py
+
+Options:
+    --model pose|holistic   Pose-only graph (default) or Holistic, which
+                            also runs the face and hand models
+    --complexity 0|1|2      Pose landmark model: lite, full (default), heavy
+    --keyframe              Infer only keyframes and extrapolate the skeleton
+                            in between (pose model only; see keyframe_engine.py)
+    --compare [--input F]   Print FPS and CPU usage of every model option on
+                            the same frames (a video/image file, or frames
+                            grabbed from the webcam) and exit; with
+                            --keyframe, compare every-frame and keyframe
+                            inference instead (FPS and landmark error)
+
+Capture, inference and display run as a pipeline: a capture thread reads
+the camera, an inference thread always takes the newest frame (older
+ones are dropped), and the display loop shows every camera frame with
+the latest skeleton. The display rate therefore follows the camera
+instead of the slowest stage.
 """
 
+import argparse
+import threading
+import time
+
 print("🔄 Checking dependencies...")
 
 try:
     import cv2
     import mediapipe as mp
     import numpy as np
+    from kinematics import PoseLandmark, calculate_angle, get_landmark_coords, landmarks_to_array
+    from keyframe_engine import KeyframePoseDetector
+    from pose_detector import PoseDetector
     print("✅ All packages imported successfully!")
 except ImportError as e:
     print(f"❌ Missing package: {e}")
@@ -20,9 +45,12 @@ print("\n🏋️ Starting AI Fitness Trainer - Pose Detection Demo")
 print("=" * 60)
 
 # Initialize MediaPipe
+mp_pose = mp.solutions.pose
 mp_holistic = mp.solutions.holistic
 mp_drawing = mp.solutions.drawing_utils
 
+MODELS = ("pose", "holistic")
+
 # Color scheme
 POSE_COLOR = (0, 255, 0)
 UPPER_COLOR = (255, 150, 0)
@@ -34,34 +62,17 @@ rep_count = 0
 stage = None
 form_score = 0
 feedback_messages = []
-
-def calculate_angle(a, b, c):
-    """Calculate angle between three points"""
-    a = np.array(a)
-    b = np.array(b)
-    c = np.array(c)
-    
-    radians = np.arctan2(c[1]-b[1], c[0]-b[0]) - np.arctan2(a[1]-b[1], a[0]-b[0])
-    angle = np.abs(radians * 180.0 / np.pi)
-    
-    if angle > 180.0:
-        angle = 360 - angle
-    
-    return angle
+state_lock = threading.Lock()  # exercise state is shared by inference and display
 
 def analyze_squat(landmarks):
     """Analyze squat form and count reps"""
     global rep_count, stage, form_score, feedback_messages
     
     # Get landmarks
-    hip = [landmarks[mp_holistic.PoseLandmark.LEFT_HIP.value].x,
-           landmarks[mp_holistic.PoseLandmark.LEFT_HIP.value].y]
-    knee = [landmarks[mp_holistic.PoseLandmark.LEFT_KNEE.value].x,
-            landmarks[mp_holistic.PoseLandmark.LEFT_KNEE.value].y]
-    ankle = [landmarks[mp_holistic.PoseLandmark.LEFT_ANKLE.value].x,
-             landmarks[mp_holistic.PoseLandmark.LEFT_ANKLE.value].y]
-    shoulder = [landmarks[mp_holistic.PoseLandmark.LEFT_SHOULDER.value].x,
-                landmarks[mp_holistic.PoseLandmark.LEFT_SHOULDER.value].y]
+    hip = get_landmark_coords(landmarks, PoseLandmark.LEFT_HIP)
+    knee = get_landmark_coords(landmarks, PoseLandmark.LEFT_KNEE)
+    ankle = get_landmark_coords(landmarks, PoseLandmark.LEFT_ANKLE)
+    shoulder = get_landmark_coords(landmarks, PoseLandmark.LEFT_SHOULDER)
     
     # Calculate angles
     knee_angle = calculate_angle(hip, knee, ankle)
@@ -110,16 +121,11 @@ def analyze_pushup(landmarks):
     global rep_count, stage, form_score, feedback_messages
     
     # Get landmarks
-    shoulder = [landmarks[mp_holistic.PoseLandmark.LEFT_SHOULDER.value].x,
-                landmarks[mp_holistic.PoseLandmark.LEFT_SHOULDER.value].y]
-    elbow = [landmarks[mp_holistic.PoseLandmark.LEFT_ELBOW.value].x,
-             landmarks[mp_holistic.PoseLandmark.LEFT_ELBOW.value].y]
-    wrist = [landmarks[mp_holistic.PoseLandmark.LEFT_WRIST.value].x,
-             landmarks[mp_holistic.PoseLandmark.LEFT_WRIST.value].y]
-    hip = [landmarks[mp_holistic.PoseLandmark.LEFT_HIP.value].x,
-           landmarks[mp_holistic.PoseLandmark.LEFT_HIP.value].y]
-    knee = [landmarks[mp_holistic.PoseLandmark.LEFT_KNEE.value].x,
-            landmarks[mp_holistic.PoseLandmark.LEFT_KNEE.value].y]
+    shoulder = get_landmark_coords(landmarks, PoseLandmark.LEFT_SHOULDER)
+    elbow = get_landmark_coords(landmarks, PoseLandmark.LEFT_ELBOW)
+    wrist = get_landmark_coords(landmarks, PoseLandmark.LEFT_WRIST)
+    hip = get_landmark_coords(landmarks, PoseLandmark.LEFT_HIP)
+    knee = get_landmark_coords(landmarks, PoseLandmark.LEFT_KNEE)
     
     # Calculate angles
     elbow_angle = calculate_angle(shoulder, elbow, wrist)
@@ -188,94 +194,385 @@ def draw_stats(frame, rep_count, form_score, exercise_mode, feedback_messages):
                 (10, frame.shape[0] - 20),
                 cv2.FONT_HERSHEY_SIMPLEX, 0.5, (255, 255, 255), 1)
 
-# Initialize MediaPipe Holistic
-holistic = mp_holistic.Holistic(
-    min_detection_confidence=0.7,
-    min_tracking_confidence=0.7,
-    smooth_landmarks=True
-)
-
-# Open webcam
-print("\n📹 Opening webcam...")
-cap = cv2.VideoCapture(0)
-
-if not cap.isOpened():
-    print("❌ Error: Could not open webcam!")
-    print("   - Check if webcam is connected")
-    print("   - Close other apps using webcam (Zoom, Teams, etc.)")
-    exit(1)
+def create_model(model="pose", complexity=1):
+    """
+    Build the MediaPipe graph to run on each frame
+    
+    Only pose landmarks are analyzed, so the pose-only graph is enough;
+    Holistic additionally runs face and hand models on every frame.
+    """
+    solution = mp_pose.Pose if model == "pose" else mp_holistic.Holistic
+    return solution(
+        model_complexity=complexity,
+        min_detection_confidence=0.7,
+        min_tracking_confidence=0.7,
+        smooth_landmarks=True
+    )
 
-print("✅ Webcam opened successfully!")
-print("\n🎮 Controls:")
-print("   'q' - Switch to Squat mode")
-print("   'p' - Switch to Pushup mode")
-print("   'r' - Reset rep counter")
-print("   's' - Stop and exit")
-print("\n📊 Starting pose detection...")
-print("=" * 60)
 
-cv2.namedWindow("AI Fitness Trainer", cv2.WINDOW_NORMAL)
-cv2.resizeWindow("AI Fitness Trainer", 1280, 720)
+def create_keyframe_detector(complexity=1, exercise="squat"):
+    """Pose-only graph behind a KeyframePoseEngine, with create_model()'s confidences"""
+    detector = PoseDetector(min_detection_confidence=0.7, min_tracking_confidence=0.7,
+                            model_complexity=complexity)
+    return KeyframePoseDetector(detector, exercise)
 
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        print("❌ Failed to grab frame")
-        break
-    
-    frame = cv2.flip(frame, 1)
-    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-    result = holistic.process(rgb)
+
+def load_comparison_frames(path, count):
+    """
+    Frames every model option is measured on
     
-    if result.pose_landmarks:
-        lm = result.pose_landmarks.landmark
-        
-        # Draw pose skeleton
-        mp_drawing.draw_landmarks(
-            frame,
-            result.pose_landmarks,
-            mp_holistic.POSE_CONNECTIONS,
-            mp_drawing.DrawingSpec(color=POSE_COLOR, thickness=2, circle_radius=3),
-            mp_drawing.DrawingSpec(color=POSE_COLOR, thickness=2)
-        )
+    Args:
+        path: Video or image file; None grabs frames from the webcam
+        count: Number of frames
+    """
+    if path:
+        image = cv2.imread(path)
+        if image is not None:
+            return [cv2.flip(image, 1)] * count
+    cap = cv2.VideoCapture(path if path else 0)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(cv2.flip(frame, 1))
+    cap.release()
+    if not frames:
+        print(f"❌ Error: Could not read frames from {path or 'webcam'}")
+        exit(1)
+    return frames
+
+
+def compare_models(frames, warmup=10):
+    """Print FPS and CPU usage of every model/complexity on the same frames"""
+    rgb_frames = [cv2.cvtColor(frame, cv2.COLOR_BGR2RGB) for frame in frames]
+    print(f"\n📊 Comparing models on {len(frames)} frames "
+          f"({frames[0].shape[1]}x{frames[0].shape[0]})")
+    print(f"{'model':<10} {'complexity':>10} {'FPS':>8} {'ms/frame':>9} {'CPU %':>7} {'pose found':>11}")
+    for model in MODELS:
+        for complexity in (0, 1, 2):
+            try:
+                solution = create_model(model, complexity)
+            except Exception as e:
+                # Lite and heavy models are downloaded on first use
+                print(f"{model:<10} {complexity:>10}   unavailable: {e}")
+                continue
+            for rgb in rgb_frames[:warmup]:
+                solution.process(rgb)
+            found = 0
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            for rgb in rgb_frames:
+                if solution.process(rgb).pose_landmarks:
+                    found += 1
+            wall = time.perf_counter() - wall_started
+            cpu = time.process_time() - cpu_started
+            solution.close()
+            # CPU % is of one core; MediaPipe may use several threads
+            print(f"{model:<10} {complexity:>10} {len(rgb_frames) / wall:>8.1f} "
+                  f"{wall * 1000 / len(rgb_frames):>9.1f} {cpu / wall * 100:>7.0f} "
+                  f"{found / len(rgb_frames):>10.0%}")
+
+
+def compare_keyframes(frames, complexity=1, exercise="squat", fps=30.0):
+    """
+    Print FPS and landmark error of keyframe inference against every frame
+
+    Frames are timestamped at `fps`, as if they came from the camera, so
+    the keyframe gaps do not depend on how fast this machine runs. The
+    error is the mean distance in pixels between the keyframe and the
+    every-frame landmarks, over landmarks the full model sees (visibility
+    above 0.5).
+    """
+    height, width = frames[0].shape[:2]
+    print(f"\n📊 Comparing keyframe inference on {len(frames)} frames ({width}x{height}, "
+          f"complexity {complexity}, {exercise})")
+    print(f"{'mode':<10} {'FPS':>8} {'ms/frame':>9} {'inferred':>9} {'error px':>9} {'max px':>7}")
+
+    full = PoseDetector(min_detection_confidence=0.7, min_tracking_confidence=0.7, model_complexity=complexity)
+    full.warm_up(width, height)
+    started = time.perf_counter()
+    reference = []
+    for frame in frames:
+        _, landmarks = full.detect_pose(frame, draw=False)
+        reference.append(landmarks_to_array(landmarks) if landmarks else None)
+    wall = time.perf_counter() - started
+    full.close()
+    print(f"{'every':<10} {len(frames) / wall:>8.1f} {wall * 1000 / len(frames):>9.1f} {1:>9.0%} "
+          f"{0:>9.1f} {0:>7.1f}")
+
+    keyframes = create_keyframe_detector(complexity, exercise)
+    keyframes.detector.warm_up(width, height)
+    errors = []
+    started = time.perf_counter()
+    for i, frame in enumerate(frames):
+        _, landmarks = keyframes.detect_pose(frame, draw=False, t=i / fps)
+        if landmarks and reference[i] is not None:
+            points = landmarks_to_array(landmarks)
+            seen = reference[i][:, 3] > 0.5
+            offset = (points[seen, :2] - reference[i][seen, :2]) * (width, height)
+            errors.append(np.hypot(offset[:, 0], offset[:, 1]))
+    wall = time.perf_counter() - started
+    stats = keyframes.stats()
+    keyframes.close()
+    errors = np.concatenate(errors) if errors else np.zeros(1)
+    print(f"{'keyframe':<10} {len(frames) / wall:>8.1f} {wall * 1000 / len(frames):>9.1f} "
+          f"{stats['keyframe_inferences'] / stats['keyframe_frames']:>9.0%} "
+          f"{errors.mean():>9.1f} {errors.max():>7.1f}")
+
+
+def draw_pipeline_fps(frame, capture_fps, inference_fps, display_fps):
+    """Draw per-stage FPS readout in the top-right corner"""
+    x = frame.shape[1] - 230
+    cv2.rectangle(frame, (x - 10, 10), (frame.shape[1] - 10, 110), (0, 0, 0), -1)
+    for i, (name, fps) in enumerate((("Camera", capture_fps), ("Inference", inference_fps), ("Display", display_fps))):
+        cv2.putText(frame, f"{name}: {fps:5.1f} FPS", (x, 40 + i * 30),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
+
+
+class LatestSlot:
+    """
+    One-item handoff between pipeline stages
+
+    put() replaces whatever is waiting, so a slow consumer always gets the
+    newest item and never a backlog. Consumers remember the sequence
+    number of the last item they took and wait for a newer one, which lets
+    the inference and display stages read the same camera slot.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._item = None
+        self._seq = 0
+        self._closed = False
+
+    def put(self, item):
+        with self._cond:
+            self._item = item
+            self._seq += 1
+            self._cond.notify_all()
+
+    def get(self, after_seq, timeout=0.1):
+        """
+        Wait for an item newer than `after_seq`
+
+        Returns:
+            tuple: (seq, item), or (after_seq, None) on timeout or close
+        """
+        with self._cond:
+            self._cond.wait_for(lambda: self._seq > after_seq or self._closed, timeout)
+            if self._seq > after_seq:
+                return self._seq, self._item
+            return after_seq, None
+
+    def latest(self):
+        with self._cond:
+            return self._item
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+
+class FPSMeter:
+    """Frames per second of one stage, averaged over the last `window` seconds"""
+
+    def __init__(self, window=1.0):
+        self.window = window
+        self.fps = 0.0
+        self._count = 0
+        self._started = time.perf_counter()
+
+    def tick(self):
+        self._count += 1
+        elapsed = time.perf_counter() - self._started
+        if elapsed >= self.window:
+            self.fps = self._count / elapsed
+            self._count = 0
+            self._started = time.perf_counter()
+
+
+def capture_loop(cap, frames, meter, stop):
+    """Read camera frames into the frame slot until stopped"""
+    while not stop.is_set():
+        ret, frame = cap.read()
+        if not ret:
+            print("❌ Failed to grab frame")
+            stop.set()
+            break
+        frames.put(cv2.flip(frame, 1))
+        meter.tick()
+    frames.close()
+
+
+def inference_loop(model, frames, results, meter, stop):
+    """Run pose inference and analysis on the newest frame, dropping older ones"""
+    seq = 0
+    while not stop.is_set():
+        seq, frame = frames.get(seq)
+        if frame is None:
+            continue
+        # Frames are shared with the display loop: convert, never draw on them
+        if isinstance(model, KeyframePoseDetector):
+            with state_lock:
+                exercise = exercise_mode
+            if model.engine.exercise != exercise:
+                model.set_exercise(exercise)
+            _, pose_landmarks = model.detect_pose(frame, draw=False)
+        else:
+            pose_landmarks = model.process(cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)).pose_landmarks
         
-        # Analyze exercise
-        if exercise_mode == "squat":
-            analyze_squat(lm)
-        elif exercise_mode == "pushup":
-            analyze_pushup(lm)
+        if pose_landmarks:
+            with state_lock:
+                if exercise_mode == "squat":
+                    analyze_squat(pose_landmarks)
+                elif exercise_mode == "pushup":
+                    analyze_pushup(pose_landmarks)
+        results.put(pose_landmarks)
+        meter.tick()
+
+
+def handle_key(key):
+    """Apply a keyboard command; returns False to stop"""
+    global exercise_mode, rep_count, stage
     
-    # Draw stats overlay
-    draw_stats(frame, rep_count, form_score, exercise_mode, feedback_messages)
+    if key == ord('s'):
+        return False
+    with state_lock:
+        if key == ord('q'):
+            exercise_mode = "squat"
+            rep_count = 0
+            stage = None
+            print("✅ Switched to SQUAT mode")
+        elif key == ord('p'):
+            exercise_mode = "pushup"
+            rep_count = 0
+            stage = None
+            print("✅ Switched to PUSHUP mode")
+        elif key == ord('r'):
+            rep_count = 0
+            stage = None
+            print("✅ Rep counter reset")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="AI Fitness Trainer - Pose Detection Demo")
+    parser.add_argument('--model', choices=MODELS, default="pose",
+                        help='MediaPipe graph: pose-only (default) or holistic (adds face and hands)')
+    parser.add_argument('--complexity', type=int, choices=(0, 1, 2), default=1,
+                        help='Pose landmark model: 0=lite, 1=full, 2=heavy')
+    parser.add_argument('--keyframe', action='store_true',
+                        help='Infer only keyframes and extrapolate the skeleton in between (pose model only)')
+    parser.add_argument('--compare', action='store_true',
+                        help='Print FPS and CPU usage of every model option and exit')
+    parser.add_argument('--input', help='Video or image for --compare (defaults to the webcam)')
+    parser.add_argument('--frames', type=int, default=150, help='Frames per option for --compare')
+    args = parser.parse_args()
+    if args.keyframe and args.model != "pose":
+        parser.error("--keyframe needs --model pose")
     
-    cv2.imshow("AI Fitness Trainer", frame)
+    if args.compare:
+        frames = load_comparison_frames(args.input, args.frames)
+        if args.keyframe:
+            compare_keyframes(frames, args.complexity, exercise_mode)
+        else:
+            compare_models(frames)
+        return
     
-    if cv2.getWindowProperty("AI Fitness Trainer", cv2.WND_PROP_VISIBLE) < 1:
-        break
+    # Initialize MediaPipe
+    print(f"🧠 Model: {args.model}, complexity {args.complexity}{', keyframes only' if args.keyframe else ''}")
+    if args.keyframe:
+        model = create_keyframe_detector(args.complexity, exercise_mode)
+    else:
+        model = create_model(args.model, args.complexity)
     
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('s'):
-        break
-    elif key == ord('q'):
-        exercise_mode = "squat"
-        rep_count = 0
-        stage = None
-        print("✅ Switched to SQUAT mode")
-    elif key == ord('p'):
-        exercise_mode = "pushup"
-        rep_count = 0
-        stage = None
-        print("✅ Switched to PUSHUP mode")
-    elif key == ord('r'):
-        rep_count = 0
-        stage = None
-        print("✅ Rep counter reset")
-
-cap.release()
-cv2.destroyAllWindows()
-
-print("\n" + "=" * 60)
-print("✅ Session Complete!")
-print(f"   Total Reps: {rep_count}")
-print(f"   Final Form Score: {form_score}%")
-print("=" * 60)
+    # Open webcam
+    print("\n📹 Opening webcam...")
+    cap = cv2.VideoCapture(0)
+    
+    if not cap.isOpened():
+        print("❌ Error: Could not open webcam!")
+        print("   - Check if webcam is connected")
+        print("   - Close other apps using webcam (Zoom, Teams, etc.)")
+        exit(1)
+    
+    print("✅ Webcam opened successfully!")
+    print("\n🎮 Controls:")
+    print("   'q' - Switch to Squat mode")
+    print("   'p' - Switch to Pushup mode")
+    print("   'r' - Reset rep counter")
+    print("   's' - Stop and exit")
+    print("\n📊 Starting pose detection...")
+    print("=" * 60)
+    
+    cv2.namedWindow("AI Fitness Trainer", cv2.WINDOW_NORMAL)
+    cv2.resizeWindow("AI Fitness Trainer", 1280, 720)
+    
+    frames = LatestSlot()    # camera -> inference and display
+    results = LatestSlot()   # inference -> display
+    capture_fps, inference_fps, display_fps = FPSMeter(), FPSMeter(), FPSMeter()
+    stop = threading.Event()
+    workers = [
+        threading.Thread(target=capture_loop, args=(cap, frames, capture_fps, stop), daemon=True),
+        threading.Thread(target=inference_loop, args=(model, frames, results, inference_fps, stop), daemon=True),
+    ]
+    for worker in workers:
+        worker.start()
+    
+    # Display runs on the main thread (required by cv2.imshow on most platforms)
+    seq = 0
+    try:
+        while not stop.is_set():
+            seq, frame = frames.get(seq)
+            if frame is None:
+                continue
+            frame = frame.copy()
+            
+            # Latest skeleton, possibly from a slightly older frame
+            pose_landmarks = results.latest()
+            if pose_landmarks:
+                mp_drawing.draw_landmarks(
+                    frame,
+                    pose_landmarks,
+                    mp_pose.POSE_CONNECTIONS,
+                    mp_drawing.DrawingSpec(color=POSE_COLOR, thickness=2, circle_radius=3),
+                    mp_drawing.DrawingSpec(color=POSE_COLOR, thickness=2)
+                )
+            
+            # Draw stats overlay
+            with state_lock:
+                stats = (rep_count, form_score, exercise_mode, list(feedback_messages))
+            draw_stats(frame, *stats)
+            display_fps.tick()
+            draw_pipeline_fps(frame, capture_fps.fps, inference_fps.fps, display_fps.fps)
+            
+            cv2.imshow("AI Fitness Trainer", frame)
+            
+            if cv2.getWindowProperty("AI Fitness Trainer", cv2.WND_PROP_VISIBLE) < 1:
+                break
+            
+            key = cv2.waitKey(1) & 0xFF
+            if not handle_key(key):
+                break
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+        cap.release()
+        model.close()
+        cv2.destroyAllWindows()
+    
+    print("\n" + "=" * 60)
+    print("✅ Session Complete!")
+    print(f"   Total Reps: {rep_count}")
+    print(f"   Final Form Score: {form_score}%")
+    if args.keyframe:
+        stats = model.stats()
+        print(f"   Inferred Frames: {stats['keyframe_inferences']} of {stats['keyframe_frames']}")
+    print("=" * 60)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,216 @@
+"""
+Offline Video Analyzer
+Runs pose detection and exercise analysis over a recorded video
+
+Frames are decoded one at a time (the video is never loaded into memory).
+Long videos are split into frame ranges that are processed in parallel by
+a process pool; each chunk only extracts landmarks. The exercise state
+machine then runs once over the concatenated landmark sequence, so a rep
+that spans a chunk boundary is counted exactly once.
+"""
+
+import multiprocessing
+import os
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cv2
+import numpy as np
+
+try:
+    from exercise_analyzer import ExerciseAnalyzer
+    from kinematics import landmarks_to_array, stack_landmarks
+except ImportError:
+    from .exercise_analyzer import ExerciseAnalyzer
+    from .kinematics import landmarks_to_array, stack_landmarks
+
+SUPPORTED_EXERCISES = ("squat", "pushup", "plank")
+DEFAULT_CHUNK_FRAMES = 600
+
+
+def probe_video(path):
+    """
+    Read frame count and frame rate from the container
+
+    Returns:
+        tuple: (frame_count, fps); frame_count is 0 when the container
+        does not report it
+    """
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open video: {path}")
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT) or 0)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 30.0
+    cap.release()
+    return max(frame_count, 0), fps
+
+
+def _seek(cap, start):
+    """Position the capture at frame `start`, grabbing forward if seeking is inexact"""
+    if start == 0:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(start):
+        if not cap.grab():
+            break
+
+
+def extract_landmarks(path, start=0, end=None, model_complexity=1):
+    """
+    Decode frames [start, end) and run pose detection on each
+
+    Runs inside a pool worker process, so it builds its own detector.
+
+    Args:
+        path: Video file path
+        start: First frame index
+        end: One past the last frame index (None reads to the end)
+        model_complexity: MediaPipe Pose model complexity (0, 1 or 2)
+
+    Returns:
+        tuple: (start, landmarks) where landmarks is an (n, 33, 4) float32
+        tensor with NaN rows for frames without a detected pose
+    """
+    try:
+        from pose_detector import PoseDetector
+    except ImportError:
+        from .pose_detector import PoseDetector
+
+    cap = cv2.VideoCapture(path)
+    _seek(cap, start)
+    detector = PoseDetector(model_complexity=model_complexity)
+
+    frames = []
+    index = start
+    try:
+        while end is None or index < end:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            _, landmarks = detector.detect_pose(frame, draw=False)
+            frames.append(landmarks_to_array(landmarks) if landmarks else None)
+            index += 1
+    finally:
+        cap.release()
+        detector.close()
+
+    return start, stack_landmarks(frames)
+
+
+def analyze_landmark_sequence(landmarks, fps, exercise, analyzer=None):
+    """
+    Run the exercise state machine over a landmark sequence
+
+    Args:
+        landmarks: (N_frames, 33, 4) tensor, NaN rows where no pose was found
+        fps: Frame rate used to turn frame indices into timestamps
+        exercise: "squat", "pushup" or "plank"
+        analyzer: Optional ExerciseAnalyzer (e.g. with custom thresholds)
+
+    Returns:
+        dict: Rep timeline with per-rep form scores and feedback
+    """
+    if exercise not in SUPPORTED_EXERCISES:
+        raise ValueError(f"Exercise '{exercise}' not supported. Use: {', '.join(SUPPORTED_EXERCISES)}")
+
+    analyzer = analyzer or ExerciseAnalyzer()
+    analyze = getattr(analyzer, f"analyze_{exercise}")
+    has_pose = ~np.isnan(landmarks[:, 0, 0])
+
+    reps = []
+    scores = []
+    rep_scores = []
+    rep_feedback = Counter()
+    rep_start = None
+    bottom_frame = None
+
+    for i in np.flatnonzero(has_pose).tolist():
+        result = analyze(landmarks[i])
+        scores.append(result['score'])
+        rep_scores.append(result['score'])
+        rep_feedback.update(result['feedback'])
+        if rep_start is None:
+            rep_start = i
+        if result.get('stage') == "down" and bottom_frame is None:
+            bottom_frame = i
+
+        if result.get('reps', 0) > len(reps):
+            reps.append({
+                'rep': len(reps) + 1,
+                'start_time': round(rep_start / fps, 3),
+                'bottom_time': round(bottom_frame / fps, 3) if bottom_frame is not None else None,
+                'end_time': round(i / fps, 3),
+                'form_score': int(np.mean(rep_scores)),
+                'feedback': [message for message, _ in rep_feedback.most_common(3)]
+            })
+            rep_scores = []
+            rep_feedback = Counter()
+            rep_start = None
+            bottom_frame = None
+
+    return {
+        'exercise': exercise,
+        'fps': round(float(fps), 3),
+        'total_frames': int(len(landmarks)),
+        'frames_with_pose': int(has_pose.sum()),
+        'duration_seconds': round(len(landmarks) / fps, 3),
+        'total_reps': len(reps),
+        'average_form_score': int(np.mean(scores)) if scores else 0,
+        'reps': reps
+    }
+
+
+def analyze_video(path, exercise, workers=None, chunk_frames=DEFAULT_CHUNK_FRAMES,
+                  model_complexity=1, progress=None):
+    """
+    Analyze a recorded exercise video
+
+    Args:
+        path: Video file path
+        exercise: "squat", "pushup" or "plank"
+        workers: Worker processes (defaults to CPU count)
+        chunk_frames: Frames per parallel chunk
+        model_complexity: MediaPipe Pose model complexity (0, 1 or 2)
+        progress: Optional callback(frames_done, total_frames)
+
+    Returns:
+        dict: See analyze_landmark_sequence()
+    """
+    if exercise not in SUPPORTED_EXERCISES:
+        raise ValueError(f"Exercise '{exercise}' not supported. Use: {', '.join(SUPPORTED_EXERCISES)}")
+
+    frame_count, fps = probe_video(path)
+    workers = workers or os.cpu_count() or 1
+
+    if frame_count == 0 or workers == 1 or frame_count <= chunk_frames:
+        # Unknown length or nothing to split: stream it in this process
+        _, landmarks = extract_landmarks(path, model_complexity=model_complexity)
+        if progress:
+            progress(len(landmarks), len(landmarks))
+        return analyze_landmark_sequence(landmarks, fps, exercise)
+
+    ranges = [(start, min(start + chunk_frames, frame_count))
+              for start in range(0, frame_count, chunk_frames)]
+    chunks = {}
+    frames_done = 0
+
+    # Spawned workers: forking a process that already runs MediaPipe threads is unsafe
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=context) as pool:
+        futures = [
+            pool.submit(extract_landmarks, path, start, end, model_complexity)
+            for start, end in ranges
+        ]
+        for future in as_completed(futures):
+            start, landmarks = future.result()
+            chunks[start] = landmarks
+            frames_done += len(landmarks)
+            if progress:
+                progress(frames_done, frame_count)
+
+    # Stitch chunks back in order so rep state carries across boundaries
+    landmarks = np.concatenate([chunks[start] for start, _ in ranges])
+    return analyze_landmark_sequence(landmarks, fps, exercise)